@@ -0,0 +1,114 @@
+import logging
+import sqlite3
+import zlib
+from datetime import datetime
+
+from constants import CACHE_QUERY_SIZE, CACHE_SCHEMA_VERSION
+from history import CommitStats, parse_numstat_line
+
+
+class CommitCache:
+    """
+    A persistent cache of commit metadata stored in an SQLite database, so repeated runs against the same repository
+    only walk the diffs of commits which haven't been seen before.
+
+    Entries are keyed by the repository source and the commit ID.  The changes of each commit are stored as compressed
+    "git log --numstat" output, so any filter on the changed files can be applied to cached commits.
+    """
+
+    def __init__(self, cache_file, repo_key) -> None:
+        """
+        Opens (or creates) the cache database.  A database created by an older version of GitSlice is emptied.
+
+        :param cache_file: Location of the SQLite database
+        :param repo_key: String identifying the repository, usually the repository source from the configuration file
+        """
+
+        logging.debug('Opening commit cache at %s for %s', cache_file, repo_key)
+
+        self._repo_key = repo_key
+        self._connection = sqlite3.connect(cache_file, timeout=60)
+
+        version = self._connection.execute('PRAGMA user_version').fetchone()[0]
+        # A new database has a version of 0 but no table, so there is nothing to rebuild
+        exists = self._connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'commits'") \
+            .fetchone() is not None
+
+        if exists and version != CACHE_SCHEMA_VERSION:
+            logging.info('Commit cache at %s is from an older version, it will be rebuilt', cache_file)
+            self._connection.execute('DROP TABLE commits')
+
+        self._connection.execute('CREATE TABLE IF NOT EXISTS commits (repo TEXT NOT NULL, commit_id TEXT NOT NULL, '
+                                 'commit_time TEXT NOT NULL, tree_id TEXT NOT NULL, parents TEXT NOT NULL, '
+                                 'files INTEGER NOT NULL, additions INTEGER NOT NULL, deletions INTEGER NOT NULL, '
+                                 'changes BLOB NOT NULL, PRIMARY KEY (repo, commit_id)) WITHOUT ROWID')
+        self._connection.execute(f'PRAGMA user_version = {CACHE_SCHEMA_VERSION}')
+        self._connection.commit()
+
+    def get_many(self, commit_ids, shortstat_filter=None) -> dict:
+        """
+        Looks up a batch of commits in the cache, in queries of at most CACHE_QUERY_SIZE commits.  When a filter is
+        given, the stored counts of the whole batch are tested at once and the changes of commits which don't match are
+        never read.
+
+        :param commit_ids: A list of commit IDs
+        :param shortstat_filter: Optional ShortstatFilter tested against the files changed, additions and deletions
+        :return: Dictionary of commit IDs to CommitStats objects for the commits which are cached, commits which are
+        cached but don't match the filter map to None
+        """
+
+        rows = []
+
+        for start in range(0, len(commit_ids), CACHE_QUERY_SIZE):
+            query_ids = commit_ids[start:start + CACHE_QUERY_SIZE]
+            placeholders = ', '.join('?' * len(query_ids))
+            rows += self._connection.execute(f'SELECT commit_id, commit_time, tree_id, parents, changes, files, '
+                                             f'additions, deletions FROM commits WHERE repo = ? AND commit_id IN '
+                                             f'({placeholders})', (self._repo_key, *query_ids)).fetchall()
+
+        result = {}
+
+        if shortstat_filter is not None and not shortstat_filter.is_empty():
+            mask = shortstat_filter.mask([row[5:] for row in rows])
+            result.update((row[0], None) for row, matches in zip(rows, mask) if not matches)
+            rows = [row for row, matches in zip(rows, mask) if matches]
+
+        for commit_id, commit_time, tree_id, parents, changes, *_ in rows:
+            commit_stats = CommitStats(commit_id, datetime.fromisoformat(commit_time), tree_id, parents.split())
+
+            for line in zlib.decompress(changes).decode('utf-8').splitlines():
+                commit_stats.add_change(*parse_numstat_line(line))
+
+            result[commit_id] = commit_stats
+
+        return result
+
+    def put_many(self, commits) -> None:
+        """
+        Stores a batch of commits in the cache.
+
+        :param commits: An iterable of CommitStats objects
+        :return: None
+        """
+
+        rows = []
+
+        for commit_stats in commits:
+            numstat = ''.join(f'{additions}\t{deletions}\t{path}\n'
+                              for additions, deletions, path in commit_stats.get_changes())
+
+            rows.append((self._repo_key, commit_stats.get_commit_id(), commit_stats.get_commit_time().isoformat(),
+                         commit_stats.get_tree_id(), ' '.join(commit_stats.get_parents()),
+                         *commit_stats.get_shortstat(), zlib.compress(numstat.encode('utf-8'))))
+
+        self._connection.executemany('INSERT OR REPLACE INTO commits VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        self._connection.commit()
+
+    def close(self) -> None:
+        """
+        Closes the connection to the cache database.
+
+        :return: None
+        """
+
+        self._connection.close()
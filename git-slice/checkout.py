@@ -0,0 +1,106 @@
+import logging
+import os
+import socket
+import threading
+
+from git import Repo
+
+from config import CheckoutBackends
+
+
+class RepoFSCheckout:
+    """
+    Gives the files of each commit from the RepoFS virtual filesystem, which is mounted by the filesystem manager.
+    Every file read by the analysis goes through FUSE to the Git objects in the repository.
+    """
+
+    def __init__(self, mount_dir) -> None:
+        """
+        Initialise the checkout backend.
+
+        :param mount_dir: Mount point of the RepoFS virtual filesystem
+        """
+
+        self._mount_dir = mount_dir
+
+    def get_commit_dir(self, commit_id) -> str:
+        """
+        Gives the directory containing the files of a commit.
+
+        :param commit_id: SHA1 hash of the commit
+        :return: Location of the directory containing the files of the commit
+        """
+
+        return self._mount_dir + 'commits-by-hash/' + commit_id
+
+
+class WorktreeCheckout:
+    """
+    Materialises the files of each commit into a Git worktree in the checkout directory, which is usually on a
+    node-local tmpfs such as /dev/shm.
+
+    Each worker thread has its own worktree which is reused for every commit it is given.  Moving a worktree from one
+    commit to the next only rewrites the files which differ between the two, so consecutive commits on the same worker
+    are cheap to check out.
+    """
+
+    def __init__(self, repo_dir, checkout_dir) -> None:
+        """
+        Initialise the checkout backend.  The checkout directory must already exist.
+
+        :param repo_dir: Location of the repository cloned by the filesystem manager
+        :param checkout_dir: Directory the worktrees will be created in
+        """
+
+        self._repo_dir = repo_dir
+        self._checkout_dir = checkout_dir
+        self._local = threading.local()
+
+        # Adding a worktree updates the repository's list of worktrees, so only one thread adds a worktree at once
+        self._add_lock = threading.Lock()
+
+    def get_commit_dir(self, commit_id) -> str:
+        """
+        Checks out a commit into the worktree of the calling thread, creating the worktree the first time it is used.
+        Files created in the worktree since the last commit (i.e. by the analysis) are removed.
+
+        :param commit_id: SHA1 hash of the commit
+        :return: Location of the directory containing the files of the commit
+        """
+
+        worktree = getattr(self._local, 'worktree', None)
+
+        if worktree is None:
+            worktree_dir = os.path.join(self._checkout_dir,
+                                        f'{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}')
+
+            logging.debug('Adding worktree %s at %s', worktree_dir, commit_id)
+
+            with self._add_lock:
+                Repo(self._repo_dir).git.worktree('add', '--detach', worktree_dir, commit_id)
+
+            self._local.worktree = Repo(worktree_dir)
+        else:
+            logging.debug('Moving worktree %s from %s to %s', worktree.working_tree_dir, self._local.commit_id,
+                          commit_id)
+
+            worktree.git.checkout('--detach', '--force', commit_id)
+            worktree.git.clean('-ffdxq')
+
+        self._local.commit_id = commit_id
+
+        return self._local.worktree.working_tree_dir
+
+
+def create_checkout(config):
+    """
+    Creates the checkout backend given by the configuration file.
+
+    :param config: The configuration object used to get the checkout backend and the location of directories
+    :return: A checkout backend, which has a get_commit_dir() method
+    """
+
+    if config.get_checkout_backend() == CheckoutBackends.WORKTREE:
+        return WorktreeCheckout(config.get_repo_dir(), config.get_checkout_dir())
+
+    return RepoFSCheckout(config.get_mount_dir())
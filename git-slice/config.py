@@ -1,10 +1,16 @@
 import logging
 import sys
+from datetime import timedelta
 from enum import Enum
 from uuid import uuid4
 
 import yaml
 
+from constants import RESULTS_FILE_NAME, TIMEDELTA_PATTERN
+from extractors import create_extractor
+from filters import PathFilter, RangeFilter
+from runners import InvalidRunnerException, RunnerTypes, create_runner, get_runner_type
+
 
 class ConfigKeys(Enum):
     """
@@ -13,13 +19,26 @@ class ConfigKeys(Enum):
 
     TEMP_DIR = "Temp Directory"
     RSYNC_TO_TEMP = "Rsync To Temp"
+    RSYNC_DELTA = "Rsync Delta"
     OUTPUT_DIR = "Output Directory"
     OUTPUT_FORMAT = "Output Format"
+    OUTPUT_BACKEND = "Output Backend"
+    MANIFEST_DIR = "Manifest Directory"
     REPO_TYPE = "Git Repository Type"
     REPO_SOURCE = "Git Repository Source"
     ANALYSIS = "Analysis"
     REPO_DIR_NAME = "Repo Directory Name"
     MOUNT_DIR_NAME = "Mount Directory Name"
+    CACHE_FILE = "Cache File"
+    MAX_IN_FLIGHT = "Max In Flight"
+    CHUNK_SIZE = "Chunk Size"
+    SCHEDULING = "Scheduling"
+    IMAGE_CACHE_DIR = "Image Cache Directory"
+    PERSISTENT_INSTANCES = "Persistent Instances"
+    DEDUP_DIR = "Dedup Directory"
+    DEDUP_PATH = "Dedup Path"
+    CHECKOUT_BACKEND = "Checkout Backend"
+    CHECKOUT_DIR = "Checkout Directory"
 
     STARTING_POINT = "Starting Point"
     STOPPING_POINT = "Stopping Point"
@@ -37,6 +56,33 @@ class RepoTypes(Enum):
     REMOTE = "remote"
 
 
+class CheckoutBackends(Enum):
+    """
+    Acceptable values for the CHECKOUT_BACKEND key.
+    """
+
+    REPOFS = "repofs"
+    WORKTREE = "worktree"
+
+
+class OutputBackends(Enum):
+    """
+    Acceptable values for the OUTPUT_BACKEND key.
+    """
+
+    FILES = "files"
+    SQLITE = "sqlite"
+
+
+class SchedulingPolicies(Enum):
+    """
+    Acceptable values for the SCHEDULING key.
+    """
+
+    HISTORY = "history"
+    LONGEST_FIRST = "longest first"
+
+
 class AdditionalFilters(Enum):
     """
     Acceptable keys under the ADDITIONAL_FILTERS key.
@@ -46,6 +92,7 @@ class AdditionalFilters(Enum):
     SKIP = "Skip"
     CHANGES = "Changes"
     MIN_DELTA = "Min Delta"
+    ADAPTIVE = "Adaptive"
 
 
 class ChangesCategories(Enum):
@@ -57,6 +104,18 @@ class ChangesCategories(Enum):
     ADDITIONS = "Additions"
     DELETIONS = "Deletions"
     FILE_TYPES = "File Types"
+    PATHS = "Paths"
+    EXCLUDE_PATHS = "Exclude Paths"
+
+
+class AdaptiveOptions(Enum):
+    """
+    This enum contains the options of the ADAPTIVE stanza.
+    """
+
+    METRIC = "Metric"
+    THRESHOLD = "Threshold"
+    MAX_ANALYSES = "Max Analyses"
 
 
 class InvalidRepoTypeException(RuntimeError):
@@ -67,11 +126,99 @@ class InvalidRepoTypeException(RuntimeError):
     pass
 
 
+class InvalidCheckoutBackendException(RuntimeError):
+    """
+    Thrown when the value for CHECKOUT_BACKEND is not one of the acceptable options given by the CheckoutBackends enum.
+    """
+
+    pass
+
+
+class InvalidOutputBackendException(RuntimeError):
+    """
+    Thrown when the value for OUTPUT_BACKEND is not one of the acceptable options given by the OutputBackends enum.
+    """
+
+    pass
+
+
+class InvalidSchedulingPolicyException(RuntimeError):
+    """
+    Thrown when the value for SCHEDULING is not one of the acceptable options given by the SchedulingPolicies enum.
+    """
+
+    pass
+
+
+class InvalidDeltaException(RuntimeError):
+    """
+    Thrown when the value for MIN_DELTA is not a delta in the format XdXhXm.
+    """
+
+    pass
+
+
+def parse_delta(delta) -> timedelta:
+    """
+    Parses a human-readable timedelta (e.g. 3d5h19m) into a datetime.timedelta.
+
+    Delta includes:
+
+    * Xd days
+    * Xh hours
+    * Xm minutes
+
+    Values can be negative following timedelta's rules. Eg: -5h-30m
+
+    Source: https://gist.github.com/santiagobasulto/698f0ff660968200f873a2f9d1c4113c
+
+    :param delta: String containing the delta
+    :return: datetime representation of the delta.
+    """
+    match = TIMEDELTA_PATTERN.fullmatch(delta)
+    parts = {k: int(v) for k, v in match.groupdict().items() if v} if match else None
+    if not parts:
+        raise InvalidDeltaException(f'{delta} is not a delta in the format XdXhXm, e.g. 3d5h19m')
+    return timedelta(**parts)
+
+
+def parse_option(value, options, default, exception):
+    """
+    Parses a case insensitive option from the configuration file into a value of its enum.
+
+    :param value: Value from the configuration file, which might be None
+    :param options: The enum of acceptable values
+    :param default: Value of the enum used when the option isn't set
+    :param exception: Exception class raised when the value isn't acceptable
+    :return: Value of the enum
+    """
+
+    if value is None:
+        return default
+
+    try:
+        return options(str(value).lower())
+    except ValueError as e:
+        raise exception from e
+
+
 class Config:
     """
     The configuration object provides access to the values from the configuration file.
+
+    The configuration file is read and validated once, and every value (including the directories derived from it) is
+    computed up front, so the getters can be called freely when analysing each commit.  The object can't be changed
+    once created.
     """
 
+    __slots__ = ('config', 'uuid', '_output_dir', '_output_format', '_output_backend', '_results_file',
+                 '_manifest_dir', '_working_dir', '_repo_dir', '_mount_dir', '_repo_type', '_repo_source',
+                 '_checkout_backend', '_checkout_dir', '_cache_file', '_image_cache_dir', '_persistent_instances',
+                 '_dedup_dir', '_dedup_path', '_max_in_flight', '_chunk_size', '_scheduling', '_rsync_to_temp',
+                 '_rsync_delta', '_analysis_dict', '_starting_point', '_stopping_point', '_git_rev_list_args',
+                 '_additional_filters', '_changes', '_changes_ranges', '_file_types', '_path_filter', '_min_delta',
+                 '_adaptive')
+
     def __init__(self, config_file):
         """
         Initialisation method to load the configuration file as a YAML file and create a UUID for this instance of
@@ -86,7 +233,7 @@ class Config:
             with open(config_file, "r") as stream:
                 try:
                     logging.debug('Config file loaded, reading YAML')
-                    self.config = yaml.safe_load(stream)
+                    self._set('config', yaml.safe_load(stream))
                 except yaml.YAMLError as e:
                     logging.critical('Error parsing YAML.  Cannot continue.')
                     logging.exception(e)
@@ -96,7 +243,122 @@ class Config:
             logging.exception(e)
             sys.exit(1)
 
-        self.uuid = uuid4().hex
+        self._set('uuid', uuid4().hex)
+        self._compile()
+
+    def _set(self, name, value) -> None:
+        """
+        Sets an attribute while the configuration is being compiled, every other attempt to set one is refused.
+
+        :param name: Name of the attribute
+        :param value: Value of the attribute
+        :return: None
+        """
+
+        object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('The configuration is read only')
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            self._set(name, value)
+
+    def _compile(self) -> None:
+        """
+        Reads and validates every value from the configuration file, computing the values derived from them.
+
+        :return: None
+        """
+
+        self._set('_output_dir', self._get(ConfigKeys.OUTPUT_DIR))
+        self._set('_output_format', self._get(ConfigKeys.OUTPUT_FORMAT))
+        self._set('_output_backend', parse_option(self._get(ConfigKeys.OUTPUT_BACKEND), OutputBackends,
+                                                  OutputBackends.FILES, InvalidOutputBackendException))
+        self._set('_results_file', None if self._output_dir is None else self._output_dir + RESULTS_FILE_NAME)
+        self._set('_manifest_dir', self._get(ConfigKeys.MANIFEST_DIR))
+
+        self._set('_working_dir', "{}{}/".format(self._get(ConfigKeys.TEMP_DIR), self.uuid))
+        self._set('_repo_dir', "{}{}/".format(self._working_dir, self._get(ConfigKeys.REPO_DIR_NAME)))
+        self._set('_mount_dir', "{}{}/".format(self._working_dir, self._get(ConfigKeys.MOUNT_DIR_NAME)))
+
+        repo_type = str(self._get(ConfigKeys.REPO_TYPE)).lower()
+
+        if repo_type in ("remote", "r"):
+            self._set('_repo_type', RepoTypes.REMOTE)
+        elif repo_type in ("local", "l"):
+            self._set('_repo_type', RepoTypes.LOCAL)
+        else:
+            raise InvalidRepoTypeException
+
+        self._set('_repo_source', self._get(ConfigKeys.REPO_SOURCE))
+
+        self._set('_checkout_backend', parse_option(self._get(ConfigKeys.CHECKOUT_BACKEND), CheckoutBackends,
+                                                    CheckoutBackends.REPOFS, InvalidCheckoutBackendException))
+        checkout_dir = self._get(ConfigKeys.CHECKOUT_DIR)
+        self._set('_checkout_dir', "{}checkouts/".format(self._working_dir) if checkout_dir is None else
+                  "{}{}/".format(checkout_dir, self.uuid))
+
+        self._set('_cache_file', self._get(ConfigKeys.CACHE_FILE))
+        self._set('_image_cache_dir', self._get(ConfigKeys.IMAGE_CACHE_DIR))
+        self._set('_persistent_instances', self._get(ConfigKeys.PERSISTENT_INSTANCES))
+        self._set('_dedup_dir', self._get(ConfigKeys.DEDUP_DIR))
+        self._set('_dedup_path', self._get(ConfigKeys.DEDUP_PATH))
+        self._set('_max_in_flight', self._get(ConfigKeys.MAX_IN_FLIGHT))
+        self._set('_chunk_size', self._get(ConfigKeys.CHUNK_SIZE))
+        self._set('_scheduling', parse_option(self._get(ConfigKeys.SCHEDULING), SchedulingPolicies,
+                                              SchedulingPolicies.HISTORY, InvalidSchedulingPolicyException))
+        self._set('_rsync_to_temp', self._get(ConfigKeys.RSYNC_TO_TEMP))
+        self._set('_rsync_delta', self._get(ConfigKeys.RSYNC_DELTA))
+        self._set('_analysis_dict', self._get(ConfigKeys.ANALYSIS))
+        self._validate_analysis()
+        self._set('_starting_point', self._get(ConfigKeys.STARTING_POINT))
+        self._set('_stopping_point', self._get(ConfigKeys.STOPPING_POINT))
+        self._set('_git_rev_list_args', self._get(ConfigKeys.GIT_REV_LIST_ARGS) or {})
+
+        self._set('_additional_filters', self._get(ConfigKeys.ADDITIONAL_FILTERS) or {})
+        self._set('_changes', self._additional_filters.get(AdditionalFilters.CHANGES.value) or {})
+        self._set('_adaptive', self._additional_filters.get(AdditionalFilters.ADAPTIVE.value) or {})
+
+        self._set('_changes_ranges', {})
+
+        for category in (ChangesCategories.FILES, ChangesCategories.ADDITIONS, ChangesCategories.DELETIONS):
+            # A bare 0 is a valid range, so only a missing value leaves the filter disabled
+            if self._changes.get(category.value) is not None:
+                self._changes_ranges[category] = RangeFilter(self._changes[category.value])
+
+        file_types = self._changes.get(ChangesCategories.FILE_TYPES.value)
+        self._set('_file_types', tuple(str(file_type) for file_type in file_types) if file_types else None)
+
+        paths = self._changes.get(ChangesCategories.PATHS.value)
+        exclude_paths = self._changes.get(ChangesCategories.EXCLUDE_PATHS.value)
+        self._set('_path_filter', PathFilter(paths, exclude_paths) if paths or exclude_paths else None)
+
+        min_delta = self._additional_filters.get(AdditionalFilters.MIN_DELTA.value)
+        self._set('_min_delta', None if min_delta is None else parse_delta(str(min_delta)))
+
+        logging.debug('Working directory is %s', self._working_dir)
+
+    def _validate_analysis(self) -> None:
+        """
+        Checks the extractor, runner and image of every entry in the "Analysis" stanza, so a misconfigured entry is
+        rejected when the file is loaded rather than when its commits are analysed.
+
+        :return: None
+        """
+
+        for analysis_key, analysis_details in (self._analysis_dict or {}).items():
+            if analysis_details.get('Extractor') is not None:
+                create_extractor(analysis_details['Extractor'])
+
+            create_runner(analysis_details.get('Runner'))
+
+            if get_runner_type(analysis_details.get('Runner')) == RunnerTypes.SINGULARITY and \
+                    not analysis_details.get('Image'):
+                raise InvalidRunnerException(f'The {analysis_key} analysis runs in Singularity so requires an Image')
 
     def get_output_dir(self):
         """
@@ -105,7 +367,7 @@ class Config:
         :return: String containing the location of the output directory from the configuration file
         """
 
-        return self._get(ConfigKeys.OUTPUT_DIR)
+        return self._output_dir
 
     def get_output_format(self):
         """
@@ -117,7 +379,34 @@ class Config:
         :return: Format of output text files from the configuration file
         """
 
-        return self._get(ConfigKeys.OUTPUT_FORMAT)
+        return self._output_format
+
+    def get_output_backend(self):
+        """
+        Get where the output of each analysis is kept, a text file for each commit when not set.
+
+        :return: An OutputBackends value indicating the output backend
+        """
+
+        return self._output_backend
+
+    def get_results_file(self):
+        """
+        The location of the results store used by the SQLite output backend, which is kept in the output directory.
+
+        :return: Location of the results database
+        """
+
+        return self._results_file
+
+    def get_manifest_dir(self):
+        """
+        Get the location of the completion manifest directory from the configuration file.
+
+        :return: String containing the location of the manifest directory, or None when no manifest should be written
+        """
+
+        return self._manifest_dir
 
     def get_repo_dir(self):
         """
@@ -127,10 +416,7 @@ class Config:
         :return: Name of the repository directory from the configuration file
         """
 
-        result = "{}{}/".format(self.get_working_dir(), self._get(ConfigKeys.REPO_DIR_NAME))
-
-        logging.debug('Repo directory is %s', result)
-        return result
+        return self._repo_dir
 
     def get_mount_dir(self):
         """
@@ -140,10 +426,7 @@ class Config:
         :return: Mount point of the RepoFS virtual filesystem.
         """
 
-        result = "{}{}/".format(self.get_working_dir(), self._get(ConfigKeys.MOUNT_DIR_NAME))
-
-        logging.debug('Mount directory is %s', result)
-        return result
+        return self._mount_dir
 
     def get_repo_type(self):
         """
@@ -152,14 +435,7 @@ class Config:
         :return: A RepoTypes value indicating the type of repository
         """
 
-        if self._get(ConfigKeys.REPO_TYPE).lower() in ("remote", "r"):
-            logging.debug('Repo type is remote')
-            return RepoTypes.REMOTE
-        elif self._get(ConfigKeys.REPO_TYPE).lower() in ("local", "l"):
-            logging.debug('Repo type is local')
-            return RepoTypes.LOCAL
-
-        raise InvalidRepoTypeException
+        return self._repo_type
 
     def get_repo_source(self):
         """
@@ -168,7 +444,98 @@ class Config:
         :return: The repository source, may be a local directory or URL, as indicated by the get_repo_type()
         """
 
-        return self._get(ConfigKeys.REPO_SOURCE)
+        return self._repo_source
+
+    def get_checkout_backend(self):
+        """
+        Get the backend used to give the files of each commit to the analysis, RepoFS when not set.
+
+        :return: A CheckoutBackends value indicating the checkout backend
+        """
+
+        return self._checkout_backend
+
+    def get_checkout_dir(self):
+        """
+        The directory worktrees are created in by the worktree checkout backend.  This function combines the checkout
+        directory from the configuration file with the instance UUID, or uses the working directory when it is not set.
+
+        :return: Location of the checkout directory
+        """
+
+        return self._checkout_dir
+
+    def get_cache_file(self):
+        """
+        Get the location of the commit cache database from the configuration file.
+
+        :return: Location of the SQLite database used to cache commit metadata, or None when caching is disabled
+        """
+
+        return self._cache_file
+
+    def get_image_cache_dir(self):
+        """
+        Get the location of the image cache directory, where analysis images are stored as SIF files.
+
+        :return: Location of the image cache directory, or None when images should be used directly
+        """
+
+        return self._image_cache_dir
+
+    def get_persistent_instances(self):
+        """
+        Get the PERSISTENT_INSTANCES value from the configuration file.
+
+        :return: Boolean value indicating if each worker should run commits in long-lived instances of each image
+        """
+
+        return self._persistent_instances
+
+    def get_dedup_dir(self):
+        """
+        Get the location of the dedup directory, where the output of each successful analysis is stored by tree.
+
+        :return: Location of the dedup directory, or None when every commit should be analysed
+        """
+
+        return self._dedup_dir
+
+    def get_dedup_path(self):
+        """
+        Get the path which the analysis reads, only the files under this path are compared when deduplicating.
+
+        :return: Path relative to the root of the repository, or None when the whole tree should be compared
+        """
+
+        return self._dedup_path
+
+    def get_max_in_flight(self):
+        """
+        Get the maximum amount of analyses which can be submitted to the workers but not yet completed.
+
+        :return: Integer limit on analyses in flight, or None to use a limit based on the amount of workers
+        """
+
+        return self._max_in_flight
+
+    def get_chunk_size(self):
+        """
+        Get the amount of neighbouring commits which are given to a worker at once.
+
+        :return: Integer size of each chunk, or None when each commit should be given to a worker on its own
+        """
+
+        return self._chunk_size
+
+    def get_scheduling(self):
+        """
+        Get the order chunks of commits are submitted in, history order when not set.
+
+        :return: A SchedulingPolicies value indicating the scheduling policy
+        """
+
+        return self._scheduling
 
     def get_working_dir(self):
         """
@@ -177,10 +544,7 @@ class Config:
         :return: Location of the working directory
         """
 
-        result = "{}{}/".format(self._get(ConfigKeys.TEMP_DIR), self.uuid)
-
-        logging.debug('Working directory is %s', result)
-        return result
+        return self._working_dir
 
     def get_rsync_to_temp(self):
         """
@@ -189,7 +553,17 @@ class Config:
         :return: Boolean value indicating if the files should be rsync'd to the temporary directory before analysis
         """
 
-        return self._get(ConfigKeys.RSYNC_TO_TEMP)
+        return self._rsync_to_temp
+
+    def get_rsync_delta(self):
+        """
+        Get the RSYNC_DELTA value from the configuration file.
+
+        :return: Boolean value indicating if each worker should reuse its temporary directory, only copying the files
+        which changed since the previous commit it analysed
+        """
+
+        return self._rsync_delta
 
     def get_analysis_dict(self):
         """
@@ -198,7 +572,7 @@ class Config:
         :return: Dictionary containing the values from the ANALYSIS stanza
         """
 
-        return self._get(ConfigKeys.ANALYSIS)
+        return self._analysis_dict
 
     def get_instance_id(self):
         """
@@ -208,11 +582,7 @@ class Config:
         :return: A randomly generated UUID for this instance of GitSlice
         """
 
-        logging.debug('Getting current UUID...')
-        result = self.uuid
-
-        logging.debug('UUID is %s', result)
-        return result
+        return self.uuid
 
     def get_starting_point(self):
         """
@@ -222,7 +592,7 @@ class Config:
         :return: Git reference to analysis starting point
         """
 
-        return self._get(ConfigKeys.STARTING_POINT)
+        return self._starting_point
 
     def get_stopping_point(self):
         """
@@ -231,21 +601,17 @@ class Config:
         :return: Stopping point of analysis or None when not set
         """
 
-        return self._get(ConfigKeys.STOPPING_POINT)
+        return self._stopping_point
 
     def get_git_rev_list_args(self):
         """
         Arguments for the "git rev-list" command as specified in the GIT_REV_LIST_ARGS stanza.
 
-        :return: A dictionary object (which might be empty but not None) of the git-rev-list arguments
+        :return: A copy of the dictionary (which might be empty but not None) of the git-rev-list arguments, which the
+        caller may change
         """
 
-        result = self._get(ConfigKeys.GIT_REV_LIST_ARGS)
-
-        if result is None:
-            return {}
-
-        return result
+        return dict(self._git_rev_list_args)
 
     def get_changes_type(self, key):
         """
@@ -255,36 +621,64 @@ class Config:
         :return: Value from the configuration file which might be None
         """
 
-        logging.debug('Retrieving value for %s', key.value)
-        additional_filter = self.get_additional_filter(AdditionalFilters.CHANGES)
+        return self._changes.get(key.value)
 
-        if additional_filter is None:
-            return None
+    def get_changes_ranges(self, key):
+        """
+        Get a range option from the CHANGES stanza, compiled into a RangeFilter.
 
-        result = additional_filter.get(key.value)
+        :param key: ChangesCategories.FILES, ChangesCategories.ADDITIONS or ChangesCategories.DELETIONS
+        :return: RangeFilter of the ranges, or None when the option isn't set
+        """
 
-        logging.debug('Got value %s for %s', result, key.value)
-        return result
+        return self._changes_ranges.get(key)
 
-    def get_additional_filter(self, key):
+    def get_file_types(self):
         """
-        Get an option from the ADDITIONAL_FILTERS stanza.
+        Get the file types from the CHANGES stanza.
 
-        :param key: A AdditionalFilters enum value indicating the value to retrieve
-        :return: The value from the configuration file which might be None
+        :return: Tuple of file endings, or None when the option isn't set
         """
 
-        logging.debug('Retrieving value for %s', key.value)
+        return self._file_types
 
-        additional_filters = self._get(ConfigKeys.ADDITIONAL_FILTERS)
+    def get_path_filter(self):
+        """
+        Get the Paths and Exclude Paths globs from the CHANGES stanza, compiled into a PathFilter.
 
-        if additional_filters is None:
-            return None
+        :return: PathFilter of the globs, or None when neither option is set
+        """
 
-        result = self._get(ConfigKeys.ADDITIONAL_FILTERS).get(key.value)
+        return self._path_filter
 
-        logging.debug('Got value %s for %s', result, key.value)
-        return result
+    def get_min_delta(self):
+        """
+        Get the minimum time between two selected commits from the ADDITIONAL_FILTERS stanza.
+
+        :return: The parsed timedelta, or None when the option isn't set
+        """
+
+        return self._min_delta
+
+    def get_adaptive_option(self, key):
+        """
+        Get an option from the ADAPTIVE stanza, the key should be a value within the AdaptiveOptions enum.
+
+        :param key: AdaptiveOptions enum indicating the value to get
+        :return: Value from the configuration file which might be None
+        """
+
+        return self._adaptive.get(key.value)
+
+    def get_additional_filter(self, key):
+        """
+        Get an option from the ADDITIONAL_FILTERS stanza.
+
+        :param key: A AdditionalFilters enum value indicating the value to retrieve
+        :return: The value from the configuration file which might be None
+        """
+
+        return self._additional_filters.get(key.value)
 
     def _get(self, key):
         """
@@ -7,14 +7,28 @@ PROJECT_NAME = "GitSlice"
 # Brief description of the project
 PROJECT_DESCRIPTION = "Slicing the repository that feeds us"
 
+# Options given to Singularity when running an analysis container (or starting an instance)
+SINGULARITY_OPTIONS = ['--writable-tmpfs', '--containall']
+
+# Where the directory containing every commit is bound inside a persistent instance, /src is linked to a commit in here
+INSTANCE_COMMITS_DIR = "/commits"
+
+# Options given to rsync when copying the files of a commit to the temporary directory
+RSYNC_OPTIONS = "--inplace --exclude \".git-descendants\" --exclude \".git-names\" --exclude \".git-parents\" " \
+                "--exclude \".author\" --exclude \".author-email\" --exclude \"/.git\" " \
+                "--chmod=Du=rwx,Dg=rx,Do=rx,Fu=rw,Fg=r,Fo=r"
+
 # Commands run inside a singularity container before user-specified commands
-RSYNC_PRE_RUN = "mkdir -p %%WORKING_DIR%%; rsync --inplace --exclude \".git-descendants\" --exclude \".git-names\" " \
-          "--exclude \".git-parents\" --exclude \".author\" --exclude \".author-email\" --chmod=Du=rwx,Dg=rx,Do=rx," \
-          "Fu=rw,Fg=r,Fo=r -r /src/ %%WORKING_DIR%% 2>&1 ; cd %%WORKING_DIR%%"
+RSYNC_PRE_RUN = f"mkdir -p %%WORKING_DIR%%; rsync {RSYNC_OPTIONS} -r /src/ %%WORKING_DIR%% 2>&1 ; cd %%WORKING_DIR%%"
 
 # Commands run inside a singularity container after user-specified commands
 RSYNC_POST_RUN = "rm -rf %%WORKING_DIR%%"
 
+# Commands run inside a singularity container before user-specified commands when the working directory already contains
+# a previous commit, only the files listed in %%FILES_FROM%% are copied (or deleted when they don't exist in /src)
+RSYNC_DELTA_PRE_RUN = f"rsync {RSYNC_OPTIONS} --from0 --files-from=%%FILES_FROM%% --delete-missing-args /src/ " \
+                      f"%%WORKING_DIR%% 2>&1 ; cd %%WORKING_DIR%%"
+
 # The regular expression to be used for converting a string to a datetime delta, it should be in this format: XdXmXs.
 TIMEDELTA_REGEX = (r'((?P<days>-?\d+)d)?'
                    r'((?P<hours>-?\d+)h)?'
@@ -22,3 +36,58 @@ TIMEDELTA_REGEX = (r'((?P<days>-?\d+)d)?'
 
 # Pattern object compiled from TIMEDELTA_REGEX which is used to get the values from the delta string.
 TIMEDELTA_PATTERN = re.compile(TIMEDELTA_REGEX, re.IGNORECASE)
+
+# Pattern matching a single range of a ranges string from the Changes stanza, e.g. "150-175", "> 100" or "200 <".
+RANGE_PATTERN = re.compile(r'(?P<before>[<>]=?)?\s*(?P<lower>\d+)\s*(?:-\s*(?P<upper>\d+)|(?P<after>[<>]=?))?')
+
+# Separators used in GIT_LOG_FORMAT, these are ASCII record and unit separators which can't appear in a SHA1 or a date.
+GIT_LOG_RECORD_SEPARATOR = "\x1e"
+GIT_LOG_FIELD_SEPARATOR = "\x1f"
+
+# Options of "Git Rev List Args" which add references to the history walk, such as "all: true".  The ancestry index is
+# built from the same references, so every commit the walk can reach has been labelled.
+ANCESTRY_TIP_OPTIONS = ("all", "branches", "tags", "remotes", "glob", "reflog")
+
+# The format passed to "git log" when walking the history.  Each commit header is a single line beginning with the
+# record separator, containing the commit ID, the strict ISO 8601 committer date, the tree ID and the parent commit IDs.
+GIT_LOG_FORMAT = "%x1e%H%x1f%cI%x1f%T%x1f%P"
+
+# Version of the commit cache database layout, a cache with a different version is emptied and rebuilt.
+CACHE_SCHEMA_VERSION = 2
+
+# Amount of commits looked up in (and added to) the commit cache at once.
+CACHE_BATCH_SIZE = 1000
+
+# Most commit IDs given to a single query of the commit cache.  SQLite before 3.32 allows at most 999 variables in a
+# statement, and one is used for the repository.
+CACHE_QUERY_SIZE = 998
+
+# When "Max In Flight" isn't set, the amount of analyses which can be submitted but not yet completed for each worker.
+IN_FLIGHT_PER_WORKER = 4
+
+# Seconds between checks for a space in the submission window while the primary waits for analyses to complete.
+SUBMISSION_WINDOW_POLL_INTERVAL = 0.1
+
+# Minimum seconds between progress lines logged by the primary as analyses complete.
+PROGRESS_INTERVAL = 60
+
+# Amount of the slowest commits included in each progress line.
+PROGRESS_SLOWEST_COUNT = 5
+
+# Amount of characters of analysis output held in memory before it is written to the scratch directory.
+OUTPUT_BUFFER_SIZE = 4 * 1024 * 1024
+
+# Name of the results database created in the output directory by the SQLite output backend.
+RESULTS_FILE_NAME = "results.sqlite"
+
+# Amount of results added to the results database between each commit to disk.
+RESULTS_COMMIT_INTERVAL = 100
+
+# Stored in the image column of the results database for analyses which weren't run in a container.
+RESULTS_NO_IMAGE = "subprocess"
+
+# Name of the run report written to the output directory at the end of a run, the JSON and CSV reports add an extension.
+RUN_REPORT_NAME = "run-report"
+
+# Name of the file in the image cache directory which maps image URIs to the digest of their cached SIF file.
+IMAGE_CACHE_INDEX = "images.json"
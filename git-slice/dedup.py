@@ -0,0 +1,100 @@
+import hashlib
+import logging
+import os
+import shutil
+import threading
+
+import git
+
+
+def get_dedup_key(tree_id, image_digest, analysis_command) -> str:
+    """
+    Computes the key used to find the output of a previous analysis of the same files, using the same image and
+    command.
+
+    :param tree_id: SHA1 hash of the tree (or subtree) which is analysed
+    :param image_digest: Digest of the image used for analysis, as given by get_image_digest()
+    :param analysis_command: The command run inside the container
+    :return: String of the SHA256 hash of the tree, image and command
+    """
+
+    return hashlib.sha256('\0'.join((tree_id, image_digest, analysis_command)).encode('utf-8')).hexdigest()
+
+
+def get_subtree_id(repo, commit_id, path):
+    """
+    Gives the SHA1 hash of the tree at a path in a commit, so commits which only differ outside that path share a key.
+
+    :param repo: The GitPython Repo object containing the commit
+    :param commit_id: SHA1 hash of the commit
+    :param path: Path of a directory relative to the root of the repository
+    :return: SHA1 hash of the subtree, or None when the path doesn't exist in the commit
+    """
+
+    try:
+        return repo.git.rev_parse(f"{commit_id}:{path.strip('/')}")
+    except git.GitCommandError:
+        return None
+
+
+class DedupStore:
+    """
+    The dedup store holds the output of every successful analysis, named by the tree analysed, the image and the
+    command.  Commits with an identical tree (i.e. reverts, or merges which change nothing) give the same output, so
+    the stored output is copied rather than running the container again.
+
+    The dedup directory should be on a filesystem which is visible to all nodes.
+    """
+
+    def __init__(self, dedup_dir) -> None:
+        """
+        Initialise the dedup store.  The dedup directory must already exist.
+
+        :param dedup_dir: Directory containing one output file for each key.
+        """
+
+        self._dedup_dir = dedup_dir
+
+    def _get_stored_file(self, key) -> str:
+        """
+        Gives the location of the stored output for a key.
+
+        :param key: Key given by get_dedup_key()
+        :return: Location of the stored output
+        """
+
+        return os.path.join(self._dedup_dir, f'{key}.txt')
+
+    def fetch(self, key, output_file) -> bool:
+        """
+        Copies the stored output for a key to the output file, when there is one.
+
+        :param key: Key given by get_dedup_key()
+        :param output_file: Location the output should be copied to
+        :return: True when stored output was found and copied
+        """
+
+        try:
+            shutil.copyfile(self._get_stored_file(key), output_file)
+        except FileNotFoundError:
+            return False
+
+        logging.debug('Copied stored output %s to %s', key, output_file)
+        return True
+
+    def store(self, key, output_file) -> None:
+        """
+        Stores the output of a successful analysis so any other commit with the same key can reuse it.
+
+        :param key: Key given by get_dedup_key()
+        :param output_file: Location of the output to be stored
+        :return: None
+        """
+
+        stored_file = self._get_stored_file(key)
+        temp_file = f'{stored_file}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+        shutil.copyfile(output_file, temp_file)
+        os.replace(temp_file, stored_file)
+
+        logging.debug('Stored output %s from %s', key, output_file)
@@ -0,0 +1,266 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from multiprocessing.util import Finalize
+
+from instances import stop_instances
+
+
+class ExecutorTypes(Enum):
+    """
+    Acceptable values for the --executor argument.
+    """
+
+    TORCPY = "torcpy"
+    PROCESS = "process"
+
+
+class InvalidExecutorException(RuntimeError):
+    """
+    Thrown when the executor is not one of the acceptable options given by the ExecutorTypes enum.
+    """
+
+    pass
+
+
+# Callbacks of the tasks submitted to torcpy, keyed by the ID torcpy gives each task.  torcpy sends the whole task,
+# including its callback, to the rank which runs it, so the callbacks are kept here on the primary and torcpy is only
+# given _torcpy_completed(), which is pickled by reference
+_torcpy_callbacks = {}
+_torcpy_callbacks_lock = threading.Lock()
+
+
+def _torcpy_completed(task) -> None:
+    """
+    Callback given to torcpy for every task, run on the primary once the task has completed.  Runs the callback the task
+    was submitted with.
+
+    :param task: The completed torcpy task
+    :return: None
+    """
+
+    with _torcpy_callbacks_lock:
+        callback = _torcpy_callbacks.pop(task.desc['mytask'])
+
+    callback(task)
+
+
+class TorcpyExecutor:
+    """
+    Runs analyses on every node allocated to GitSlice using torcpy, which requires GitSlice to be started by mpirun.
+    Every rank runs start(), but only the primary runs the given function while the others wait for tasks.
+    """
+
+    def __init__(self) -> None:
+        import torcpy
+
+        self._torcpy = torcpy
+        self._outstanding = 0
+        self._condition = threading.Condition()
+
+    def start(self, function) -> None:
+        """
+        Starts torcpy, running the function on the primary.
+
+        :param function: The function which submits the analyses
+        :return: None
+        """
+
+        self._torcpy.start(function)
+
+    def submit(self, function, *arguments, callback=None):
+        """
+        Submits a task to be run by any worker.
+
+        :param function: The function to be run by a worker
+        :param arguments: Arguments for the function
+        :param callback: Function given the task on the primary once it has completed, or None
+        :return: The torcpy task, whose result() gives the return value of the function
+        """
+
+        if callback is None:
+            return self._torcpy.submit(function, *arguments)
+
+        with self._condition:
+            self._outstanding += 1
+
+        # The lock is held until the callback is registered, as the task may complete before submit() returns
+        with _torcpy_callbacks_lock:
+            task = self._torcpy.submit(function, *arguments, callback=_torcpy_completed, async_callback=False)
+            _torcpy_callbacks[task.desc['mytask']] = lambda completed: self._completed(completed, callback)
+
+        return task
+
+    def _completed(self, task, callback) -> None:
+        """
+        Runs the callback of a completed task, then counts it as complete.  torcpy counts a task as complete before its
+        callback runs, so the tasks are counted here as well to stop wait() returning while a callback is still storing
+        results.
+
+        :param task: The completed torcpy task
+        :param callback: Function given the task
+        :return: None
+        """
+
+        try:
+            callback(task)
+        finally:
+            with self._condition:
+                self._outstanding -= 1
+                self._condition.notify_all()
+
+    def wait(self) -> None:
+        """
+        Blocks until every submitted task and its callback has completed.
+
+        :return: None
+        """
+
+        self._torcpy.wait()
+
+        with self._condition:
+            self._condition.wait_for(lambda: self._outstanding == 0)
+
+    def num_workers(self) -> int:
+        """
+        :return: Amount of workers across every node
+        """
+
+        return self._torcpy.num_workers()
+
+    def num_local_workers(self) -> int:
+        """
+        :return: Amount of workers on the primary's node, including the primary itself
+        """
+
+        return self._torcpy.num_local_workers()
+
+
+def init_process_worker() -> None:
+    """
+    Run by each worker process of the ProcessExecutor as it starts.  Persistent instances are started by the worker
+    processes rather than the primary, so each worker stops its own instances when it exits.
+
+    :return: None
+    """
+
+    Finalize(None, stop_instances, exitpriority=10)
+
+
+class ProcessExecutor:
+    """
+    Runs analyses in a pool of local worker processes, so a repository can be analysed in parallel on a single machine
+    without MPI.  The worker processes are forked from the primary, so they share the configuration, checkout and
+    staging set up by main() without any of it being pickled.  Only the analyses and their results are sent between
+    processes.
+    """
+
+    def __init__(self, workers=None) -> None:
+        """
+        :param workers: Amount of worker processes, or None for one for each CPU
+        """
+
+        self._workers = workers or os.cpu_count() or 1
+        self._pool = None
+        self._outstanding = 0
+        self._condition = threading.Condition()
+
+    def start(self, function) -> None:
+        """
+        Creates the pool of worker processes and runs the function, then shuts the pool down.
+
+        :param function: The function which submits the analyses
+        :return: None
+        """
+
+        logging.info('Analysing with %i local worker processes', self._workers)
+
+        with ProcessPoolExecutor(self._workers, mp_context=multiprocessing.get_context('fork'),
+                                 initializer=init_process_worker) as pool:
+            self._pool = pool
+            function()
+
+        self._pool = None
+
+    def submit(self, function, *arguments, callback=None):
+        """
+        Submits a task to be run by any worker process.
+
+        :param function: The function to be run by a worker
+        :param arguments: Arguments for the function
+        :param callback: Function given the future once the task has completed, or None
+        :return: The Future of the task, whose result() gives the return value of the function
+        """
+
+        with self._condition:
+            self._outstanding += 1
+
+        future = self._pool.submit(function, *arguments)
+        future.add_done_callback(lambda completed: self._completed(completed, callback))
+
+        return future
+
+    def _completed(self, future, callback) -> None:
+        """
+        Runs the callback of a completed task, then counts it as complete.  Tasks are only counted once their callback
+        has finished, so wait() doesn't return while a callback is still storing results.
+
+        :param future: The Future of the completed task
+        :param callback: Function given the future, or None
+        :return: None
+        """
+
+        try:
+            if callback is not None:
+                callback(future)
+        finally:
+            with self._condition:
+                self._outstanding -= 1
+                self._condition.notify_all()
+
+    def wait(self) -> None:
+        """
+        Blocks until every submitted task and its callback has completed.
+
+        :return: None
+        """
+
+        with self._condition:
+            self._condition.wait_for(lambda: self._outstanding == 0)
+
+    def num_workers(self) -> int:
+        """
+        :return: Amount of worker processes
+        """
+
+        return self._workers
+
+    def num_local_workers(self) -> int:
+        """
+        :return: Amount of worker processes, which are all on the primary's node
+        """
+
+        return self._workers
+
+
+def create_executor(executor_type, workers=None):
+    """
+    Creates the executor used to run analyses.
+
+    :param executor_type: An ExecutorTypes value, or its string value
+    :param workers: Amount of worker processes used by the process executor, or None for one for each CPU
+    :return: A TorcpyExecutor or ProcessExecutor
+    """
+
+    try:
+        executor_type = ExecutorTypes(executor_type)
+    except ValueError as e:
+        raise InvalidExecutorException from e
+
+    if executor_type == ExecutorTypes.PROCESS:
+        return ProcessExecutor(workers)
+
+    return TorcpyExecutor()
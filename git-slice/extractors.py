@@ -0,0 +1,220 @@
+import csv
+import json
+import logging
+import re
+from enum import Enum
+
+
+class ExtractorTypes(Enum):
+    """
+    Acceptable values for the "Type" key of an extractor in the "Analysis" stanza.
+    """
+
+    CLOC = "cloc"
+    REGEX = "regex"
+    JSON = "json"
+
+
+class InvalidExtractorException(RuntimeError):
+    """
+    Thrown when an extractor in the "Analysis" stanza has an unknown type, is missing a required key or has an invalid
+    pattern or metrics.
+    """
+
+    pass
+
+
+def convert_value(value):
+    """
+    Converts a value read from the output of an analysis to an int or float when it is numeric.
+
+    :param value: The value from the output
+    :return: The value as an int or float where possible, otherwise unchanged
+    """
+
+    if not isinstance(value, str):
+        return value
+
+    for numeric_type in (int, float):
+        try:
+            return numeric_type(value)
+        except ValueError:
+            continue
+
+    return value
+
+
+def get_json_path(document, path):
+    """
+    Follows a dotted path (e.g. "SUM.code") through a JSON document.  Numeric parts index into lists.
+
+    :param document: The decoded JSON document
+    :param path: Dotted path of the value
+    :return: The value at the path, or None when the path doesn't exist
+    """
+
+    for part in path.split('.'):
+        if isinstance(document, list) and part.isdigit() and int(part) < len(document):
+            document = document[int(part)]
+        elif isinstance(document, dict) and part in document:
+            document = document[part]
+        else:
+            return None
+
+    return document
+
+
+def load_json(output):
+    """
+    Decodes the first JSON document in the output of an analysis, ignoring anything printed before or after it.
+
+    :param output: The complete output of the analysis
+    :return: The decoded JSON document, or None when the output doesn't contain one
+    """
+
+    starts = [index for index in (output.find('{'), output.find('[')) if index != -1]
+
+    if not starts:
+        return None
+
+    return json.JSONDecoder().raw_decode(output, min(starts))[0]
+
+
+class ClocExtractor:
+    """
+    Extracts the blank, comment and code lines and the amount of files for each language from "cloc --json" or
+    "cloc --csv" output.  Metrics are named "<language>.<count>", e.g. "Python.code" or "SUM.code".
+    """
+
+    def extract(self, output) -> dict:
+        """
+        Extracts metrics from the output of an analysis.
+
+        :param output: The complete output of the analysis
+        :return: Dictionary of metric names to values
+        """
+
+        try:
+            document = load_json(output)
+        except ValueError:
+            document = None
+
+        if isinstance(document, dict):
+            return {f'{language}.{count}': value for language, counts in document.items() if language != 'header'
+                    for count, value in counts.items()}
+
+        metrics = {}
+        header = None
+
+        for row in csv.reader(output.splitlines()):
+            if header is None:
+                # cloc prints a summary before the CSV header, which always begins with "files,language"
+                if row[:2] == ['files', 'language']:
+                    header = row
+                continue
+
+            if len(row) < 2:
+                continue
+
+            language = row[1]
+
+            for count, value in zip(header, row):
+                if count not in ('language', '') and not count.startswith('github.com'):
+                    metrics[f'{language}.{"nFiles" if count == "files" else count}'] = convert_value(value)
+
+        return metrics
+
+
+class RegexExtractor:
+    """
+    Extracts the named groups of the first match of a regular expression in the output.  Each group is a metric.
+    """
+
+    def __init__(self, pattern) -> None:
+        self._pattern = re.compile(pattern, re.MULTILINE)
+
+    def extract(self, output) -> dict:
+        """
+        Extracts metrics from the output of an analysis.
+
+        :param output: The complete output of the analysis
+        :return: Dictionary of metric names to values, empty when the pattern doesn't match
+        """
+
+        match = self._pattern.search(output)
+
+        if match is None:
+            return {}
+
+        return {name: convert_value(value) for name, value in match.groupdict().items() if value is not None}
+
+
+class JsonExtractor:
+    """
+    Extracts values from JSON output by their dotted path, e.g. "results.0.score".
+    """
+
+    def __init__(self, metrics) -> None:
+        if not isinstance(metrics, dict) or not all(isinstance(path, str) for path in metrics.values()):
+            raise InvalidExtractorException(f'JSON extractor metrics must map names to paths, not {metrics}')
+
+        self._metrics = metrics
+
+    def extract(self, output) -> dict:
+        """
+        Extracts metrics from the output of an analysis.
+
+        :param output: The complete output of the analysis
+        :return: Dictionary of metric names to values, paths which don't exist are omitted
+        """
+
+        document = load_json(output)
+        metrics = {}
+
+        for name, path in self._metrics.items():
+            value = get_json_path(document, path)
+
+            if value is not None:
+                metrics[name] = convert_value(value)
+
+        return metrics
+
+
+def create_extractor(extractor_config):
+    """
+    Creates an extractor from the "Extractor" key of an entry in the "Analysis" stanza.
+
+    :param extractor_config: Dictionary with a "Type" key, and a "Pattern" key for regex or "Metrics" key for JSON
+    :return: An extractor, which has an extract() method
+    """
+
+    try:
+        extractor_type = ExtractorTypes(str(extractor_config['Type']).lower())
+
+        if extractor_type == ExtractorTypes.CLOC:
+            return ClocExtractor()
+        elif extractor_type == ExtractorTypes.REGEX:
+            return RegexExtractor(extractor_config['Pattern'])
+
+        return JsonExtractor(extractor_config['Metrics'])
+    except (KeyError, TypeError, ValueError, re.error) as e:
+        raise InvalidExtractorException from e
+
+
+def extract_metrics(extractor_config, output) -> dict:
+    """
+    Runs an extractor over the output of an analysis.  The analysis isn't failed when its output can't be parsed, a
+    warning is logged and no metrics are given instead.
+
+    :param extractor_config: Dictionary from the "Extractor" key of an entry in the "Analysis" stanza
+    :param output: The complete output of the analysis
+    :return: Dictionary of metric names to values
+    """
+
+    extractor = create_extractor(extractor_config)
+
+    try:
+        return extractor.extract(output)
+    except (ValueError, IndexError, AttributeError) as e:
+        logging.warning('Failed to extract metrics using the %s extractor: %s', extractor_config['Type'], e)
+        return {}
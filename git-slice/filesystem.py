@@ -5,7 +5,8 @@ import subprocess
 
 from git import Repo
 
-from config import RepoTypes
+from config import CheckoutBackends, RepoTypes
+from instrumentation import Instrumentation, get_dir_size
 
 
 class FilesystemFailure(RuntimeError):
@@ -24,17 +25,19 @@ class FilesystemManager:
     representing the repository.
     """
 
-    def __init__(self, config, dry_run):
+    def __init__(self, config, dry_run, instrumentation=None):
         """
         Initialise the filesystem manager.  This does not bring up the filesystem, a call to up() is required.
 
         :param config: The configuration object used to get information about the location of directories.
         :param dry_run: When enabled, only the repository is cloned
+        :param instrumentation: The Instrumentation to record each step of bringing up the filesystem in, or None
         """
 
         logging.debug('Filesystem manager has been created')
         self.config = config
         self.dry_run = dry_run
+        self.instrumentation = instrumentation or Instrumentation()
 
     def up(self):
         """
@@ -46,9 +49,15 @@ class FilesystemManager:
 
         logging.debug('Bringing filesystem up...')
 
-        self._create_dirs()
-        self._clone_repo()
-        self._virtual_fs_up()
+        with self.instrumentation.span('create dirs'):
+            self._create_dirs()
+
+        with self.instrumentation.span('clone') as span:
+            self._clone_repo()
+            span.add_bytes(get_dir_size(self.config.get_repo_dir()))
+
+        with self.instrumentation.span('mount'):
+            self._virtual_fs_up()
 
     def down(self):
         """
@@ -67,12 +76,12 @@ class FilesystemManager:
         Use RepoFS to bring up the virtual filesystem representation of the Git repository.  Raises a FilesystemFailure
         when the RepoFS script fails.
 
-        Has no effect when dry run is enabled.
+        Has no effect when dry run is enabled, or when RepoFS isn't the checkout backend.
 
         :return: None
         """
 
-        if self.dry_run:
+        if self.dry_run or self.config.get_checkout_backend() != CheckoutBackends.REPOFS:
             return
 
         logging.debug('Running fsUp.sh...')
@@ -88,12 +97,12 @@ class FilesystemManager:
         """
         Reverse ._virtual_fs_up() by unmounting the RepoFS filesystem.
 
-        Has no effect when dry run is enabled.
+        Has no effect when dry run is enabled, or when RepoFS isn't the checkout backend.
 
         :return: None
         """
 
-        if self.dry_run:
+        if self.dry_run or self.config.get_checkout_backend() != CheckoutBackends.REPOFS:
             return
 
         result = subprocess.call(['sh', 'shell-scripts/fsDown.sh', self.config.get_working_dir()])
@@ -112,7 +121,15 @@ class FilesystemManager:
         if self.dry_run:
             return
 
-        dirs_to_create = (self.config.get_output_dir(), self.config.get_repo_dir(), self.config.get_mount_dir())
+        dirs_to_create = [self.config.get_output_dir(), self.config.get_repo_dir(), self.config.get_mount_dir()]
+
+        for optional_dir in (self.config.get_manifest_dir(), self.config.get_image_cache_dir(),
+                             self.config.get_dedup_dir()):
+            if optional_dir:
+                dirs_to_create.append(optional_dir)
+
+        if self.config.get_checkout_backend() == CheckoutBackends.WORKTREE:
+            dirs_to_create.append(self.config.get_checkout_dir())
 
         logging.debug('Creating directories: %s', ', '.join(dirs_to_create))
 
@@ -125,13 +142,19 @@ class FilesystemManager:
 
     def _nuke_dirs(self):
         """
-        Deletes the working directory.  Does not delete the output directory.
+        Deletes the working directory and the checkout directory, which might be outside the working directory.  Does
+        not delete the output directory.
 
         Has no effect when dry run is enabled.
 
         :return: None
         """
 
+        if self.config.get_checkout_backend() == CheckoutBackends.WORKTREE and \
+                os.path.exists(self.config.get_checkout_dir()):
+            logging.debug('Nuking %s', self.config.get_checkout_dir())
+            shutil.rmtree(self.config.get_checkout_dir())
+
         logging.debug('Nuking %s', self.config.get_working_dir())
         shutil.rmtree(self.config.get_working_dir())
 
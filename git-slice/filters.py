@@ -0,0 +1,258 @@
+import re
+from bisect import bisect_right
+
+from constants import RANGE_PATTERN
+
+
+class InvalidRangeException(RuntimeError):
+    """
+    Thrown when a ranges string from the CHANGES stanza contains a range which can't be parsed.
+    """
+
+    pass
+
+
+def parse_range(range_str) -> (float, float):
+    """
+    Parses a single range into inclusive bounds.  Accepted ranges are "a-b", "> a", ">= a", "< a", "<= a" and a bare
+    number, which only matches that number.  The operator may also follow the number (e.g. "200 <") as in earlier
+    versions of GitSlice.
+
+    The values compared against ranges are counts, so exclusive bounds are given as the next whole number, e.g. "> 100"
+    is (101, inf).
+
+    :param range_str: A single range, without commas
+    :return: Tuple of the lower and upper bound, both inclusive
+    """
+
+    match = RANGE_PATTERN.fullmatch(range_str.strip())
+
+    if match is None:
+        raise InvalidRangeException(f'Cannot parse the range "{range_str.strip()}"')
+
+    operator = match.group('before') or match.group('after')
+    lower = int(match.group('lower'))
+
+    if match.group('upper') is not None:
+        return lower, int(match.group('upper'))
+    elif operator == '>':
+        return lower + 1, float('inf')
+    elif operator == '>=':
+        return lower, float('inf')
+    elif operator == '<':
+        return float('-inf'), lower - 1
+    elif operator == '<=':
+        return float('-inf'), lower
+
+    return lower, lower
+
+
+class RangeFilter:
+    """
+    A ranges string from the CHANGES stanza (e.g. "< 100, 150-175, > 200") compiled into sorted, non-overlapping
+    intervals.  A value is tested with a binary search over the intervals, rather than parsing the string for every
+    commit.
+    """
+
+    def __init__(self, ranges_str) -> None:
+        """
+        :param ranges_str: Comma-separated ranges, each accepted by parse_range()
+        """
+
+        self._ranges_str = str(ranges_str)
+
+        intervals = []
+
+        for lower, upper in sorted(parse_range(range_str) for range_str in self._ranges_str.split(',')
+                                   if range_str.strip()):
+            if lower > upper:
+                continue
+
+            if intervals and lower <= intervals[-1][1] + 1:
+                intervals[-1][1] = max(intervals[-1][1], upper)
+            else:
+                intervals.append([lower, upper])
+
+        self._lowers = tuple(lower for lower, _ in intervals)
+        self._uppers = tuple(upper for _, upper in intervals)
+
+    def get_intervals(self) -> tuple:
+        """
+        Provides the compiled intervals.
+
+        :return: Tuple of (lower, upper) tuples which are sorted, don't overlap and are both inclusive
+        """
+
+        return tuple(zip(self._lowers, self._uppers))
+
+    def contains(self, val) -> bool:
+        """
+        Tests whether a value is within any of the ranges.
+
+        :param val: Integer value to test
+        :return: True when the value is within the ranges
+        """
+
+        index = bisect_right(self._lowers, val) - 1
+
+        return index >= 0 and val <= self._uppers[index]
+
+    def mask(self, values) -> list:
+        """
+        Tests a sequence of values at once.
+
+        :param values: Sequence of integer values
+        :return: List of booleans, True where the value is within the ranges
+        """
+
+        lowers, uppers = self._lowers, self._uppers
+
+        return [(index := bisect_right(lowers, val) - 1) >= 0 and val <= uppers[index] for val in values]
+
+    def __str__(self) -> str:
+        return self._ranges_str
+
+
+class ShortstatFilter:
+    """
+    Combines the Files, Additions and Deletions ranges from the CHANGES stanza, so a batch of cached commits can be
+    tested from their stored counts before their changes are read.
+    """
+
+    def __init__(self, files=None, additions=None, deletions=None) -> None:
+        """
+        :param files: RangeFilter for the amount of files changed, or None
+        :param additions: RangeFilter for the amount of additions, or None
+        :param deletions: RangeFilter for the amount of deletions, or None
+        """
+
+        self._filters = [(column, range_filter) for column, range_filter in enumerate((files, additions, deletions))
+                         if range_filter is not None]
+
+    def is_empty(self) -> bool:
+        """
+        :return: True when none of the ranges are set, so every commit matches
+        """
+
+        return not self._filters
+
+    def mask(self, shortstats) -> list:
+        """
+        Tests a batch of commits.
+
+        :param shortstats: Sequence of (files changed, additions, deletions) tuples
+        :return: List of booleans, True where the commit is within every range which is set
+        """
+
+        result = [True] * len(shortstats)
+
+        for column, range_filter in self._filters:
+            column_mask = range_filter.mask([shortstat[column] for shortstat in shortstats])
+            result = [matches and column_matches for matches, column_matches in zip(result, column_mask)]
+
+        return result
+
+
+def translate_glob(pattern) -> str:
+    """
+    Translates a path glob into a regular expression, following the "glob" magic of Git pathspecs: "*" and "?" don't
+    match "/", "**/" matches any amount of directories and a trailing "/" or "/**" matches everything in a directory.
+
+    :param pattern: Path glob relative to the root of the repository, e.g. "src/**/*.java" or "vendor/"
+    :return: Regular expression matching the path, or a leading directory of the path
+    """
+
+    pattern = pattern.strip().strip('/')
+
+    if pattern.endswith('/**'):
+        pattern = pattern[:-3]
+
+    parts = []
+    index = 0
+
+    while index < len(pattern):
+        if pattern.startswith('**/', index):
+            parts.append('(?:.*/)?')
+            index += 3
+        elif pattern.startswith('**', index):
+            parts.append('.*')
+            index += 2
+        elif pattern[index] == '*':
+            parts.append('[^/]*')
+            index += 1
+        elif pattern[index] == '?':
+            parts.append('[^/]')
+            index += 1
+        else:
+            parts.append(re.escape(pattern[index]))
+            index += 1
+
+    return ''.join(parts)
+
+
+def compile_globs(patterns):
+    """
+    Compiles path globs into a single regular expression, so every glob is tested in one pass over each path.
+
+    :param patterns: List of path globs accepted by translate_glob()
+    :return: Compiled regular expression, or None when there are no globs
+    """
+
+    if not patterns:
+        return None
+
+    return re.compile('(?:' + '|'.join(translate_glob(pattern) for pattern in patterns) + ')(?:/|$)')
+
+
+class PathFilter:
+    """
+    The Paths and Exclude Paths globs from the CHANGES stanza.  A commit matches when it changes at least one file which
+    matches an included glob (or any file, when only exclusions are given) and doesn't match an excluded glob.
+
+    The globs can also be given to "git rev-list" as a pathspec, so Git skips commits which can't match itself.
+    """
+
+    def __init__(self, include=None, exclude=None) -> None:
+        """
+        :param include: List of path globs, or None to include every path
+        :param exclude: List of path globs, or None to exclude no paths
+        """
+
+        self._include = [str(pattern) for pattern in include or []]
+        self._exclude = [str(pattern) for pattern in exclude or []]
+        self._include_pattern = compile_globs(self._include)
+        self._exclude_pattern = compile_globs(self._exclude)
+
+    def matches(self, path) -> bool:
+        """
+        Tests a single path.
+
+        :param path: Path relative to the root of the repository
+        :return: True when the path is included and not excluded
+        """
+
+        return (self._include_pattern is None or self._include_pattern.match(path) is not None) and \
+            (self._exclude_pattern is None or self._exclude_pattern.match(path) is None)
+
+    def matches_any(self, paths) -> bool:
+        """
+        Tests the files changed by a commit.
+
+        :param paths: Iterable of paths relative to the root of the repository
+        :return: True when at least one path is included and not excluded
+        """
+
+        return any(self.matches(path) for path in paths)
+
+    def get_pathspec(self) -> list:
+        """
+        Provides the globs as a Git pathspec.
+
+        :return: List of pathspec arguments for "git rev-list"
+        """
+
+        return [f':(glob){pattern.strip().strip("/") or "."}' for pattern in self._include] + \
+            [f':(exclude,glob){pattern.strip().strip("/")}' for pattern in self._exclude]
+
+    def __str__(self) -> str:
+        return ', '.join(self._include + [f'!{pattern}' for pattern in self._exclude])
@@ -0,0 +1,370 @@
+import logging
+from datetime import datetime
+
+import git
+
+from constants import ANCESTRY_TIP_OPTIONS, CACHE_BATCH_SIZE, GIT_LOG_FIELD_SEPARATOR, GIT_LOG_FORMAT, \
+    GIT_LOG_RECORD_SEPARATOR
+
+
+class CommitStats:
+    """
+    This class represents the metadata of a single commit as read from the history walk, including the files changed by
+    the commit and the total amount of lines added and deleted.
+    """
+
+    def __init__(self, commit_id, commit_time, tree_id, parents) -> None:
+        self._commit_id = commit_id
+        self._commit_time = commit_time
+        self._tree_id = tree_id
+        self._parents = parents
+        self._files_changed = 0
+        self._additions = 0
+        self._deletions = 0
+        self._changes = []
+
+    def add_change(self, additions, deletions, path) -> None:
+        """
+        Records a file changed by this commit.  Binary files should be given with zero additions and deletions, this
+        matches the behaviour of "git diff --shortstat".
+
+        :param additions: Amount of lines added to the file.
+        :param deletions: Amount of lines deleted from the file.
+        :param path: Path of the file relative to the root of the repository.
+        :return: None
+        """
+
+        self._files_changed += 1
+        self._additions += additions
+        self._deletions += deletions
+        self._changes.append((additions, deletions, path))
+
+    def get_commit_id(self) -> str:
+        """
+        Returns the SHA1 hash of the commit.
+
+        :return: String of the SHA1 hash of the commit.
+        """
+
+        return self._commit_id
+
+    def get_commit_time(self) -> datetime:
+        """
+        Returns the time the commit was committed, including the committer's timezone.
+
+        :return: datetime representation of the time the commit was committed.
+        """
+
+        return self._commit_time
+
+    def get_tree_id(self) -> str:
+        """
+        Returns the SHA1 hash of the tree of the commit.  Commits with the same tree contain exactly the same files.
+
+        :return: String of the SHA1 hash of the tree.
+        """
+
+        return self._tree_id
+
+    def get_parents(self) -> list:
+        """
+        Returns the SHA1 hashes of the parents of this commit.
+
+        :return: List of parent commit IDs, empty for a root commit.
+        """
+
+        return self._parents
+
+    def get_shortstat(self) -> (int, int, int):
+        """
+        Returns the totals of the changes of this commit, in the same form as parse_diff_shortstat().  Renames aren't
+        detected, so unlike "git diff --shortstat" a renamed file counts as two files changed, with every line of the
+        file as an insertion and a deletion.
+
+        :return: Tuple of files changed, insertions and deletions
+        """
+
+        return self._files_changed, self._additions, self._deletions
+
+    def get_changes(self) -> list:
+        """
+        Returns the per-file changes of this commit.
+
+        :return: List of (additions, deletions, path) tuples.
+        """
+
+        return self._changes
+
+    def get_changed_files(self) -> list:
+        """
+        Returns the paths of all files changed by this commit.
+
+        :return: List of paths relative to the root of the repository.
+        """
+
+        return [path for _, _, path in self._changes]
+
+
+def unquote_path(path: str) -> str:
+    """
+    Git quotes paths containing unusual characters (e.g. "a\\tb.py") using C-style escapes, this reverses the quoting.
+
+    :param path: A path as printed by git
+    :return: The path with quoting removed
+    """
+
+    if len(path) < 2 or not (path.startswith('"') and path.endswith('"')):
+        return path
+
+    return path[1:-1].encode('latin-1', 'backslashreplace').decode('unicode_escape').encode('latin-1').decode('utf-8')
+
+
+def parse_numstat_line(line: str) -> (int, int, str):
+    """
+    Parses a single line of "git log --numstat" output.
+
+    Given a string such as "12\\t3\\tsrc/main.py", returns the additions, deletions and path.  Binary files are given
+    as "-" by git and are treated as having no additions or deletions.
+
+    :param line: A single line of numstat output, without the trailing newline
+    :return: Tuple of additions, deletions and path
+    """
+
+    additions, deletions, path = line.split('\t', 2)
+
+    return (0 if additions == '-' else int(additions)), (0 if deletions == '-' else int(deletions)), unquote_path(path)
+
+
+def parse_log_header(line: str) -> CommitStats:
+    """
+    Parses a commit header printed using GIT_LOG_FORMAT into a CommitStats object.
+
+    :param line: The header line, with the leading record separator removed
+    :return: A CommitStats object with no changes recorded yet
+    """
+
+    commit_id, commit_time, tree_id, parents = line.split(GIT_LOG_FIELD_SEPARATOR)
+
+    return CommitStats(commit_id, datetime.fromisoformat(commit_time), tree_id, parents.split())
+
+
+def parse_log_stream(lines):
+    """
+    Parses the output of "git log --numstat" using GIT_LOG_FORMAT as it is produced, yielding a CommitStats object for
+    each commit once all of its changes have been read.
+
+    :param lines: An iterable of decoded lines
+    :return: A generator of CommitStats objects, in the order given by git
+    """
+
+    current = None
+
+    for line in lines:
+        line = line.rstrip('\r\n')
+
+        if line.startswith(GIT_LOG_RECORD_SEPARATOR):
+            if current is not None:
+                yield current
+
+            current = parse_log_header(line[len(GIT_LOG_RECORD_SEPARATOR):])
+        elif line and current is not None:
+            current.add_change(*parse_numstat_line(line))
+
+    if current is not None:
+        yield current
+
+
+def _log_commit_stats(repo, *revs, **kwargs):
+    """
+    Runs "git log --numstat" using GIT_LOG_FORMAT and yields a CommitStats object for each commit as it is read.
+
+    Merge commits are compared with their first parent and renames are reported as a deletion and an addition, so the
+    paths given are always the real paths of the files.
+
+    :param repo: The GitPython Repo object to be walked.
+    :param revs: Revisions to be passed to "git log"
+    :param kwargs: Additional keyword arguments for "git log"
+    :return: A generator of CommitStats objects, in the order given by git
+    """
+
+    process = repo.git.log(*revs, as_process=True, format=GIT_LOG_FORMAT, numstat=True, no_renames=True,
+                           diff_merges='first-parent', **kwargs)
+
+    try:
+        yield from parse_log_stream(line.decode('utf-8', 'replace') for line in process.stdout)
+    except GeneratorExit:
+        # The caller has all the commits it needs (i.e. it hit the commit limit), don't wait for git to finish
+        process.proc.kill()
+        process.proc.wait()
+        raise
+
+    process.wait()
+
+
+def _iter_rev_list_batches(repo, target_rev, rev_list_args, pathspec=None):
+    """
+    Runs "git rev-list" and yields the commit IDs it gives in batches of CACHE_BATCH_SIZE.
+
+    :param repo: The GitPython Repo object to be walked.
+    :param target_rev: The target revision, as given by get_rev_list_params()
+    :param rev_list_args: Keyword arguments for "git rev-list", as given by get_rev_list_params()
+    :param pathspec: Optional list of pathspec arguments, only commits which change a matching path are given
+    :return: A generator of lists of commit IDs
+    """
+
+    paths = ['--', *pathspec] if pathspec else []
+    process = repo.git.rev_list(target_rev, *paths, as_process=True, **rev_list_args)
+    batch = []
+
+    try:
+        for line in process.stdout:
+            batch.append(line.decode('ascii').strip())
+
+            if len(batch) == CACHE_BATCH_SIZE:
+                yield batch
+                batch = []
+    except GeneratorExit:
+        process.proc.kill()
+        process.proc.wait()
+        raise
+
+    process.wait()
+
+    if batch:
+        yield batch
+
+
+def iter_commit_stats(repo, target_rev, rev_list_args, cache=None, shortstat_filter=None, pathspec=None):
+    """
+    Walks the history of the repository, yielding the metadata and changes of each commit as it is read.  This replaces
+    running "git diff" once or twice for every commit.
+
+    Without a cache or pathspec, the whole walk is a single "git log --numstat" process.  Otherwise, "git rev-list"
+    gives the commits to be considered and only the commits missing from the cache are passed to "git log", one batch at
+    a time.  The pathspec is only given to "git rev-list", so the changes of each commit always include every file.
+
+    :param repo: The GitPython Repo object to be walked.
+    :param target_rev: The target revision, as given by get_rev_list_params()
+    :param rev_list_args: Keyword arguments for "git rev-list", as given by get_rev_list_params()
+    :param cache: Optional CommitCache used to store and retrieve the metadata of commits
+    :param shortstat_filter: Optional ShortstatFilter, cached commits which don't match it are skipped without reading
+    their changes.  Other commits are yielded whether they match or not, so the filter must still be applied.
+    :param pathspec: Optional list of pathspec arguments for "git rev-list", e.g. from PathFilter.get_pathspec()
+    :return: A generator of CommitStats objects in the same order as Repo.iter_commits()
+    """
+
+    logging.debug('Starting history walk for %s', target_rev)
+
+    if cache is None and not pathspec:
+        yield from _log_commit_stats(repo, target_rev, **rev_list_args)
+        return
+
+    for batch in _iter_rev_list_batches(repo, target_rev, rev_list_args, pathspec):
+        commits = {} if cache is None else cache.get_many(batch, shortstat_filter)
+        missing = [commit_id for commit_id in batch if commit_id not in commits]
+
+        logging.debug('%i of %i commits in batch are cached', len(commits), len(batch))
+
+        if missing:
+            computed = list(_log_commit_stats(repo, *missing, no_walk='unsorted'))
+
+            if cache is not None:
+                cache.put_many(computed)
+
+            commits.update((commit_stats.get_commit_id(), commit_stats) for commit_stats in computed)
+
+        for commit_id in batch:
+            if commits[commit_id] is not None:
+                yield commits[commit_id]
+
+
+class AncestryIndex:
+    """
+    Maps each commit to the latest commit in its history (including itself) which is listed in the "Analysis" stanza.
+    Built once per run by build_ancestry_index() so the lookup for each selected commit is a single dictionary access.
+    """
+
+    def __init__(self, labels) -> None:
+        self._labels = labels
+
+    def get_nearest(self, commit_id):
+        """
+        Returns the latest commit in the history of the given commit which is listed in the "Analysis" stanza.
+
+        :param commit_id: SHA1 hash of the commit being analysed
+        :return: SHA1 hash of the nearest configured commit, or None when the "Default" stanza should be used
+        """
+
+        return self._labels.get(commit_id)
+
+
+def label_ancestry(commits, configured_times) -> dict:
+    """
+    Labels every commit with the configured commit in its history which was committed most recently, matching the first
+    configured commit "git rev-list" would reach when walking back from that commit.
+
+    Commits must be given in topological order with parents before their children, so the label of a commit is the
+    latest of its parents' labels and itself (when it is configured).
+
+    :param commits: An iterable of (commit ID, list of parent IDs) in topological order
+    :param configured_times: Dictionary of configured commit IDs to their commit time
+    :return: Dictionary of commit IDs to their label, commits without a configured ancestor are omitted
+    """
+
+    labels = {}
+
+    for commit_id, parents in commits:
+        candidates = [labels[parent] for parent in parents if parent in labels]
+
+        if commit_id in configured_times:
+            candidates.append(commit_id)
+
+        if candidates:
+            labels[commit_id] = max(candidates, key=configured_times.get)
+
+    return labels
+
+
+def build_ancestry_index(repo, tips, analysis_config, rev_list_args=None) -> AncestryIndex:
+    """
+    Builds an AncestryIndex for every commit reachable from the tips using a single "git rev-list" process.
+
+    The options of the history walk which add references (e.g. "all" or "branches") are given to "git rev-list" as
+    well, so commits outside the history of the tips are labelled.  Options which limit the walk (e.g. "max-count" or
+    "ancestry-path") are not, as labelling a commit needs its whole history.
+
+    :param repo: The GitPython Repo object to be walked.
+    :param tips: References to walk back from, usually the starting and stopping points
+    :param analysis_config: Configuration object specifically containing an "Analysis" stanza.
+    :param rev_list_args: Keyword arguments for "git rev-list" used by the history walk, or None
+    :return: An AncestryIndex for all commits reachable from the tips
+    """
+
+    configured_times = {}
+
+    for commit_id in analysis_config:
+        if commit_id == 'Default':
+            continue
+
+        try:
+            configured_times[commit_id] = repo.commit(commit_id).committed_date
+        except (ValueError, git.BadName):
+            logging.warning('Commit %s from the Analysis stanza does not exist in the repository', commit_id)
+
+    if not configured_times:
+        logging.debug('No commits in the Analysis stanza exist, every commit will use the Default stanza')
+        return AncestryIndex({})
+
+    tip_options = {option: value for option, value in (rev_list_args or {}).items()
+                   if option in ANCESTRY_TIP_OPTIONS and value}
+
+    logging.debug('Building ancestry index from %s', ', '.join([*tips, *(f'--{option}' for option in tip_options)]))
+
+    process = repo.git.rev_list(*tips, as_process=True, topo_order=True, reverse=True, parents=True, **tip_options)
+    commits = ((line[0], line[1:]) for line in (raw.decode('ascii').split() for raw in process.stdout))
+
+    labels = label_ancestry(commits, configured_times)
+    process.wait()
+
+    logging.debug('Ancestry index contains %i commits with a configured ancestor', len(labels))
+    return AncestryIndex(labels)
@@ -0,0 +1,164 @@
+import functools
+import hashlib
+import json
+import logging
+import os
+from uuid import uuid4
+
+from constants import IMAGE_CACHE_INDEX
+
+
+@functools.lru_cache(maxsize=None)
+def get_image_digest(analysis_image):
+    """
+    Computes the SHA256 digest of an analysis image which is a local file (i.e. a SIF file).  The digest of each image
+    is only computed once by each process.
+
+    :param analysis_image: Path or URI of the analysis image
+    :return: String of the form "sha256:<hex digest>", or None when the image is not a local file (i.e. docker://)
+    """
+
+    if not os.path.isfile(analysis_image):
+        return None
+
+    digest = hashlib.sha256()
+
+    with open(analysis_image, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(block)
+
+    return f'sha256:{digest.hexdigest()}'
+
+
+class ImageCache:
+    """
+    The image cache holds a SIF file for every image used for analysis, named by the digest of the SIF file.  Images are
+    pulled once by the primary node before any analysis is submitted, then every worker executes the cached SIF file
+    rather than converting the image itself for each commit.
+
+    The cache directory should be on a filesystem which is visible to all nodes.
+    """
+
+    def __init__(self, cache_dir) -> None:
+        """
+        Initialise the image cache.  The cache directory must already exist.
+
+        :param cache_dir: Directory containing the cached SIF files.
+        """
+
+        self._cache_dir = cache_dir
+        self._index_file = os.path.join(cache_dir, IMAGE_CACHE_INDEX)
+
+    def _get_image_file(self, digest) -> str:
+        """
+        Gives the location of the cached SIF file with the given digest.
+
+        :param digest: Digest of the SIF file, as given by get_image_digest()
+        :return: Location of the SIF file
+        """
+
+        return os.path.join(self._cache_dir, f"{digest.split(':')[1]}.sif")
+
+    def _pull(self, analysis_image) -> str:
+        """
+        Pulls an image into the cache and names it by its digest.
+
+        :param analysis_image: The URI of the image to pull
+        :return: Digest of the pulled SIF file
+        """
+
+        from spython.main import Client
+
+        logging.info('Pulling %s into the image cache...', analysis_image)
+        pulled_file = Client.pull(analysis_image, name=f'{uuid4().hex}.sif', pull_folder=self._cache_dir, quiet=True)
+
+        digest = get_image_digest(pulled_file)
+        os.replace(pulled_file, self._get_image_file(digest))
+
+        logging.info('Cached %s as %s', analysis_image, digest)
+        return digest
+
+    def stage(self, analysis_images) -> dict:
+        """
+        Ensures every image is in the cache, pulling any image which isn't cached already.  Images which are already
+        local files are used directly.  This should only be run on the "primary" node!
+
+        Images are only pulled the first time they are seen.  To pull a newer version of a tag (e.g. latest), delete
+        the image from the index or empty the cache directory.
+
+        :param analysis_images: An iterable of image URIs or paths, duplicates are only staged once
+        :return: Dictionary of image URIs to digests
+        """
+
+        index = _read_index(self._index_file)
+        result = {}
+
+        for analysis_image in set(analysis_images):
+            if os.path.isfile(analysis_image):
+                logging.debug('%s is a local file, it will not be cached', analysis_image)
+                result[analysis_image] = get_image_digest(analysis_image)
+                continue
+
+            if analysis_image not in index or not os.path.exists(self._get_image_file(index[analysis_image])):
+                index[analysis_image] = self._pull(analysis_image)
+            else:
+                logging.debug('%s is already cached as %s', analysis_image, index[analysis_image])
+
+            result[analysis_image] = index[analysis_image]
+
+        temp_file = f'{self._index_file}.{os.getpid()}.tmp'
+
+        with open(temp_file, 'w') as file:
+            json.dump(index, file)
+
+        os.replace(temp_file, self._index_file)
+
+        return result
+
+    def resolve(self, analysis_image) -> (str, str):
+        """
+        Gives the cached SIF file which should be executed for an image.  Falls back to the image itself when it isn't
+        in the cache (i.e. the cache directory isn't visible from this node).
+
+        :param analysis_image: The image URI or path from the "Analysis" stanza
+        :return: Tuple of the image to execute and its digest, which might be None
+        """
+
+        if os.path.isfile(analysis_image):
+            return analysis_image, get_image_digest(analysis_image)
+
+        digest = _read_index_once(self._index_file).get(analysis_image)
+
+        if digest is None or not os.path.exists(self._get_image_file(digest)):
+            logging.warning('%s is not in the image cache, it will be used directly', analysis_image)
+            return analysis_image, None
+
+        return self._get_image_file(digest), digest
+
+
+def _read_index(index_file) -> dict:
+    """
+    Reads the index of image URIs to digests.
+
+    :param index_file: Location of the image cache index
+    :return: Dictionary of image URIs to digests, empty when nothing has been cached yet
+    """
+
+    if not os.path.exists(index_file):
+        return {}
+
+    with open(index_file, 'r') as file:
+        return json.load(file)
+
+
+@functools.lru_cache(maxsize=None)
+def _read_index_once(index_file) -> dict:
+    """
+    Reads the image cache index once per process.  The index is only written by the primary node before any analysis
+    is submitted, so it doesn't change while workers are running.
+
+    :param index_file: Location of the image cache index
+    :return: Dictionary of image URIs to digests
+    """
+
+    return _read_index(index_file)
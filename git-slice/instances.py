@@ -0,0 +1,61 @@
+import logging
+import threading
+from uuid import uuid4
+
+from constants import SINGULARITY_OPTIONS
+
+# Instances started by this worker thread, keyed by the image and bind paths they were started with
+_local = threading.local()
+
+# Every instance started by this process, so they can all be stopped before the process exits
+_started = []
+_started_lock = threading.Lock()
+
+
+def get_instance(image_file, binds):
+    """
+    Gives a running Singularity instance of an image for the calling worker thread, starting one the first time the
+    image is used.  Each worker thread has its own instances so commands are never run in the same instance at once.
+
+    Bind paths can't be changed once an instance is running, so an instance is started for each distinct set of binds.
+
+    :param image_file: The image to start an instance of
+    :param binds: List of bind paths, in the same format as Client.execute()
+    :return: A spython Instance which can be passed to Client.execute()
+    """
+
+    if not hasattr(_local, 'instances'):
+        _local.instances = {}
+
+    key = (image_file, tuple(binds))
+
+    if key not in _local.instances:
+        from spython.main import Client
+
+        options = [option for bind in binds for option in ('--bind', bind)] + SINGULARITY_OPTIONS
+        name = f'gitslice_{uuid4().hex}'
+
+        logging.info('Starting instance %s of %s', name, image_file)
+        instance = Client.instance(image_file, name=name, options=options)
+
+        with _started_lock:
+            _started.append(instance)
+
+        _local.instances[key] = instance
+
+    return _local.instances[key]
+
+
+def stop_instances() -> None:
+    """
+    Stops every instance started by this process.
+
+    :return: None
+    """
+
+    with _started_lock:
+        for instance in _started:
+            logging.debug('Stopping instance %s', instance.name)
+            instance.stop()
+
+        _started.clear()
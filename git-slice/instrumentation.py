@@ -0,0 +1,301 @@
+import csv
+import json
+import logging
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+
+REPORT_FIELDS = ['phase', 'count', 'wall_seconds', 'cpu_seconds', 'bytes', 'peak_rss_kib', 'peak_child_rss_kib']
+
+
+def get_peak_rss() -> (int, int):
+    """
+    Reads the peak resident set size of this process and of its largest child process (i.e. a container) so far.
+
+    :return: Tuple of the peak RSS of this process and of its largest child, in KiB
+    """
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+
+
+def get_dir_size(path) -> int:
+    """
+    Totals the size of every file under a directory, without following symbolic links.
+
+    :param path: Location of the directory
+    :return: Total size in bytes, or 0 when the directory doesn't exist
+    """
+
+    size = 0
+
+    for root, _, files in os.walk(path):
+        for file in files:
+            try:
+                size += os.lstat(os.path.join(root, file)).st_size
+            except OSError:
+                pass
+
+    return size
+
+
+class Phase:
+    """
+    The totals of every span recorded for one phase of the pipeline, e.g. every container run on a worker.
+    """
+
+    def __init__(self, name) -> None:
+        self._name = name
+        self._count = 0
+        self._wall = 0.0
+        self._cpu = 0.0
+        self._bytes = 0
+        self._peak_rss = 0
+        self._peak_child_rss = 0
+
+    def get_name(self) -> str:
+        """
+        :return: Name of the phase
+        """
+
+        return self._name
+
+    def get_count(self) -> int:
+        """
+        :return: Amount of spans recorded for the phase
+        """
+
+        return self._count
+
+    def get_wall(self) -> float:
+        """
+        :return: Total wall time of the spans in seconds
+        """
+
+        return self._wall
+
+    def get_cpu(self) -> float:
+        """
+        :return: Total CPU time of the threads which ran the spans in seconds, excluding child processes
+        """
+
+        return self._cpu
+
+    def get_bytes(self) -> int:
+        """
+        :return: Total bytes handled by the spans, where the phase counts them
+        """
+
+        return self._bytes
+
+    def add(self, wall, cpu, size, peak_rss, peak_child_rss) -> None:
+        """
+        Adds a span to the totals.
+
+        :param wall: Wall time of the span in seconds
+        :param cpu: CPU time of the span in seconds
+        :param size: Bytes handled by the span
+        :param peak_rss: Peak RSS of the process at the end of the span, in KiB
+        :param peak_child_rss: Peak RSS of the largest child process at the end of the span, in KiB
+        :return: None
+        """
+
+        self._count += 1
+        self._wall += wall
+        self._cpu += cpu
+        self._bytes += size
+        self._peak_rss = max(self._peak_rss, peak_rss)
+        self._peak_child_rss = max(self._peak_child_rss, peak_child_rss)
+
+    def merge(self, other) -> None:
+        """
+        Adds the totals of another Phase with the same name, i.e. the same phase recorded on another worker.
+
+        :param other: The Phase to add
+        :return: None
+        """
+
+        self._count += other._count
+        self._wall += other._wall
+        self._cpu += other._cpu
+        self._bytes += other._bytes
+        self._peak_rss = max(self._peak_rss, other._peak_rss)
+        self._peak_child_rss = max(self._peak_child_rss, other._peak_child_rss)
+
+    def to_row(self) -> list:
+        """
+        :return: The totals in the order of REPORT_FIELDS
+        """
+
+        return [self._name, self._count, round(self._wall, 6), round(self._cpu, 6), self._bytes, self._peak_rss,
+                self._peak_child_rss]
+
+
+class Span:
+    """
+    Given to the body of a span, so it can count the bytes it handles.
+    """
+
+    def __init__(self) -> None:
+        self._bytes = 0
+
+    def add_bytes(self, size) -> None:
+        """
+        :param size: Amount of bytes handled
+        :return: None
+        """
+
+        self._bytes += size
+
+    def get_bytes(self) -> int:
+        """
+        :return: Total bytes handled by the span
+        """
+
+        return self._bytes
+
+
+class Instrumentation:
+    """
+    Records the wall time, CPU time, bytes handled and peak memory of each phase of the pipeline.  Spans are added to a
+    running total for their phase rather than kept individually, so recording is cheap and memory doesn't grow with the
+    amount of commits.
+
+    Each analysis records its spans in its own Instrumentation, which is returned to the primary with the result and
+    merged into the Instrumentation of the run.
+    """
+
+    def __init__(self) -> None:
+        self._phases = {}
+        self._lock = threading.Lock()
+        self._start_time = time.time()
+
+    @contextmanager
+    def span(self, name):
+        """
+        Records the body of a with statement as a span of the given phase.  The span is recorded even if the body
+        raises an exception.
+
+        :param name: Name of the phase
+        :return: A context manager giving a Span object
+        """
+
+        span = Span()
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+
+        try:
+            yield span
+        finally:
+            self.record(name, time.perf_counter() - wall, time.thread_time() - cpu, span.get_bytes())
+
+    def iterate(self, name, iterable):
+        """
+        Records the time spent producing each item of an iterable (i.e. a generator which walks the history) as a
+        single span, excluding the time the caller spends on each item.
+
+        :param name: Name of the phase
+        :param iterable: The iterable to time
+        :return: Generator of the items of the iterable
+        """
+
+        iterator = iter(iterable)
+        wall = cpu = 0.0
+
+        try:
+            while True:
+                wall_start, cpu_start = time.perf_counter(), time.thread_time()
+
+                try:
+                    item = next(iterator)
+                finally:
+                    wall += time.perf_counter() - wall_start
+                    cpu += time.thread_time() - cpu_start
+
+                yield item
+        except StopIteration:
+            pass
+        finally:
+            self.record(name, wall, cpu)
+
+    def record(self, name, wall, cpu, size=0) -> None:
+        """
+        Adds a span to the totals of its phase.
+
+        :param name: Name of the phase
+        :param wall: Wall time of the span in seconds
+        :param cpu: CPU time of the span in seconds
+        :param size: Bytes handled by the span
+        :return: None
+        """
+
+        with self._lock:
+            if name not in self._phases:
+                self._phases[name] = Phase(name)
+
+            self._phases[name].add(wall, cpu, size, *get_peak_rss())
+
+    def merge(self, phases) -> None:
+        """
+        Adds the totals of phases recorded by another Instrumentation, i.e. of an analysis run on a worker.
+
+        :param phases: Iterable of Phase objects
+        :return: None
+        """
+
+        with self._lock:
+            for phase in phases:
+                if phase.get_name() not in self._phases:
+                    self._phases[phase.get_name()] = Phase(phase.get_name())
+
+                self._phases[phase.get_name()].merge(phase)
+
+    def get_phases(self) -> list:
+        """
+        :return: List of the Phase objects recorded, in the order each phase was first seen
+        """
+
+        with self._lock:
+            return list(self._phases.values())
+
+    def write_report(self, json_file, csv_file) -> None:
+        """
+        Writes the totals of every phase as a JSON and a CSV run report.
+
+        :param json_file: Location of the JSON report
+        :param csv_file: Location of the CSV report
+        :return: None
+        """
+
+        rows = [phase.to_row() for phase in self.get_phases()]
+
+        with open(json_file, 'w') as file:
+            json.dump({'started': self._start_time, 'wall_seconds': round(time.time() - self._start_time, 6),
+                       'phases': [dict(zip(REPORT_FIELDS, row)) for row in rows]}, file, indent=2)
+
+        with open(csv_file, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(REPORT_FIELDS)
+            writer.writerows(rows)
+
+        logging.debug('Wrote run report to %s and %s', json_file, csv_file)
+
+    def log_summary(self) -> None:
+        """
+        Logs a table of the totals of every phase.  Phases run on workers overlap, so their wall times add up to more
+        than the length of the run.
+
+        :return: None
+        """
+
+        logging.info('%-16s %10s %12s %12s %12s %12s %14s', 'Phase', 'Count', 'Wall (s)', 'Mean (s)', 'CPU (s)', 'MiB',
+                     'Peak RSS (MiB)')
+
+        for phase in self.get_phases():
+            name, count, wall, cpu, size, peak_rss, peak_child_rss = phase.to_row()
+
+            logging.info('%-16s %10i %12.2f %12.3f %12.2f %12.1f %14.1f', name, count, wall, wall / (count or 1), cpu,
+                         size / 2 ** 20, max(peak_rss, peak_child_rss) / 1024)
+
+        logging.info('The run took %.2f seconds', time.time() - self._start_time)
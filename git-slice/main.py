@@ -1,19 +1,42 @@
 import argparse
 import datetime
+import json
 import logging
+import os
 import re
 import socket
+import sqlite3
+import subprocess
 import sys
+import threading
 import time
-from datetime import timedelta
 
 import coloredlogs as coloredlogs
 import git
 from git import Repo
 
-from config import AdditionalFilters, Config, ChangesCategories
-from constants import PROJECT_NAME, PROJECT_DESCRIPTION, RSYNC_PRE_RUN, RSYNC_POST_RUN, TIMEDELTA_PATTERN
+from cache import CommitCache
+from checkout import create_checkout
+from config import AdaptiveOptions, AdditionalFilters, Config, ChangesCategories, OutputBackends, SchedulingPolicies
+from dedup import DedupStore, get_dedup_key, get_subtree_id
+from executors import ExecutorTypes, create_executor
+from extractors import extract_metrics
+from constants import IN_FLIGHT_PER_WORKER, PROJECT_NAME, PROJECT_DESCRIPTION, RSYNC_PRE_RUN, RSYNC_POST_RUN, \
+    RUN_REPORT_NAME, SUBMISSION_WINDOW_POLL_INTERVAL
+from filters import RangeFilter, ShortstatFilter
 from filesystem import FilesystemManager, FilesystemFailure
+from history import build_ancestry_index, iter_commit_stats
+from images import ImageCache, get_image_digest
+from instrumentation import Instrumentation
+from instances import stop_instances
+from manifest import CompletionManifest, is_complete
+from output import OutputSink
+from results import ResultsStore
+from progress import ProgressReporter
+from runners import RunnerTypes, SingularityRunner, create_runner, get_runner_type
+from sampling import AdaptiveSampler
+from scheduling import CostModel, order_chunks
+from staging import DeltaStaging
 
 
 def runtime_info() -> None:
@@ -30,20 +53,25 @@ def runtime_info() -> None:
     logging.debug('  GitPython version: \t%s', git.__version__)
     logging.debug('  Config file: \t%s', args.config_file)
     logging.debug('  Dry run mode: \t\t%s', args.dry_run)
+    logging.debug('  Resume mode: \t\t%s', args.resume)
     logging.debug('  Logging level: \t\t%s', args.log_level)
 
 
 class Analysis:
     """
     This class represents the details of an analysis.  It's fields will be used by a node to run a Singularity container
-    and perform analysis on a commit.
+    (or the command directly, see runners.py) and perform analysis on a commit.
     """
 
-    def __init__(self, commit_id, commit_time, analysis_image, analysis_command) -> None:
+    def __init__(self, commit_id, commit_time, analysis_image, analysis_command, tree_id=None, extractor=None,
+                 runner=None) -> None:
         self._commit_id = commit_id
         self._commit_time = commit_time
         self._analysis_image = analysis_image
         self._analysis_command = analysis_command
+        self._tree_id = tree_id
+        self._extractor = extractor
+        self._runner = runner
 
     def get_analysis_command(self) -> str:
         """
@@ -80,6 +108,34 @@ class Analysis:
 
         return self._commit_time
 
+    def get_tree_id(self) -> str:
+        """
+        Returns the SHA1 hash of the tree of the commit to be analysed.
+
+        :return: String of the SHA1 hash of the tree, or None when it isn't known.
+        """
+
+        return self._tree_id
+
+    def get_extractor(self) -> dict:
+        """
+        Provides the extractor used to read metrics from the output, as given in the "Analysis" stanza.
+
+        :return: Dictionary from the "Extractor" key, or None when no metrics should be extracted.
+        """
+
+        return self._extractor
+
+    def get_runner(self):
+        """
+        Provides the runner used to run the command, as given in the "Analysis" stanza.
+
+        :return: Runner type or dictionary from the "Runner" key, or None when the command runs in a Singularity
+                 container.
+        """
+
+        return self._runner
+
     def get_details(self):
         """
         Returns a list, ready for unpacking of all the data contained within the object.  This includes: the SHA1 hash
@@ -101,47 +157,218 @@ class Analysis:
         return f"{self._commit_id} at {self._commit_time} running {self._analysis_command} in {self._analysis_image}"
 
 
-def parse_delta(delta) -> datetime:
+class AnalysisResult:
     """
-    Parses a human-readable timedelta (e.g. 3d5h19m) into a datetime.timedelta.
+    This class represents the outcome of analysing a single commit, as returned by a worker to the "primary" node.
+    """
+
+    def __init__(self, commit_id, commit_time, analysis_image, exit_status, duration, reused=False, output=None,
+                 metrics=None, phases=None, node=None) -> None:
+        self._commit_id = commit_id
+        self._commit_time = commit_time
+        self._analysis_image = analysis_image
+        self._exit_status = exit_status
+        self._duration = duration
+        self._reused = reused
+        self._output = output
+        self._metrics = metrics
+        self._phases = phases or []
+        self._node = node
+
+    def get_commit_id(self) -> str:
+        """
+        Returns the commit ID which was analysed.
+
+        :return: String of the SHA1 hash of the commit.
+        """
+
+        return self._commit_id
+
+    def get_commit_time(self) -> datetime:
+        """
+        Returns the time the commit was committed.
+
+        :return: datetime representation of the time the commit was committed.
+        """
+
+        return self._commit_time
+
+    def get_analysis_image(self) -> str:
+        """
+        Provides the image which was used for analysis.
+
+        :return: String containing the URI of the container.
+        """
+
+        return self._analysis_image
+
+    def get_exit_status(self) -> int:
+        """
+        Returns the exit status of the analysis command.
+
+        :return: Integer exit status, 0 indicating success.
+        """
+
+        return self._exit_status
+
+    def get_duration(self) -> float:
+        """
+        Returns how long the analysis took, including checking out the commit.
+
+        :return: Duration of the analysis in seconds.
+        """
+
+        return self._duration
+
+    def is_reused(self) -> bool:
+        """
+        Returns whether the output of an identical tree was reused rather than running the analysis.
+
+        :return: True when the output was reused from the dedup store.
+        """
+
+        return self._reused
+
+    def get_node(self) -> str:
+        """
+        Returns the hostname of the node which analysed the commit.
+
+        :return: String of the hostname.
+        """
+
+        return self._node
+
+    def get_output(self) -> str:
+        """
+        Returns the output of the analysis, only included when the output is stored in the results store.
+
+        :return: String of the output, or None when it was written to the output directory.
+        """
+
+        return self._output
+
+    def get_metrics(self) -> dict:
+        """
+        Returns the metrics extracted from the output, only included when the output is stored in the results store.
+
+        :return: Dictionary of metric names to values, or None when no metrics were extracted.
+        """
+
+        return self._metrics
+
+    def get_phases(self) -> list:
+        """
+        Returns the time and resources spent in each phase of the analysis, to be added to the run report.
+
+        :return: List of Phase objects
+        """
+
+        return self._phases
+
+    def clear_output(self) -> None:
+        """
+        Drops the output once it has been stored, so completed results don't hold on to it.
 
-    Delta includes:
+        :return: None
+        """
+
+        self._output = None
+
+    def __str__(self) -> str:
+        """
+        String conversion dunder method for representing this object as a human-readable string.
+
+        :return: String describing the commit analysed and how long it took (for printing to the screen).
+        """
 
-    * Xd days
-    * Xh hours
-    * Xm minutes
+        if self._reused:
+            return f"{self._commit_id} reused the output of an identical tree in {self._duration} seconds"
 
-    Values can be negative following timedelta's rules. Eg: -5h-30m
+        if self._exit_status:
+            return f"{self._commit_id} failed analysis with exit status {self._exit_status} in {self._duration} " \
+                   f"seconds"
 
-    Source: https://gist.github.com/santiagobasulto/698f0ff660968200f873a2f9d1c4113c
+        return f"{self._commit_id} completed analysis in {self._duration} seconds"
 
-    :param delta: String containing the delta
-    :return: datetime representation of the delta.
+
+class SubmissionWindow:
+    """
+    Limits the amount of analyses which have been submitted to the executor but have not yet completed.  This allows
+    commits to be submitted as soon as they are selected, without queueing the whole history at once.
     """
-    match = TIMEDELTA_PATTERN.match(delta)
-    if match:
-        parts = {k: int(v) for k, v in match.groupdict().items() if v}
-        return timedelta(**parts)
+
+    def __init__(self, size, callback=None) -> None:
+        self._size = size
+        self._callback = callback
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def submit(self, function, *arguments):
+        """
+        Submits a task to the executor, first waiting for a space in the window if it is full.
+
+        :param function: The function to be run by a worker
+        :param arguments: Arguments for the function
+        :return: The task, as given by the executor
+        """
+
+        if self._in_flight >= self._size:
+            self._wait()
+
+        with self._lock:
+            self._in_flight += 1
+
+        return executor.submit(function, *arguments, callback=lambda task: self._completed(task, arguments))
+
+    def _completed(self, task, arguments) -> None:
+        """
+        Callback run by the executor when a submitted task has completed, which runs the window's own callback (if any).
+
+        :param task: The completed task
+        :param arguments: Arguments the task was submitted with, which are also given to the window's callback
+        :return: None
+        """
+
+        try:
+            if self._callback is not None:
+                self._callback(task, *arguments)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _wait(self) -> None:
+        """
+        Blocks until there is a space in the window.
+
+        :return: None
+        """
+
+        logging.debug('%i analyses are in flight, waiting before submitting more', self._in_flight)
+
+        if executor.num_local_workers() > 1:
+            while self._in_flight >= self._size:
+                time.sleep(SUBMISSION_WINDOW_POLL_INTERVAL)
+        else:
+            # The primary is the only worker on this node, tasks queued on this node only run while it waits for them
+            executor.wait()
 
 
-def get_analysis_details(commit, analysis_config) -> (str, str):
+def get_analysis_details(commit_id, analysis_config, ancestry_index) -> (str, str, dict, dict):
     """
-    Given a commit object, and a configuration object, this method returns the analysis image and command which should
-    be used for this commit.
+    Given a commit ID, and a configuration object, this method returns the analysis image, command, extractor and runner
+    which should be used for this commit.
 
-    :param commit: GitPython Commit object
+    :param commit_id: SHA1 hash of the commit
     :param analysis_config: Configuration object specifically containing an "Analysis" stanza.
-    :return: The image and command to be used for this commit.
+    :param ancestry_index: AncestryIndex built from the same "Analysis" stanza
+    :return: The image (None for the subprocess runner), command, extractor and runner (both might be None) to be used
+             for this commit.
     """
 
-    if commit.hexsha in analysis_config:
-        return analysis_config[commit.hexsha]['Image'], analysis_config[commit.hexsha]['Command']
+    analysis_key = ancestry_index.get_nearest(commit_id) or 'Default'
 
-    for commit in commit.iter_parents():
-        if commit.hexsha in analysis_config:
-            return analysis_config[commit.hexsha]['Image'], analysis_config[commit.hexsha]['Command']
-
-    return analysis_config['Default']['Image'], analysis_config['Default']['Command']
+    return analysis_config[analysis_key].get('Image'), analysis_config[analysis_key]['Command'], \
+        analysis_config[analysis_key].get('Extractor'), analysis_config[analysis_key].get('Runner')
 
 
 def parse_number_from_string(str_to_parse: str):
@@ -171,22 +398,8 @@ def val_in_range(val, ranges_str) -> bool:
     :param ranges_str: String value which the val will be tested again.
     :return: Boolean indicating if the value is within the ranges.
     """
-    for range_str in ranges_str.split(','):
-        if '-' in range_str:
-            lower, upper = range_str.split('-')
-
-            if int(lower) <= val <= int(upper):
-                return True
-
-        if '>' in range_str:
-            if val > parse_number_from_string(range_str):
-                return True
 
-        if '<' in range_str:
-            if val < parse_number_from_string(range_str):
-                return True
-
-    return False
+    return RangeFilter(ranges_str).contains(val)
 
 
 def parse_diff_shortstat(diff_output: str):
@@ -216,99 +429,126 @@ def parse_diff_shortstat(diff_output: str):
     return files_changed, additions, deletions
 
 
-def get_analysis_list(repo, config_dict):
+def get_analysis_list(repo, config_dict, sampler=None):
     """
-    Given a Git repository and a configuration, returns a list of Analysis objects representing the commits to be
-    analysed with the image and command to be run.
+    Given a Git repository and a configuration, yields Analysis objects representing the commits to be analysed with
+    the image and command to be run.  Each Analysis is yielded as soon as its commit passes the filters, so analysis can
+    begin while the rest of the history is still being searched.
 
     :param repo: The GitPython Repo object to be analysed.
     :param config_dict: The configuration object which contains the configuration from the config file.
-    :return: List of Analysis objects which contain the commits to be analysed with the container and command to be used
+    :param sampler: AdaptiveSampler which is given every commit passing the filters other than Skip and Min Delta
+    :return: Generator of Analysis objects which contain the commits to be analysed with the container and command to be
+    used
     """
 
-    result = []
+    selected = 0
 
     commit_limit = config_dict.get_additional_filter(AdditionalFilters.LIMIT)
-    commit_skip = config.get_additional_filter(AdditionalFilters.SKIP)
+    commit_skip = config_dict.get_additional_filter(AdditionalFilters.SKIP)
 
-    files_changed_ranges = config_dict.get_changes_type(ChangesCategories.FILES)
-    additions_ranges = config_dict.get_changes_type(ChangesCategories.ADDITIONS)
-    deletions_ranges = config_dict.get_changes_type(ChangesCategories.DELETIONS)
-    file_types_list = config_dict.get_changes_type(ChangesCategories.FILE_TYPES)
+    files_changed_ranges = config_dict.get_changes_ranges(ChangesCategories.FILES)
+    additions_ranges = config_dict.get_changes_ranges(ChangesCategories.ADDITIONS)
+    deletions_ranges = config_dict.get_changes_ranges(ChangesCategories.DELETIONS)
+    file_types_list = config_dict.get_file_types()
+    path_filter = config_dict.get_path_filter()
 
     current_skip = 0
 
     target_rev, rev_list_args = get_rev_list_params(config_dict=config_dict)
 
-    # min_commit_time is the str representation, min_commit_time_delta is the datetime.delta representation.
-    min_commit_time = config_dict.get_additional_filter(AdditionalFilters.MIN_DELTA)
-    min_commit_time_delta = None
+    analysis_dict = config_dict.get_analysis_dict()
 
-    if min_commit_time is not None:
-        min_commit_time_delta = parse_delta(min_commit_time)
+    ancestry_tips = [tip for tip in (config_dict.get_starting_point(), config_dict.get_stopping_point()) if tip]
+    ancestry_index = build_ancestry_index(repo, ancestry_tips, analysis_dict, rev_list_args)
+
+    min_commit_time_delta = config_dict.get_min_delta()
 
     last_commit_time = None
 
-    for commit in repo.iter_commits(target_rev, **rev_list_args):
-        if commit_limit is not None and len(result) >= commit_limit:
-            logging.debug(f'Hit commit limit ({commit_limit})')
-            break
+    cache = None
+    shortstat_filter = ShortstatFilter(files_changed_ranges, additions_ranges, deletions_ranges)
 
-        logging.debug("Testing commit %s...", commit.hexsha)
+    if config_dict.get_cache_file():
+        cache = CommitCache(config_dict.get_cache_file(), config_dict.get_repo_source())
 
-        if None not in (min_commit_time_delta, last_commit_time) and (
-                last_commit_time - min_commit_time_delta) < commit.committed_datetime:
-            logging.debug("Minimum time between commits not met for commit %s, last commit at %s, this commit at %s",
-                          commit.hexsha, last_commit_time.isoformat(), commit.committed_datetime.isoformat())
-            continue
+    try:
+        for commit_stats in iter_commit_stats(repo, target_rev, rev_list_args, cache, shortstat_filter,
+                                              None if path_filter is None else path_filter.get_pathspec()):
+            if commit_limit is not None and selected >= commit_limit:
+                logging.debug(f'Hit commit limit ({commit_limit})')
+                break
 
-        diff = repo.git.diff(f'{commit.hexsha}^@', shortstat=True)
+            commit_id = commit_stats.get_commit_id()
+            commit_time = commit_stats.get_commit_time()
 
-        logging.debug("git-diff gave %s", diff)
+            logging.debug("Testing commit %s...", commit_id)
 
-        files_changed, additions, deletions = parse_diff_shortstat(diff)
+            too_soon = None not in (min_commit_time_delta, last_commit_time) and (
+                    last_commit_time - min_commit_time_delta) < commit_time
 
-        logging.debug("Commit %s changed %i files, with %i additions and %i deletions", commit.hexsha, files_changed,
-                      additions, deletions)
+            if too_soon:
+                logging.debug("Minimum time between commits not met for commit %s, last commit at %s, this commit "
+                              "at %s", commit_id, last_commit_time.isoformat(), commit_time.isoformat())
 
-        if files_changed_ranges and not val_in_range(files_changed, files_changed_ranges):
-            logging.debug('Commit %s changed %i files which is not within %s so is deselected', commit.hexsha,
-                          files_changed, files_changed_ranges)
-            continue
+                # Adaptive sampling may still refine around this commit, so it must pass the remaining filters
+                if sampler is None:
+                    continue
 
-        if additions_ranges and not val_in_range(additions, additions_ranges):
-            logging.debug('Commit %s had %i additions which is not within %s so is deselected', commit.hexsha,
-                          additions, additions_ranges)
-            continue
+            files_changed, additions, deletions = commit_stats.get_shortstat()
 
-        if deletions_ranges and not val_in_range(deletions, deletions_ranges):
-            logging.debug('Commit %s had %i deletions which is not within %s so is deselected', commit.hexsha,
-                          deletions, deletions_ranges)
-            continue
+            logging.debug("Commit %s changed %i files, with %i additions and %i deletions", commit_id, files_changed,
+                          additions, deletions)
+
+            if files_changed_ranges and not files_changed_ranges.contains(files_changed):
+                logging.debug('Commit %s changed %i files which is not within %s so is deselected', commit_id,
+                              files_changed, files_changed_ranges)
+                continue
+
+            if additions_ranges and not additions_ranges.contains(additions):
+                logging.debug('Commit %s had %i additions which is not within %s so is deselected', commit_id,
+                              additions, additions_ranges)
+                continue
 
-        if file_types_list:
-            changed_files = repo.git.diff(f'{commit.hexsha}^@', name_only=True).splitlines(keepends=False)
+            if deletions_ranges and not deletions_ranges.contains(deletions):
+                logging.debug('Commit %s had %i deletions which is not within %s so is deselected', commit_id,
+                              deletions, deletions_ranges)
+                continue
 
-            if not file_type_changed(changed_files, file_types_list):
-                logging.debug('Commit %s did not change any files with types: %s', commit.hexsha,
+            if file_types_list and not file_type_changed(commit_stats.get_changed_files(), file_types_list):
+                logging.debug('Commit %s did not change any files with types: %s', commit_id,
                               ', '.join(file_types_list))
                 continue
 
-        if not commit_skip or current_skip == commit_skip:
-            logging.debug('Commit %s matches all filters and is selected', commit.hexsha)
-            current_skip = 0
-            last_commit_time = commit.committed_datetime
+            if path_filter is not None and not path_filter.matches_any(commit_stats.get_changed_files()):
+                logging.debug('Commit %s did not change any files matching the paths: %s', commit_id, path_filter)
+                continue
 
-            analysis = Analysis(commit.hexsha, commit.committed_datetime,
-                                *get_analysis_details(commit, config_dict.get_analysis_dict()))
+            analysis_image, analysis_command, extractor, runner = get_analysis_details(commit_id, analysis_dict,
+                                                                                       ancestry_index)
+            analysis = Analysis(commit_id, commit_time, analysis_image, analysis_command,
+                                tree_id=commit_stats.get_tree_id(), extractor=extractor, runner=runner)
 
-            result.append(analysis)
-        else:
-            logging.debug('Commit %s would have been selected, but skipping commit %i/%i', commit.hexsha, current_skip,
-                          commit_skip)
-            current_skip += 1
+            if sampler is not None:
+                sampler.add_candidate(analysis)
 
-    return result
+            if too_soon:
+                continue
+
+            if not commit_skip or current_skip == commit_skip:
+                logging.debug('Commit %s matches all filters and is selected', commit_id)
+                current_skip = 0
+                last_commit_time = commit_time
+
+                selected += 1
+                yield analysis
+            else:
+                logging.debug('Commit %s would have been selected, but skipping commit %i/%i', commit_id, current_skip,
+                              commit_skip)
+                current_skip += 1
+    finally:
+        if cache is not None:
+            cache.close()
 
 
 def file_type_changed(changed_files, file_types) -> bool:
@@ -321,10 +561,11 @@ def file_type_changed(changed_files, file_types) -> bool:
     :return: True when at least on file ends in one of the endings.
     """
 
+    file_types = tuple(file_types)
+
     for changed_file in changed_files:
-        for file_type in file_types:
-            if changed_file.endswith(file_type):
-                return True
+        if changed_file.endswith(file_types):
+            return True
 
     return False
 
@@ -345,6 +586,10 @@ def get_rev_list_params(config_dict):
     else:
         target_rev = f"{config_dict.get_starting_point()}"
 
+    if config_dict.get_path_filter() is not None:
+        # Without this, git would follow a single parent of merges which don't change the paths, skipping whole branches
+        rev_list_args.setdefault('full-history', True)
+
     logging.debug(f'Target revision: {target_rev}')
     logging.debug(f'git rev-list args: {rev_list_args}')
 
@@ -365,78 +610,595 @@ def traverse_repo() -> None:
     repo = Repo(config.get_repo_dir())
 
     tasks = []
+    chunk = []
+    chunk_size = config.get_chunk_size() or 1
+    completed = {}
+    results_store = None
+
+    if not args.dry_run and config.get_output_backend() == OutputBackends.SQLITE:
+        results_store = ResultsStore(config.get_results_file())
+
+    if not args.dry_run:
+        window_size = config.get_max_in_flight() or executor.num_workers() * IN_FLIGHT_PER_WORKER
+        progress = ProgressReporter()
+        window = SubmissionWindow(window_size,
+                                  lambda task, chunk: chunk_completed(progress, results_store, task, chunk))
+        logging.debug('Up to %i analyses will be in flight at once', window_size)
+
+    sampler = None
+
+    if config.get_adaptive_option(AdaptiveOptions.METRIC) is not None:
+        sampler = AdaptiveSampler(config.get_adaptive_option(AdaptiveOptions.METRIC),
+                                  config.get_adaptive_option(AdaptiveOptions.THRESHOLD) or 0,
+                                  config.get_adaptive_option(AdaptiveOptions.MAX_ANALYSES))
+        logging.info('Adaptive sampling is enabled, refining where %s changes', sampler.get_metric())
+
+    image_digests = {}
+
+    if not args.dry_run and config.get_image_cache_dir():
+        logging.info("Staging analysis images...")
+        analysis_images = [analysis['Image'] for analysis in config.get_analysis_dict().values()
+                           if get_runner_type(analysis.get('Runner')) == RunnerTypes.SINGULARITY]
+
+        with instrumentation.span('image staging'):
+            image_digests = ImageCache(config.get_image_cache_dir()).stage(analysis_images)
+
+    if args.resume:
+        completed = CompletionManifest(config.get_manifest_dir()).load()
+        logging.info("Resume mode is enabled, %i commits in the completion manifest", len(completed))
+
+        if results_store is not None:
+            completed = drop_unstored(completed, results_store)
+
+    held = None
+
+    if not args.dry_run and config.get_scheduling() == SchedulingPolicies.LONGEST_FIRST:
+        # Chunks can only be ordered once every commit has been selected, so they are held until the search finishes
+        logging.info('Longest first scheduling is enabled, commits will be submitted once the search is complete')
+        held = []
 
     logging.info("Searching repository to find commits to analyse...")
 
-    for analysis in get_analysis_list(repo, config):
-        if not args.dry_run:
-            logging.debug('Submitting commit %s for analysis', str(analysis.get_commit_id()))
-            task = torcpy.submit(run_analysis_singularity, analysis)
-            tasks.append(task)
+    for analysis in instrumentation.iterate('history walk', get_analysis_list(repo, config, sampler)):
+        if is_analysed(analysis, completed, image_digests, sampler, results_store):
+            logging.debug('Commit %s has already been analysed, skipping', str(analysis.get_commit_id()))
+        elif not args.dry_run:
+            logging.debug('Adding commit %s to the next chunk', str(analysis.get_commit_id()))
+            chunk.append(analysis)
+
+            if len(chunk) == chunk_size and held is not None:
+                held.append(chunk)
+                chunk = []
+            elif len(chunk) == chunk_size:
+                logging.debug('Submitting chunk of %i commits for analysis', len(chunk))
+                progress.add_submitted(len(chunk))
+                tasks.append(window.submit(run_analysis_chunk, chunk))
+                chunk = []
         else:
             logging.info('Would have submitted commit %s for analysis', str(analysis.get_commit_id()))
             logging.info('  Image: %s', str(analysis.get_analysis_image()))
             logging.info('  Command: %s', str(analysis.get_analysis_command()))
 
+    if args.dry_run and sampler is not None:
+        logging.info('Adaptive sampling would refine the commits above once their metrics are known')
+
     if not args.dry_run:
+        if chunk and held is not None:
+            held.append(chunk)
+        elif chunk:
+            progress.add_submitted(len(chunk))
+            tasks.append(window.submit(run_analysis_chunk, chunk))
+
+        if held:
+            for chunk in order_chunks(held, load_cost_model(completed, results_store)):
+                progress.add_submitted(len(chunk))
+                tasks.append(window.submit(run_analysis_chunk, chunk))
+
         logging.debug('All commits are submitted for analysis, waiting for them to complete...')
-        torcpy.wait()
 
-        for t in tasks:
-            logging.info(t.result())
+        try:
+            executor.wait()
+
+            if sampler is not None:
+                refine_samples(sampler, window, tasks, chunk_size, completed, image_digests, progress, results_store)
+        finally:
+            if results_store is not None:
+                results_store.close()
+
+            progress.log_progress()
+
+            # The report of the work which did complete is still written when a task failed
+            failed_tasks = 0
+
+            for t in tasks:
+                try:
+                    results = t.result()
+                except Exception:
+                    # The exception was logged by chunk_completed() when the chunk completed
+                    failed_tasks += 1
+                    continue
+
+                for result in results:
+                    instrumentation.merge(result.get_phases())
+
+            if failed_tasks:
+                logging.error('%i chunks of analyses failed, their commits are missing from the run report',
+                              failed_tasks)
+
+            instrumentation.write_report(f'{config.get_output_dir()}{RUN_REPORT_NAME}.json',
+                                         f'{config.get_output_dir()}{RUN_REPORT_NAME}.csv')
+
+    instrumentation.log_summary()
+
+
+def drop_unstored(completed, results_store) -> dict:
+    """
+    Removes commits from the completion manifest when their output isn't in the results store.  Workers record commits
+    in the manifest as soon as they are analysed, but the primary only commits results to the store periodically, so a
+    killed job can leave commits in the manifest whose output was never stored.
+
+    :param completed: Dictionary loaded from the completion manifest
+    :param results_store: The ResultsStore of the run
+    :return: Dictionary of the manifest entries whose output is in the results store
+    """
+
+    stored = results_store.get_commit_ids()
+    result = {commit_id: entry for commit_id, entry in completed.items() if commit_id in stored}
+
+    if len(result) < len(completed):
+        logging.warning('%i commits in the completion manifest have no output in the results store, they will be '
+                        'analysed again', len(completed) - len(result))
+
+    return result
+
+
+def load_cost_model(completed, results_store) -> CostModel:
+    """
+    Builds the cost model used by longest first scheduling from the durations recorded by previous runs, in the
+    completion manifest and the results store.
+
+    :param completed: Dictionary loaded from the completion manifest, empty unless resume mode is enabled
+    :param results_store: The ResultsStore of the run, or None when the output is kept in files
+    :return: A CostModel of every recorded duration
+    """
+
+    cost_model = CostModel()
+
+    if config.get_manifest_dir():
+        cost_model.add_manifest(completed or CompletionManifest(config.get_manifest_dir()).load())
+
+    if results_store is not None:
+        for commit_id, commit_time, duration in results_store.get_durations():
+            cost_model.add(commit_id, commit_time, duration)
+
+    if not cost_model.has_history():
+        logging.info('No durations have been recorded by previous runs, newer commits are expected to take longest')
+
+    return cost_model
+
+
+def is_analysed(analysis: Analysis, completed, image_digests, sampler=None, results_store=None) -> bool:
+    """
+    Tests whether a commit is in the completion manifest and has been analysed with the same image.  When it has, the
+    metrics stored by the previous analysis are given to adaptive sampling, so it refines around the commit in the same
+    way as when the commit is analysed by this run, and doesn't schedule the commit again.
+
+    :param analysis: The Analysis object of the commit
+    :param completed: Dictionary loaded from the completion manifest
+    :param image_digests: Dictionary of analysis images to the digest of their cached SIF file
+    :param sampler: The AdaptiveSampler, when adaptive sampling is enabled
+    :param results_store: The ResultsStore of the run, or None when the output is kept in files
+    :return: True when the commit should not be analysed again
+    """
+
+    entry = completed.get(analysis.get_commit_id())
+
+    if entry is None:
+        return False
+
+    analysis_image = analysis.get_analysis_image()
+
+    # The subprocess runner has no image, so it has no digest to compare
+    if analysis_image is None:
+        image_digest = None
+    elif analysis_image in image_digests:
+        image_digest = image_digests[analysis_image]
+    else:
+        image_digest = get_image_digest(analysis_image)
+
+    if not is_complete(entry, analysis_image, image_digest):
+        return False
+
+    if sampler is not None:
+        sampler.add_metrics(analysis.get_commit_id(), load_stored_metrics(analysis, results_store))
+
+    return True
+
+
+def get_output_name(commit_id, commit_time) -> str:
+    """
+    Gives the name of the output of a commit, from the "Output Format" of the configuration.
+
+    :param commit_id: SHA1 hash of the commit
+    :param commit_time: The datetime of the commit
+    :return: The output format with the commit ID and commit time substituted
+    """
+
+    output_format = config.get_output_format()
+
+    return output_format.replace('%COMMIT_ID%', commit_id).replace('%COMMIT_TIME%', commit_time.isoformat())
+
+
+def load_stored_metrics(analysis: Analysis, results_store=None):
+    """
+    Reads the metrics extracted by a previous analysis of a commit, from the results store or the metrics file written
+    next to its output.
+
+    :param analysis: The Analysis object of the commit
+    :param results_store: The ResultsStore of the run, or None when the output is kept in files
+    :return: Dictionary of metric names to values, or None when no metrics were stored
+    """
+
+    if results_store is not None:
+        return results_store.get_metrics(analysis.get_commit_id())
+
+    if config.get_output_backend() == OutputBackends.SQLITE:
+        return None
+
+    metrics_file = config.get_output_dir() + get_output_name(analysis.get_commit_id(), analysis.get_commit_time()) + \
+        '.metrics.json'
+
+    try:
+        with open(metrics_file, 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        logging.debug('No metrics were stored for %s', analysis.get_commit_id())
+        return None
+
+
+def refine_samples(sampler: AdaptiveSampler, window: SubmissionWindow, tasks, chunk_size, completed, image_digests,
+                   progress: ProgressReporter, results_store=None) -> None:
+    """
+    Runs rounds of adaptive sampling once the coarse sample has been analysed.  Each round gives the metrics of the
+    previous round to the sampler, then submits the commits it schedules and waits for them, until it schedules none.
+
+    :param sampler: The AdaptiveSampler which has been given every candidate commit
+    :param window: The SubmissionWindow used to submit analyses
+    :param tasks: List of the tasks submitted so far, tasks submitted by refinement are appended
+    :param chunk_size: Amount of commits given to a worker at once
+    :param completed: Dictionary loaded from the completion manifest
+    :param image_digests: Dictionary of analysis images to the digest of their cached SIF file
+    :param progress: The ProgressReporter which counts submitted commits
+    :param results_store: The ResultsStore of the run, or None when the output is kept in files
+    :return: None
+    """
+
+    refined = 0
+    rounds = 0
+
+    while True:
+        for task in tasks[refined:]:
+            try:
+                results = task.result()
+            except Exception:
+                # The failure was logged by chunk_completed(), the commits of the chunk just have no value
+                continue
+
+            for result in results:
+                sampler.add_result(result)
+
+        refined = len(tasks)
+        scheduled = sampler.next_round()
+
+        if not scheduled:
+            break
+
+        analyses = [analysis for analysis in scheduled
+                    if not is_analysed(analysis, completed, image_digests, sampler, results_store)]
+
+        if not analyses:
+            # Every scheduled commit was analysed by a previous run, their stored metrics are refined in the next round
+            continue
+
+        rounds += 1
+        logging.info('Adaptive sampling round %i is analysing %i more commits', rounds, len(analyses))
+
+        progress.add_submitted(len(analyses))
+
+        # Neighbouring midpoints are far apart in the history, so each is a chunk unless chunks were requested
+        for start in range(0, len(analyses), chunk_size):
+            tasks.append(window.submit(run_analysis_chunk, analyses[start:start + chunk_size]))
+
+        executor.wait()
+
+    logging.info('Adaptive sampling finished after %i rounds', rounds)
+
+
+def chunk_completed(progress: ProgressReporter, results_store, task, chunk) -> None:
+    """
+    Callback of the submission window, run on the primary as each chunk of analyses completes.  When the chunk raised an
+    exception rather than returning its results, the exception is logged and every commit of the chunk is reported as
+    failed.
+
+    :param progress: The ProgressReporter of the run
+    :param results_store: The ResultsStore to add the output to, or None when the output is kept in files
+    :param task: The completed task, whose result() gives the return value of run_analysis_chunk()
+    :param chunk: List of Analysis objects the task was submitted with
+    :return: None
+    """
+
+    try:
+        results = task.result()
+    except Exception:
+        logging.exception('Analysis of the chunk of %i commits from %s failed', len(chunk), chunk[0].get_commit_id())
+        progress.add_failed([analysis.get_commit_id() for analysis in chunk])
+        return
+
+    results_completed(progress, results_store, results)
+
+
+def results_completed(progress: ProgressReporter, results_store, results) -> None:
+    """
+    Run on the primary as each chunk of analyses completes with its results.  Adds the output of the results to the
+    results store (if any) and reports them to the progress reporter.  Results which can't be stored are
+    reported as failed, as their output has already been deleted from the worker.
+
+    :param progress: The ProgressReporter of the run
+    :param results_store: The ResultsStore to add the output to, or None when the output is kept in files
+    :param results: List of AnalysisResult objects, as returned by run_analysis_chunk()
+    :return: None
+    """
+
+    stored = True
+
+    if results_store is not None:
+        try:
+            store_results(results_store, results)
+        except sqlite3.Error:
+            logging.exception('Unable to store the results of %s in the results store, they will be analysed again '
+                              'when the run is resumed',
+                              ', '.join(result.get_commit_id() for result in results))
+            stored = False
+
+    progress.add_results(results, stored)
+
+
+def store_results(results_store, results) -> None:
+    """
+    Adds the output of completed analyses to the results store, then drops it from the results.
+
+    :param results_store: The ResultsStore to add the output to
+    :param results: List of AnalysisResult objects, as returned by run_analysis_chunk()
+    :return: None
+    """
+
+    results_store.put_many(results)
+
+    for result in results:
+        result.clear_output()
+
+
+def run_analysis_chunk(chunk) -> list:
+    """
+    Analyses a chunk of commits which are next to each other in the history, in order, on a single worker.  Each commit
+    only differs slightly from the one analysed before it, so the checkout, staging directory and page cache of the
+    worker are mostly reused.
+
+    This function will be executed many times by all the nodes allocated to GitSlice.
+
+    :param chunk: List of Analysis objects, in history order
+    :return: List of AnalysisResult objects describing each commit analysed
+    """
 
+    logging.debug('Beginning chunk of %i commits from %s', len(chunk), chunk[0].get_commit_id())
 
-def run_analysis_singularity(analysis: Analysis) -> str:
+    return [run_analysis(analysis) for analysis in chunk]
+
+
+def get_analysis_dedup_key(analysis: Analysis, image_digest):
+    """
+    Gives the key used to find stored output for an analysis in the dedup store.  When the "Dedup Path" option is set,
+    only the files under that path are part of the key.
+
+    :param analysis: The analysis object containing analysis information.
+    :param image_digest: Digest of the image used for analysis, or None when it isn't known
+    :return: Key given by get_dedup_key(), or None when the analysis can't be deduplicated
+    """
+
+    if image_digest is None:
+        logging.debug('Digest of %s is not known, commit %s will not be deduplicated', analysis.get_analysis_image(),
+                      analysis.get_commit_id())
+        return None
+
+    tree_id = analysis.get_tree_id()
+
+    if config.get_dedup_path():
+        subtree_id = get_subtree_id(Repo(config.get_repo_dir()), analysis.get_commit_id(), config.get_dedup_path())
+
+        if subtree_id is not None:
+            tree_id = f'{config.get_dedup_path()}:{subtree_id}'
+        else:
+            logging.debug('%s does not exist in commit %s, the whole tree will be used', config.get_dedup_path(),
+                          analysis.get_commit_id())
+
+    if tree_id is None:
+        return None
+
+    return get_dedup_key(tree_id, image_digest, analysis.get_analysis_command())
+
+
+def run_analysis(analysis: Analysis) -> AnalysisResult:
     """
-    Given an analysis object, starts up a Singularity container and runs the command to perform analysis on a specific
-    commit.
+    Given an analysis object, runs the command to perform analysis on a specific commit using the runner of the
+    analysis, either in a Singularity container or directly on the node.
 
     This function will be executed many times by all the nodes allocated to GitSlice.
 
     :param analysis: The analysis object containing analysis information.
-    :return: A string describing the commit analysed and how long it took (for printing to the screen).
+    :return: An AnalysisResult describing the commit analysed and how long it took.
     """
 
     start_time = time.time()
+    phases = Instrumentation()
 
     commit_id, commit_time, analysis_image, analysis_command = analysis.get_details()
 
     logging.info('Beginning analysis on %s', commit_id)
 
-    commit_dir = config.get_mount_dir() + 'commits-by-hash/' + commit_id
+    runner = create_runner(analysis.get_runner(), config.get_persistent_instances())
+    in_container = isinstance(runner, SingularityRunner)
+    image_file = image_digest = None
+
+    if in_container:
+        with phases.span('image'):
+            if config.get_image_cache_dir():
+                image_file, image_digest = ImageCache(config.get_image_cache_dir()).resolve(analysis_image)
+            else:
+                image_file, image_digest = analysis_image, get_image_digest(analysis_image)
+
+        logging.debug('Using %s for %s', image_file, analysis_image)
+
+    output_format = get_output_name(commit_id, commit_time)
+
+    if config.get_output_backend() == OutputBackends.SQLITE:
+        # The output is returned to the primary to be stored, so it only needs to be written to local storage
+        output_file = config.get_working_dir() + output_format + '.txt'
+        recorded_file = config.get_results_file()
+    else:
+        output_file = recorded_file = config.get_output_dir() + output_format + '.txt'
+
+    metrics_file = config.get_output_dir() + output_format + '.metrics.json'
+
+    dedup_key = None
+
+    # The tools used by the subprocess runner aren't identified by a digest, so its output can't be reused
+    if config.get_dedup_dir() and in_container:
+        with phases.span('dedup'):
+            dedup_key = get_analysis_dedup_key(analysis, image_digest)
+            reused = dedup_key is not None and DedupStore(config.get_dedup_dir()).fetch(dedup_key, output_file)
+
+        if reused:
+            if config.get_manifest_dir():
+                with phases.span('manifest'):
+                    CompletionManifest(config.get_manifest_dir()).record(commit_id, 0, analysis_image, image_digest,
+                                                                         recorded_file, commit_time,
+                                                                         time.time() - start_time)
+
+            logging.info('Commit %s has the same files as a commit which was already analysed, output reused',
+                         commit_id)
+
+            output, metrics = collect_output(analysis, output_file, metrics_file, phases)
+
+            return AnalysisResult(commit_id, commit_time, analysis_image, 0, time.time() - start_time, reused=True,
+                                  output=output, metrics=metrics, phases=phases.get_phases(),
+                                  node=socket.gethostname())
+
+    with phases.span('checkout'):
+        commit_dir = checkout.get_commit_dir(commit_id)
+
     logging.debug('Expecting that %s contains the commit files', commit_dir)
 
-    logging.debug('Loading %s...', analysis_image)
-    Client.load(analysis_image)
+    # Copying the commit to /tmp only applies inside a container, the subprocess runner uses the commit directory
+    uses_staging = staging is not None and in_container
+
+    if uses_staging:
+        with phases.span('diff'):
+            full_command = f"{staging.get_pre_run(commit_id)} ; {analysis_command}"
 
-    if config.get_rsync_to_temp():
+        binds = [f'{config.get_working_dir()}:/tmp']
+    elif config.get_rsync_to_temp() and in_container:
         full_command = f"{RSYNC_PRE_RUN.replace('%%WORKING_DIR%%', f'/tmp/{commit_id}')} ; {analysis_command} ; " \
                        f"{RSYNC_POST_RUN.replace('%%WORKING_DIR%%', f'/tmp/{commit_id}')}"
-        binds = [f'{commit_dir}:/src', f'{config.get_working_dir()}:/tmp']
+        binds = [f'{config.get_working_dir()}:/tmp']
     else:
         full_command = f"{analysis_command}"
-        binds = [f'{commit_dir}:/src']
+        binds = []
+
+    exit_status = 0
+    sink = OutputSink(output_file, config.get_working_dir())
+
+    # The staging rsync runs inside the container before the command, so it is part of this span
+    with phases.span('container' if in_container else 'subprocess') as span:
+        output = runner.execute(image_file, full_command, commit_dir, binds)
+
+        logging.debug('Collecting output for %s', output_file)
+
+        try:
+            for line in output:
+                sink.write(line)
+        except subprocess.CalledProcessError as e:
+            exit_status = e.returncode
+
+        span.add_bytes(sink.get_size())
+
+    with phases.span('output') as span:
+        sink.close()
+        span.add_bytes(os.path.getsize(output_file))
+
+    if uses_staging:
+        staging.completed(commit_id, exit_status)
+
+    if dedup_key is not None and not exit_status:
+        with phases.span('dedup'):
+            DedupStore(config.get_dedup_dir()).store(dedup_key, output_file)
 
-    commands = ['/bin/sh', '-c', full_command]
+    if config.get_manifest_dir():
+        with phases.span('manifest'):
+            CompletionManifest(config.get_manifest_dir()).record(commit_id, exit_status, analysis_image, image_digest,
+                                                                 recorded_file, commit_time, time.time() - start_time)
 
-    logging.debug('Running %s with command %s, %s will be bound to /data on the container', analysis_image,
-                  ' '.join(commands), commit_dir)
-    output = Client.execute(command=commands, bind=binds, stream=True, options=['--writable-tmpfs', '--containall'])
+    if exit_status:
+        logging.warning('Analysis of commit %s failed with exit status %i', commit_id, exit_status)
+    else:
+        logging.info('Commit %s has been analysed', commit_id)
+
+    output, metrics = collect_output(analysis, output_file, metrics_file, phases)
+
+    return AnalysisResult(commit_id, commit_time, analysis_image, exit_status, time.time() - start_time,
+                          output=output, metrics=metrics, phases=phases.get_phases(), node=socket.gethostname())
+
+
+def collect_output(analysis: Analysis, output_file, metrics_file, phases=None) -> (str, dict):
+    """
+    Runs the extractor given for the analysis (if any) over its output.  When the output is kept in the output
+    directory, the metrics are written next to it.  When the output is stored in the results store, the output is read
+    from local storage so it can be returned to the primary along with the metrics, then the file is deleted.
+
+    :param analysis: The analysis object containing analysis information.
+    :param output_file: Location of the output of the analysis
+    :param metrics_file: Location the metrics should be written to when the output is kept in the output directory
+    :param phases: The Instrumentation of the analysis to record extraction in, or None
+    :return: Tuple of the output (None when kept in the output directory) and the metrics (None without an extractor)
+    """
+
+    local_output = config.get_output_backend() == OutputBackends.SQLITE
+    phases = phases or Instrumentation()
+    output = metrics = None
 
-    output_format = config.get_output_format().replace('%COMMIT_ID%', commit_id).replace('%COMMIT_TIME%',
-                                                                                         commit_time.isoformat())
-    output_file = config.get_output_dir() + output_format + '.txt'
+    if local_output or analysis.get_extractor() is not None:
+        with open(output_file, 'r', errors='replace') as file:
+            output = file.read()
 
-    logging.debug('Opening output file %s', output_file)
+    if analysis.get_extractor() is not None:
+        with phases.span('extract') as span:
+            metrics = extract_metrics(analysis.get_extractor(), output)
+            span.add_bytes(len(output))
 
-    with open(output_file, "w+") as file:
-        for line in output:
-            logging.debug('Writing line to output: %s', line.strip())
-            file.write(line)
+        logging.debug('Extracted %i metrics for %s', len(metrics), analysis.get_commit_id())
 
-    logging.info('Commit %s has been analysed', commit_id)
+    if not local_output:
+        if metrics is not None:
+            temp_file = f'{metrics_file}.{os.getpid()}.{threading.get_ident()}.tmp'
 
-    return f"{commit_id} completed analysis in {time.time() - start_time} seconds"
+            with open(temp_file, 'w') as file:
+                json.dump(metrics, file)
+
+            os.replace(temp_file, metrics_file)
+
+        return None, metrics
+
+    os.remove(output_file)
+    return output, metrics
 
 
 def main():
@@ -447,14 +1209,20 @@ def main():
     :return: None
     """
 
-    global config
+    global config, checkout, staging, instrumentation
 
     logging.info(f"{PROJECT_NAME} - {PROJECT_DESCRIPTION}")
     logging.info(f"Starting on {socket.gethostname()}")
     runtime_info()
 
     config = Config(args.config_file)
-    filesystem_manager = FilesystemManager(config, args.dry_run)
+
+    if args.resume and not config.get_manifest_dir():
+        logging.critical('Resume mode requires the Manifest Directory option to be set.  Cannot continue.')
+        sys.exit(1)
+
+    instrumentation = Instrumentation()
+    filesystem_manager = FilesystemManager(config, args.dry_run, instrumentation)
 
     try:
         filesystem_manager.up()
@@ -463,15 +1231,24 @@ def main():
         filesystem_manager.down()
         sys.exit(1)
 
+    checkout = create_checkout(config)
+    staging = None
+
+    if config.get_rsync_to_temp() and config.get_rsync_delta():
+        staging = DeltaStaging(config.get_repo_dir(), config.get_working_dir())
+
     try:
         if args.dry_run:
             traverse_repo()
         else:
-            torcpy.start(traverse_repo)
+            executor.start(traverse_repo)
     except Exception as e:
         logging.error("An error occurred during traversal!")
         logging.exception(e)
 
+    if not args.dry_run:
+        stop_instances()
+
     filesystem_manager.down()
 
 
@@ -481,7 +1258,14 @@ if __name__ == '__main__':
 
     parser.add_argument("-c", "--config-file", help="configuration file location", required=True)
     parser.add_argument("-d", "--dry-run", help="enables dry run mode", action='store_true')
+    parser.add_argument("-r", "--resume", help="only analyse commits which are not in the completion manifest, or "
+                                               "failed previously", action='store_true')
     parser.add_argument("-l", "--log-level", help="logging level, where 0 is the most verbose", type=int, default=20)
+    parser.add_argument("-e", "--executor", help="run analyses with torcpy across the nodes started by mpirun, or in "
+                                                 "a pool of local processes", default=ExecutorTypes.TORCPY.value,
+                        choices=[executor_type.value for executor_type in ExecutorTypes])
+    parser.add_argument("-w", "--workers", help="amount of local processes used by the process executor, defaults to "
+                                                "one for each CPU", type=int)
 
     # Ignore first argument from parsing as this will be the filename
     args = parser.parse_args(sys.argv[1:])
@@ -489,7 +1273,6 @@ if __name__ == '__main__':
     coloredlogs.install(level=args.log_level)
 
     if not args.dry_run:
-        import torcpy
-        from spython.main import Client
+        executor = create_executor(args.executor, args.workers)
 
     main()
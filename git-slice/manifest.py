@@ -0,0 +1,102 @@
+import json
+import logging
+import os
+import time
+
+
+class CompletionManifest:
+    """
+    The completion manifest records every commit which has been analysed, along with the exit status of the analysis
+    and the image used.  It is used by resume mode to only submit commits which haven't already been analysed.
+
+    Each commit has its own entry in the manifest directory, written atomically by the node which analysed it, so the
+    manifest is complete up to the last finished commit even when the job is killed part way through.  The results
+    store is only committed periodically, so when it is used resume mode also checks that the output of each commit was
+    stored.
+    """
+
+    def __init__(self, manifest_dir) -> None:
+        """
+        Initialise the manifest.  The manifest directory must already exist.
+
+        :param manifest_dir: Directory containing one JSON file for each analysed commit.
+        """
+
+        self._manifest_dir = manifest_dir
+
+    def record(self, commit_id, exit_status, analysis_image, image_digest, output_file, commit_time=None,
+               duration=None) -> None:
+        """
+        Records that analysis of a commit has finished.  Any previous entry for the commit is replaced.
+
+        :param commit_id: SHA1 hash of the commit which was analysed
+        :param exit_status: Exit status of the analysis command, 0 indicating success
+        :param analysis_image: The image used for analysis, as given in the "Analysis" stanza
+        :param image_digest: Digest of the image used for analysis, or None when it isn't known
+        :param output_file: Location of the output of the analysis
+        :param commit_time: The datetime of the commit, or None when it isn't known
+        :param duration: Seconds taken to analyse the commit, used to estimate the cost of analysing it again
+        :return: None
+        """
+
+        entry = {
+            'commit_id': commit_id,
+            'exit_status': exit_status,
+            'image': analysis_image,
+            'image_digest': image_digest,
+            'output_file': output_file,
+            'commit_time': None if commit_time is None else commit_time.isoformat(),
+            'duration': duration,
+            'completed_at': time.time()
+        }
+
+        entry_file = os.path.join(self._manifest_dir, f'{commit_id}.json')
+        temp_file = f'{entry_file}.{os.getpid()}.tmp'
+
+        with open(temp_file, 'w') as file:
+            json.dump(entry, file)
+
+        os.replace(temp_file, entry_file)
+        logging.debug('Recorded %s in the completion manifest with exit status %i', commit_id, exit_status)
+
+    def load(self) -> dict:
+        """
+        Reads every entry in the manifest.
+
+        :return: Dictionary of commit IDs to their manifest entry
+        """
+
+        result = {}
+
+        for entry_name in os.listdir(self._manifest_dir):
+            if not entry_name.endswith('.json'):
+                continue
+
+            try:
+                with open(os.path.join(self._manifest_dir, entry_name), 'r') as file:
+                    entry = json.load(file)
+            except (OSError, ValueError):
+                logging.warning('Ignoring unreadable manifest entry %s', entry_name)
+                continue
+
+            result[entry['commit_id']] = entry
+
+        logging.debug('Loaded %i entries from the completion manifest', len(result))
+        return result
+
+
+def is_complete(entry, analysis_image, image_digest) -> bool:
+    """
+    Given a manifest entry and the image which would be used to analyse the commit, returns true when the commit doesn't
+    need to be analysed again.
+
+    :param entry: A manifest entry, as given by CompletionManifest.load(), or None
+    :param analysis_image: The image which would be used for the analysis
+    :param image_digest: Digest of the image which would be used, or None when it isn't known
+    :return: True when the previous analysis succeeded with the same image
+    """
+
+    if entry is None or entry['exit_status'] != 0 or entry['image'] != analysis_image:
+        return False
+
+    return None in (entry['image_digest'], image_digest) or entry['image_digest'] == image_digest
@@ -0,0 +1,94 @@
+import logging
+import os
+import shutil
+import threading
+
+from constants import OUTPUT_BUFFER_SIZE
+
+
+class OutputSink:
+    """
+    Collects the output of an analysis and moves it into the output directory once the analysis has finished.
+
+    Output is held in memory until OUTPUT_BUFFER_SIZE characters have been written, after which it is written to a
+    scratch file (on node-local storage) in large blocks.  When the sink is closed, the output is written next to the
+    output file in a single copy and renamed into place, so the output directory never contains a partial file and
+    the shared filesystem only sees large writes.
+    """
+
+    def __init__(self, output_file, scratch_dir) -> None:
+        """
+        Initialise the output sink.  Nothing is written until the buffer is full or the sink is closed.
+
+        :param output_file: Location the output should be moved to once it is complete
+        :param scratch_dir: Directory on node-local storage used when the output doesn't fit in memory
+        """
+
+        self._output_file = output_file
+        self._scratch_file = os.path.join(scratch_dir, f'{os.path.basename(output_file)}.{threading.get_ident()}.out')
+        self._scratch = None
+        self._buffer = []
+        self._buffered = 0
+        self._size = 0
+
+    def get_size(self) -> int:
+        """
+        Provides the amount of output written so far.
+
+        :return: Amount of characters written to the sink
+        """
+
+        return self._size
+
+    def write(self, text) -> None:
+        """
+        Adds text to the output.
+
+        :param text: String to be written, usually a line of output from the container
+        :return: None
+        """
+
+        self._buffer.append(text)
+        self._buffered += len(text)
+        self._size += len(text)
+
+        if self._buffered >= OUTPUT_BUFFER_SIZE:
+            self._flush()
+
+    def _flush(self) -> None:
+        """
+        Writes the buffered output to the scratch file, opening it on the first flush.
+
+        :return: None
+        """
+
+        if self._scratch is None:
+            logging.debug('Output of %s is larger than the buffer, spilling to %s', self._output_file,
+                          self._scratch_file)
+            self._scratch = open(self._scratch_file, 'w')
+
+        self._scratch.write(''.join(self._buffer))
+        self._buffer = []
+        self._buffered = 0
+
+    def close(self) -> None:
+        """
+        Moves the complete output into place as the output file, replacing any previous output.
+
+        :return: None
+        """
+
+        temp_file = f'{self._output_file}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+        if self._scratch is None:
+            with open(temp_file, 'w') as file:
+                file.write(''.join(self._buffer))
+        else:
+            self._flush()
+            self._scratch.close()
+
+            shutil.copyfile(self._scratch_file, temp_file)
+            os.remove(self._scratch_file)
+
+        os.replace(temp_file, self._output_file)
+        logging.debug('Moved output into %s', self._output_file)
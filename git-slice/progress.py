@@ -0,0 +1,184 @@
+import datetime
+import heapq
+import logging
+import threading
+import time
+
+from constants import PROGRESS_INTERVAL, PROGRESS_SLOWEST_COUNT
+
+
+class ProgressReporter:
+    """
+    Tracks the analyses completed by the workers as their results arrive at the primary, rather than once the whole run
+    has finished.  Each result is logged as it arrives, and a progress line (commits completed, throughput, estimated
+    time remaining, throughput of each node and the slowest commits) is logged at most every PROGRESS_INTERVAL seconds.
+
+    Commits are submitted while the history is still being walked, so the total only includes commits submitted so far
+    and the estimate is only complete once every commit has been submitted.
+    """
+
+    def __init__(self, interval=PROGRESS_INTERVAL, slowest_count=PROGRESS_SLOWEST_COUNT) -> None:
+        """
+        :param interval: Minimum seconds between progress lines
+        :param slowest_count: Amount of the slowest commits to keep
+        """
+
+        self._interval = interval
+        self._slowest_count = slowest_count
+        self._lock = threading.Lock()
+
+        self._start_time = time.monotonic()
+        self._last_report = self._start_time
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._reused = 0
+        self._nodes = {}
+        self._slowest = []
+
+    def add_submitted(self, count) -> None:
+        """
+        Counts commits which have been submitted for analysis.
+
+        :param count: Amount of commits submitted
+        :return: None
+        """
+
+        with self._lock:
+            self._submitted += count
+
+    def add_results(self, results, stored=True) -> None:
+        """
+        Logs and counts the results of completed analyses, then logs a progress line if one is due.  This is given as
+        the callback of the submission window, so it runs on the primary as each task completes.
+
+        :param results: List of AnalysisResult objects, as returned by run_analysis_chunk()
+        :param stored: False when the results couldn't be stored, so every commit is counted as failed
+        :return: None
+        """
+
+        for result in results:
+            logging.info(result)
+
+        with self._lock:
+            for result in results:
+                self._completed += 1
+                self._failed += not stored or result.get_exit_status() != 0
+                self._reused += result.is_reused()
+                self._nodes[result.get_node()] = self._nodes.get(result.get_node(), 0) + 1
+
+                entry = (result.get_duration(), result.get_commit_id())
+
+                if len(self._slowest) < self._slowest_count:
+                    heapq.heappush(self._slowest, entry)
+                elif self._slowest and entry > self._slowest[0]:
+                    heapq.heapreplace(self._slowest, entry)
+
+            due = time.monotonic() - self._last_report >= self._interval
+
+            if due:
+                self._last_report = time.monotonic()
+
+        if due:
+            self.log_progress()
+
+    def add_failed(self, commit_ids) -> None:
+        """
+        Counts commits whose analysis failed without giving a result, e.g. a chunk which raised an exception on the
+        worker, then logs a progress line if one is due.
+
+        :param commit_ids: List of the SHA1 hashes of the commits
+        :return: None
+        """
+
+        with self._lock:
+            self._completed += len(commit_ids)
+            self._failed += len(commit_ids)
+
+            due = time.monotonic() - self._last_report >= self._interval
+
+            if due:
+                self._last_report = time.monotonic()
+
+        if due:
+            self.log_progress()
+
+    def get_completed(self) -> int:
+        """
+        :return: Amount of commits which have completed analysis
+        """
+
+        return self._completed
+
+    def get_submitted(self) -> int:
+        """
+        :return: Amount of commits which have been submitted for analysis
+        """
+
+        return self._submitted
+
+    def get_rate(self) -> float:
+        """
+        :return: Commits completed per minute since the reporter was created
+        """
+
+        elapsed = time.monotonic() - self._start_time
+
+        return self._completed * 60 / elapsed if elapsed > 0 else 0.0
+
+    def get_eta(self):
+        """
+        Estimates the time remaining for the commits submitted so far, from the rate commits have completed at.
+
+        :return: Estimated timedelta remaining, or None before any commit has completed
+        """
+
+        rate = self.get_rate()
+
+        if not rate:
+            return None
+
+        return datetime.timedelta(seconds=round(max(self._submitted - self._completed, 0) * 60 / rate))
+
+    def get_node_rates(self) -> dict:
+        """
+        :return: Dictionary of node hostnames to the commits they have completed per minute
+        """
+
+        elapsed = time.monotonic() - self._start_time
+
+        with self._lock:
+            return {node: count * 60 / elapsed for node, count in self._nodes.items()} if elapsed > 0 else {}
+
+    def get_slowest(self) -> list:
+        """
+        :return: List of (duration, commit ID) tuples of the slowest commits, slowest first
+        """
+
+        with self._lock:
+            return sorted(self._slowest, reverse=True)
+
+    def log_progress(self) -> None:
+        """
+        Logs the progress of the run so far.
+
+        :return: None
+        """
+
+        eta = self.get_eta()
+
+        logging.info('Progress: %i/%i commits analysed (%i failed, %i reused), %.1f commits/min, ETA %s',
+                     self._completed, self._submitted, self._failed, self._reused, self.get_rate(),
+                     'unknown' if eta is None else eta)
+
+        node_rates = self.get_node_rates()
+
+        if node_rates:
+            nodes = sorted(node_rates.items(), key=lambda item: -item[1])
+            logging.info('  Per node: %s', ', '.join(f'{node} {rate:.1f}/min' for node, rate in nodes))
+
+        slowest = self.get_slowest()
+
+        if slowest:
+            logging.info('  Slowest: %s', ', '.join(f'{commit_id[:10]} ({duration:.1f}s)'
+                                                    for duration, commit_id in slowest))
@@ -0,0 +1,125 @@
+import json
+import logging
+import sqlite3
+import threading
+import zlib
+
+from constants import RESULTS_COMMIT_INTERVAL, RESULTS_NO_IMAGE
+
+
+class ResultsStore:
+    """
+    The results store holds the output of every analysed commit in a single SQLite database, rather than one text file
+    per commit in the output directory.  Each output is compressed and the table is keyed by commit ID, so the output
+    of any commit can be read without scanning the others.
+
+    Results are only written by the "primary" node as analyses complete, so the database only ever has one writer.
+    """
+
+    def __init__(self, results_file) -> None:
+        """
+        Opens (or creates) the results database.
+
+        :param results_file: Location of the SQLite database
+        """
+
+        logging.debug('Opening results store at %s', results_file)
+
+        # Results are added by the callbacks of completed analyses, which run on the torcpy server and worker threads
+        self._connection = sqlite3.connect(results_file, timeout=60, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._pending = 0
+
+        self._connection.execute('CREATE TABLE IF NOT EXISTS results (commit_id TEXT NOT NULL PRIMARY KEY, '
+                                 'commit_time TEXT NOT NULL, image TEXT NOT NULL, exit_status INTEGER NOT NULL, '
+                                 'duration REAL NOT NULL, output BLOB NOT NULL, metrics TEXT) WITHOUT ROWID')
+        self._connection.commit()
+
+    def put_many(self, results) -> None:
+        """
+        Stores the output of a batch of analyses, replacing any previous output for the same commits.  Changes are
+        committed every RESULTS_COMMIT_INTERVAL results and when the store is closed.  Analyses run by the subprocess
+        runner have no image, so RESULTS_NO_IMAGE is stored in its place.
+
+        :param results: An iterable of AnalysisResult objects
+        :return: None
+        """
+
+        rows = [(result.get_commit_id(), result.get_commit_time().isoformat(),
+                 result.get_analysis_image() or RESULTS_NO_IMAGE, result.get_exit_status(), result.get_duration(),
+                 zlib.compress(result.get_output().encode('utf-8')),
+                 None if result.get_metrics() is None else json.dumps(result.get_metrics()))
+                for result in results]
+
+        with self._lock:
+            self._connection.executemany('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+            self._pending += len(rows)
+
+            if self._pending >= RESULTS_COMMIT_INTERVAL:
+                self._connection.commit()
+                self._pending = 0
+
+    def get_output(self, commit_id):
+        """
+        Reads the output of a single commit.
+
+        :param commit_id: SHA1 hash of the commit
+        :return: The output of the analysis, or None when the commit isn't in the store
+        """
+
+        with self._lock:
+            row = self._connection.execute('SELECT output FROM results WHERE commit_id = ?', (commit_id,)).fetchone()
+
+        if row is None:
+            return None
+
+        return zlib.decompress(row[0]).decode('utf-8')
+
+    def get_metrics(self, commit_id):
+        """
+        Reads the metrics extracted from the output of a single commit.
+
+        :param commit_id: SHA1 hash of the commit
+        :return: Dictionary of metric names to values, or None when the commit isn't in the store or has no metrics
+        """
+
+        with self._lock:
+            row = self._connection.execute('SELECT metrics FROM results WHERE commit_id = ?', (commit_id,)).fetchone()
+
+        if row is None or row[0] is None:
+            return None
+
+        return json.loads(row[0])
+
+    def get_commit_ids(self) -> set:
+        """
+        Reads which commits have output in the store.  Only committed results are included, so a commit which was
+        added but not committed before the job was killed isn't.
+
+        :return: Set of the SHA1 hashes of every commit in the store
+        """
+
+        with self._lock:
+            return {row[0] for row in self._connection.execute('SELECT commit_id FROM results')}
+
+    def get_durations(self) -> list:
+        """
+        Reads how long each successful analysis in the store took.
+
+        :return: List of (commit ID, commit time as an ISO 8601 string, duration in seconds) tuples
+        """
+
+        with self._lock:
+            return self._connection.execute('SELECT commit_id, commit_time, duration FROM results '
+                                            'WHERE exit_status = 0').fetchall()
+
+    def close(self) -> None:
+        """
+        Commits any outstanding results and closes the connection to the results database.
+
+        :return: None
+        """
+
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
@@ -0,0 +1,232 @@
+import logging
+import os
+import signal
+import subprocess
+import threading
+from enum import Enum
+
+from constants import INSTANCE_COMMITS_DIR, SINGULARITY_OPTIONS
+from instances import get_instance
+
+
+class RunnerTypes(Enum):
+    """
+    Acceptable values for the "Runner" key (or its "Type" key) of an entry in the "Analysis" stanza.
+    """
+
+    SINGULARITY = "singularity"
+    SUBPROCESS = "subprocess"
+
+
+class InvalidRunnerException(RuntimeError):
+    """
+    Thrown when a runner in the "Analysis" stanza has an unknown type or an invalid limit.
+    """
+
+    pass
+
+
+def get_link_command(target, link) -> str:
+    """
+    Gives a shell command which points a symbolic link at a target, replacing the link if it already exists.  When the
+    path of the link is a real file or directory, "ln -sfn" would create the link inside it rather than replacing it, so
+    the command fails instead.
+
+    :param target: Path the link should point to
+    :param link: Path of the link
+    :return: Shell command which exits with a status of 1 when the link can't be created
+    """
+
+    return f"if [ -e {link} ] && [ ! -L {link} ] ; then echo '{link} exists and is not a link' >&2 ; exit 1 ; fi ; " \
+           f"ln -sfn {target} {link} || exit 1"
+
+
+class SingularityRunner:
+    """
+    Runs the analysis command in a Singularity container of the analysis image, with the commit bound to /src.
+    """
+
+    def __init__(self, persistent_instances=False) -> None:
+        """
+        :param persistent_instances: When enabled, commands are run in a long running instance of the image
+        """
+
+        self._persistent_instances = persistent_instances
+
+    def execute(self, image_file, command, commit_dir, binds):
+        """
+        Starts the analysis command.
+
+        :param image_file: The image (or cached SIF file) to run
+        :param command: Shell command to run inside the container
+        :param commit_dir: Directory containing the files of the commit
+        :param binds: List of additional bind paths
+        :return: Generator of the lines of output, raising CalledProcessError when the command fails
+        """
+
+        from spython.main import Client
+
+        binds = list(binds)
+
+        if self._persistent_instances:
+            # The instance can't bind each commit to /src, so the directory containing the commit is bound instead and
+            # /src is linked to this commit inside the instance.  The analysis fails when the image has its own /src.
+            binds.append(f'{os.path.dirname(commit_dir)}:{INSTANCE_COMMITS_DIR}')
+            command = f"{get_link_command(f'{INSTANCE_COMMITS_DIR}/{os.path.basename(commit_dir)}', '/src')} ; " \
+                      f"{command}"
+            container = get_instance(image_file, binds)
+            binds = options = None
+        else:
+            binds.append(f'{commit_dir}:/src')
+            container = image_file
+            options = SINGULARITY_OPTIONS
+
+        commands = ['/bin/sh', '-c', command]
+
+        logging.debug('Running %s with command %s, %s will be bound to /src on the container', container,
+                      ' '.join(commands), commit_dir)
+
+        return Client.execute(container, commands, bind=binds, stream=True, options=options)
+
+
+class SubprocessRunner:
+    """
+    Runs the analysis command directly on the node, in the directory containing the commit, for tools which are already
+    installed and don't need a container.  The command is run by /bin/sh with "ulimit" applied first, so the limits
+    only apply to the analysis and not the worker.
+
+    The commit directory is the same directory a container would see as /src, so commands which write into it need the
+    worktree checkout backend (RepoFS mounts are read only).
+    """
+
+    def __init__(self, timeout=None, cpu_time=None, memory=None, open_files=None) -> None:
+        """
+        :param timeout: Seconds the command may run for before it is killed, or None for no limit
+        :param cpu_time: Seconds of CPU time each process may use, or None for no limit
+        :param memory: MiB of virtual memory each process may use, or None for no limit
+        :param open_files: Amount of files each process may have open, or None for no limit
+        """
+
+        for limit in (timeout, cpu_time, memory, open_files):
+            if limit is not None and (not isinstance(limit, (int, float)) or isinstance(limit, bool) or limit <= 0):
+                raise InvalidRunnerException(f'Runner limits must be positive numbers, not {limit}')
+
+        self._timeout = timeout
+        limits = (('-t', cpu_time), ('-v', memory and memory * 1024), ('-n', open_files))
+        self._limits = [(flag, int(value)) for flag, value in limits if value is not None]
+
+    def get_command(self, command) -> str:
+        """
+        Gives the command with the resource limits applied.
+
+        :param command: Shell command to run
+        :return: Shell command which sets the limits before running the command
+        """
+
+        if not self._limits:
+            return command
+
+        return f"{' ; '.join(f'ulimit {flag} {value}' for flag, value in self._limits)} ; {command}"
+
+    def execute(self, image_file, command, commit_dir, binds):
+        """
+        Starts the analysis command.  The image and binds are ignored, they are accepted so either runner can be used
+        in the same way.
+
+        :param image_file: Ignored
+        :param command: Shell command to run
+        :param commit_dir: Directory containing the files of the commit, the command is run in this directory
+        :param binds: Ignored
+        :return: Generator of the lines of output, raising CalledProcessError when the command fails
+        """
+
+        commands = ['/bin/sh', '-c', self.get_command(command)]
+
+        logging.debug('Running %s in %s', ' '.join(commands), commit_dir)
+
+        return self._stream(commands, commit_dir)
+
+    def _stream(self, commands, commit_dir):
+        """
+        Runs a command and gives its output as it is written, the same way as spython's Client.execute() when
+        streaming.  When the timeout is reached, the command and any processes it started are killed.
+
+        :param commands: The command and its arguments
+        :param commit_dir: Working directory of the command
+        :return: Generator of the lines of output, raising CalledProcessError when the command fails
+        """
+
+        process = subprocess.Popen(commands, cwd=commit_dir, stdout=subprocess.PIPE, universal_newlines=True,
+                                   errors='replace', start_new_session=True)
+        timer = None
+
+        if self._timeout is not None:
+            timer = threading.Timer(self._timeout, self._kill, (process, commit_dir))
+            timer.start()
+
+        try:
+            for line in process.stdout:
+                yield line
+        finally:
+            process.stdout.close()
+            process.wait()
+
+            if timer is not None:
+                timer.cancel()
+
+        if process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, commands)
+
+    def _kill(self, process, commit_dir) -> None:
+        """
+        Kills a command which reached the timeout, along with every process in its session.
+
+        :param process: The Popen object of the command
+        :param commit_dir: Working directory of the command, for logging
+        :return: None
+        """
+
+        logging.warning('Command in %s reached the timeout of %s seconds, killing it', commit_dir, self._timeout)
+
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+def get_runner_type(runner_config) -> RunnerTypes:
+    """
+    Gives the type of a runner from the "Runner" key of an entry in the "Analysis" stanza.
+
+    :param runner_config: A runner type, a dictionary with a "Type" key, or None for the default of Singularity
+    :return: A RunnerTypes value
+    """
+
+    if runner_config is None:
+        return RunnerTypes.SINGULARITY
+
+    try:
+        if isinstance(runner_config, dict):
+            return RunnerTypes(str(runner_config['Type']).lower())
+
+        return RunnerTypes(str(runner_config).lower())
+    except (KeyError, ValueError) as e:
+        raise InvalidRunnerException from e
+
+
+def create_runner(runner_config, persistent_instances=False):
+    """
+    Creates a runner from the "Runner" key of an entry in the "Analysis" stanza.
+
+    :param runner_config: A runner type, a dictionary with a "Type" key and optional limits, or None for Singularity
+    :param persistent_instances: Whether the Singularity runner should use persistent instances
+    :return: A runner, which has an execute() method
+    """
+
+    if get_runner_type(runner_config) == RunnerTypes.SINGULARITY:
+        return SingularityRunner(persistent_instances)
+
+    runner_config = runner_config if isinstance(runner_config, dict) else {}
+
+    return SubprocessRunner(runner_config.get('Timeout'), runner_config.get('CPU Time'), runner_config.get('Memory'),
+                            runner_config.get('Open Files'))
@@ -0,0 +1,168 @@
+import logging
+import numbers
+
+
+class InvalidThresholdException(RuntimeError):
+    """
+    Thrown when the "Threshold" of adaptive sampling is neither a number nor a percentage (e.g. "5%").
+    """
+
+    pass
+
+
+def parse_threshold(threshold) -> (float, bool):
+    """
+    Parses the threshold of adaptive sampling, which is either an absolute difference (e.g. 100) or a difference
+    relative to the larger of the two values (e.g. "5%").
+
+    :param threshold: The "Threshold" option
+    :return: Tuple of the threshold and whether it is relative, relative thresholds are given as a fraction
+    """
+
+    try:
+        if isinstance(threshold, str) and threshold.strip().endswith('%'):
+            return float(threshold.strip()[:-1]) / 100, True
+
+        return float(threshold), False
+    except (TypeError, ValueError) as e:
+        raise InvalidThresholdException from e
+
+
+class AdaptiveSampler:
+    """
+    Refines a coarse sample of the history by bisection.  Every commit which could have been selected (ignoring Skip and
+    Min Delta) is a candidate, in the order they were found.  After each round of analyses, the commit halfway between
+    each pair of neighbouring analysed commits whose metric differs by more than the threshold is scheduled, until the
+    neighbours are adjacent candidates.  This gives a high resolution around changes in the metric without analysing
+    every commit.
+
+    Neighbours are only compared when both analyses succeeded and gave a numeric value for the metric.
+    """
+
+    def __init__(self, metric, threshold, max_analyses=None) -> None:
+        """
+        :param metric: Name of the extracted metric to compare
+        :param threshold: Absolute difference, or percentage string, which neighbours must differ by to be refined
+        :param max_analyses: Maximum amount of analyses scheduled by refinement, or None for no limit
+        """
+
+        self._metric = metric
+        self._threshold, self._relative = parse_threshold(threshold)
+        self._max_analyses = max_analyses
+
+        self._candidates = []
+        self._positions = {}
+        self._sampled = set()
+        self._values = {}
+        self._scheduled = 0
+
+    def get_metric(self) -> str:
+        """
+        Provides the name of the metric which is compared.
+
+        :return: Name of the extracted metric
+        """
+
+        return self._metric
+
+    def add_candidate(self, analysis) -> None:
+        """
+        Adds a commit which could be analysed, candidates must be added in history order.
+
+        :param analysis: The Analysis object of the commit
+        :return: None
+        """
+
+        self._positions[analysis.get_commit_id()] = len(self._candidates)
+        self._candidates.append(analysis)
+
+    def add_sampled(self, commit_id) -> None:
+        """
+        Marks a candidate as already sampled, so it is never scheduled by refinement.
+
+        :param commit_id: SHA1 hash of the commit
+        :return: None
+        """
+
+        if commit_id in self._positions:
+            self._sampled.add(self._positions[commit_id])
+
+    def add_result(self, result) -> None:
+        """
+        Records the metric from a completed analysis.
+
+        :param result: AnalysisResult of a candidate
+        :return: None
+        """
+
+        self.add_sampled(result.get_commit_id())
+
+        if result.get_exit_status() == 0:
+            self.add_metrics(result.get_commit_id(), result.get_metrics())
+
+    def add_metrics(self, commit_id, metrics) -> None:
+        """
+        Records the metric of a candidate which was analysed successfully, either by this run or by a previous run
+        which is being resumed.
+
+        :param commit_id: SHA1 hash of the commit
+        :param metrics: Dictionary of metric names to values extracted from its output, or None
+        :return: None
+        """
+
+        self.add_sampled(commit_id)
+
+        if commit_id not in self._positions or not metrics:
+            return
+
+        value = metrics.get(self._metric)
+
+        if isinstance(value, numbers.Number) and not isinstance(value, bool):
+            self._values[self._positions[commit_id]] = value
+        else:
+            logging.debug('Commit %s has no numeric value for %s, it will not be refined around', commit_id,
+                          self._metric)
+
+    def is_significant(self, first, second) -> bool:
+        """
+        Tests whether two values of the metric differ by more than the threshold.
+
+        :param first: The value of one neighbour
+        :param second: The value of the other neighbour
+        :return: True when the commits between the neighbours should be sampled
+        """
+
+        difference = abs(first - second)
+
+        if self._relative:
+            return difference > self._threshold * max(abs(first), abs(second))
+
+        return difference > self._threshold
+
+    def next_round(self) -> list:
+        """
+        Schedules the midpoint of every interval between neighbouring sampled commits which changed significantly.  The
+        midpoints are marked as sampled immediately, so each commit is only scheduled once.
+
+        :return: List of Analysis objects to analyse next, empty when refinement is complete
+        """
+
+        scheduled = []
+        sampled = sorted(self._sampled)
+
+        for first, second in zip(sampled, sampled[1:]):
+            if self._max_analyses is not None and self._scheduled >= self._max_analyses:
+                logging.info('Adaptive sampling reached its limit of %i analyses', self._max_analyses)
+                break
+
+            if second - first < 2 or first not in self._values or second not in self._values:
+                continue
+
+            if self.is_significant(self._values[first], self._values[second]):
+                midpoint = (first + second) // 2
+                scheduled.append(self._candidates[midpoint])
+                self._scheduled += 1
+
+        self._sampled.update(self._positions[analysis.get_commit_id()] for analysis in scheduled)
+
+        return scheduled
@@ -0,0 +1,116 @@
+import logging
+from bisect import bisect_left
+from datetime import datetime
+
+
+class CostModel:
+    """
+    Estimates how long analysing a commit will take from the durations recorded by previous runs, so the longest chunks
+    can be submitted first and the run doesn't end with a few long analyses holding up an otherwise idle allocation.
+
+    A commit which was analysed before is expected to take as long as it did then.  Otherwise the duration is
+    interpolated from the analysed commits either side of it in time, since analyses take longer as the repository
+    grows.  When nothing has been recorded, the commit time itself is used as the cost, so newer (larger) commits are
+    still submitted first.
+    """
+
+    def __init__(self) -> None:
+        self._durations = {}
+        self._points = []
+        self._times = None
+        self._time_durations = None
+
+    def add(self, commit_id, commit_time, duration) -> None:
+        """
+        Adds the recorded duration of an analysis.  Entries without a duration are ignored.
+
+        :param commit_id: SHA1 hash of the commit
+        :param commit_time: The datetime of the commit, an ISO 8601 string, or None when it isn't known
+        :param duration: Seconds taken to analyse the commit, or None
+        :return: None
+        """
+
+        if duration is None:
+            return
+
+        self._durations[commit_id] = duration
+
+        if commit_time is None:
+            return
+
+        if isinstance(commit_time, str):
+            commit_time = datetime.fromisoformat(commit_time)
+
+        self._points.append((commit_time.timestamp(), duration))
+        self._times = None
+
+    def add_manifest(self, entries) -> None:
+        """
+        Adds the durations recorded in the completion manifest.
+
+        :param entries: Dictionary of commit IDs to their manifest entry, as given by CompletionManifest.load()
+        :return: None
+        """
+
+        for commit_id, entry in entries.items():
+            if entry.get('exit_status') == 0:
+                self.add(commit_id, entry.get('commit_time'), entry.get('duration'))
+
+    def has_history(self) -> bool:
+        """
+        :return: True when at least one duration has been recorded
+        """
+
+        return bool(self._durations)
+
+    def estimate(self, analysis) -> float:
+        """
+        Estimates the cost of analysing a commit.
+
+        :param analysis: The Analysis object of the commit
+        :return: The expected duration in seconds, or the commit timestamp when no durations have been recorded
+        """
+
+        if analysis.get_commit_id() in self._durations:
+            return self._durations[analysis.get_commit_id()]
+
+        timestamp = analysis.get_commit_time().timestamp()
+
+        if not self._points:
+            return sum(self._durations.values()) / len(self._durations) if self._durations else timestamp
+
+        if self._times is None:
+            self._points.sort()
+            self._times = [point[0] for point in self._points]
+            self._time_durations = [point[1] for point in self._points]
+
+        index = bisect_left(self._times, timestamp)
+
+        if index == 0:
+            return self._time_durations[0]
+        elif index == len(self._times):
+            return self._time_durations[-1]
+
+        before, after = self._times[index - 1], self._times[index]
+        first, second = self._time_durations[index - 1], self._time_durations[index]
+        weight = (timestamp - before) / (after - before) if after > before else 0.5
+
+        return first + weight * (second - first)
+
+
+def order_chunks(chunks, cost_model: CostModel) -> list:
+    """
+    Orders chunks of commits longest expected first, the commits within each chunk keep their history order.
+
+    :param chunks: List of chunks, each a list of Analysis objects
+    :param cost_model: The CostModel used to estimate each commit
+    :return: List of the chunks, most expensive first
+    """
+
+    costs = [sum(cost_model.estimate(analysis) for analysis in chunk) for chunk in chunks]
+    order = sorted(range(len(chunks)), key=lambda index: -costs[index])
+
+    if order:
+        logging.debug('Expected cost of the chunks ranges from %.1f to %.1f', costs[order[-1]], costs[order[0]])
+
+    return [chunks[index] for index in order]
@@ -0,0 +1,78 @@
+import logging
+import os
+import socket
+import threading
+
+from git import Repo
+
+from constants import RSYNC_DELTA_PRE_RUN, RSYNC_POST_RUN, RSYNC_PRE_RUN
+
+
+class DeltaStaging:
+    """
+    Keeps a staging directory for each worker thread in the temporary directory which is reused for every commit the
+    worker is given.  Once a commit has been staged, the next commit only needs the files which differ between the two
+    commits to be copied (or deleted), as given by "git diff".
+
+    Files created or modified by the analysis are not removed between commits, so the analysis command must cope with
+    leftovers from the previous commit (i.e. an incremental build).
+    """
+
+    def __init__(self, repo_dir, working_dir) -> None:
+        """
+        Initialise delta staging.
+
+        :param repo_dir: Location of the repository cloned by the filesystem manager
+        :param working_dir: The working directory, which is bound to /tmp inside the container
+        """
+
+        self._repo_dir = repo_dir
+        self._working_dir = working_dir
+        self._local = threading.local()
+
+    def get_pre_run(self, commit_id) -> str:
+        """
+        Gives the commands to be run inside the container to stage a commit in the staging directory of the calling
+        thread.  When the previous commit staged by this thread is known, only the changed files are copied.
+
+        :param commit_id: SHA1 hash of the commit to be staged
+        :return: The commands to be run, which leave the commit in the staging directory as the current directory
+        """
+
+        staging_name = f'staging-{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}'
+        staging_dir = f'/tmp/{staging_name}'
+        previous_commit = getattr(self._local, 'commit_id', None)
+
+        if previous_commit is None:
+            logging.debug('Staging all files of %s in %s', commit_id, staging_dir)
+
+            return f"{RSYNC_POST_RUN.replace('%%WORKING_DIR%%', staging_dir)} ; " \
+                   f"{RSYNC_PRE_RUN.replace('%%WORKING_DIR%%', staging_dir)}"
+
+        if not hasattr(self._local, 'repo'):
+            self._local.repo = Repo(self._repo_dir)
+
+        changes = self._local.repo.git.diff(previous_commit, commit_id, name_only=True, no_renames=True, z=True)
+        changes_file = f'{staging_name}.changes'
+
+        with open(os.path.join(self._working_dir, changes_file), 'w') as file:
+            file.write(changes)
+
+        logging.debug('Staging %i files changed between %s and %s in %s', changes.count('\0'), previous_commit,
+                      commit_id, staging_dir)
+
+        pre_run = RSYNC_DELTA_PRE_RUN.replace('%%WORKING_DIR%%', staging_dir)
+
+        return pre_run.replace('%%FILES_FROM%%', f'/tmp/{changes_file}')
+
+    def completed(self, commit_id, exit_status) -> None:
+        """
+        Records that a commit has been staged and analysed by the calling thread.  When the analysis failed, the
+        contents of the staging directory are unknown so the next commit will be staged from scratch.
+
+        :param commit_id: SHA1 hash of the commit which was analysed
+        :param exit_status: Exit status of the analysis command, 0 indicating success
+        :return: None
+        """
+
+        self._local.commit_id = None if exit_status else commit_id
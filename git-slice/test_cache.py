@@ -0,0 +1,97 @@
+import os
+import tempfile
+import sqlite3
+import unittest
+from datetime import datetime, timezone
+
+from cache import CommitCache
+from filters import RangeFilter, ShortstatFilter
+from history import CommitStats
+
+commit_stats = CommitStats('9a46c3c4fde7eab96b4519ed595b1eb24bdb5d66',
+                           datetime(2023, 4, 5, 19, 12, 46, tzinfo=timezone.utc),
+                           '4b825dc642cb6eb9a060e54bf8d69288fbee4904',
+                           ['c45a101f4ef02a20f63cb39dee04c0577ad7b099'])
+commit_stats.add_change(4, 4, 'src/main.py')
+commit_stats.add_change(0, 0, 'docs/logo.png')
+
+
+class TestCommitCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.cache_file = os.path.join(self.cache_dir.name, 'cache.sqlite')
+
+    def tearDown(self):
+        self.cache_dir.cleanup()
+
+    def test_get_many(self):
+        cache = CommitCache(self.cache_file, 'https://github.com/numpy/numpy.git')
+        cache.put_many([commit_stats])
+
+        cached = cache.get_many([commit_stats.get_commit_id(), '56a676c8058c3bcc213aae3d0cae318aef75ed25'])
+        cache.close()
+
+        self.assertEqual([commit_stats.get_commit_id()], list(cached.keys()))
+
+        cached_stats = cached[commit_stats.get_commit_id()]
+
+        self.assertEqual(commit_stats.get_commit_time(), cached_stats.get_commit_time())
+        self.assertEqual(commit_stats.get_tree_id(), cached_stats.get_tree_id())
+        self.assertEqual(commit_stats.get_parents(), cached_stats.get_parents())
+        self.assertEqual(commit_stats.get_shortstat(), cached_stats.get_shortstat())
+        self.assertEqual(commit_stats.get_changes(), cached_stats.get_changes())
+
+    def test_schema_version(self):
+        # A new cache isn't from an older version, so nothing is logged
+        with self.assertNoLogs(level='INFO'):
+            CommitCache(self.cache_file, 'https://github.com/numpy/numpy.git').close()
+
+        cache = CommitCache(self.cache_file, 'https://github.com/numpy/numpy.git')
+        cache.put_many([commit_stats])
+        cache._connection.execute('PRAGMA user_version = 1')
+        cache.close()
+
+        with self.assertLogs(level='INFO') as logs:
+            cache = CommitCache(self.cache_file, 'https://github.com/numpy/numpy.git')
+
+        self.assertIn('is from an older version, it will be rebuilt', logs.output[0])
+        self.assertEqual({}, cache.get_many([commit_stats.get_commit_id()]))
+        cache.close()
+
+    def test_get_many_large_batch(self):
+        cache = CommitCache(self.cache_file, 'https://github.com/numpy/numpy.git')
+        cache.put_many([commit_stats])
+
+        # SQLite before 3.32 allows at most 999 variables in a single statement
+        cache._connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+        commit_ids = [f'{index:040x}' for index in range(2500)] + [commit_stats.get_commit_id()]
+
+        self.assertEqual([commit_stats.get_commit_id()], list(cache.get_many(commit_ids).keys()))
+
+        cache.close()
+
+    def test_get_many_other_repo(self):
+        cache = CommitCache(self.cache_file, 'https://github.com/numpy/numpy.git')
+        cache.put_many([commit_stats])
+        cache.close()
+
+        cache = CommitCache(self.cache_file, 'https://github.com/pallets/flask.git')
+
+        self.assertEqual({}, cache.get_many([commit_stats.get_commit_id()]))
+        cache.close()
+
+    def test_get_many_filtered(self):
+        cache = CommitCache(self.cache_file, 'https://github.com/numpy/numpy.git')
+        cache.put_many([commit_stats])
+
+        matching = cache.get_many([commit_stats.get_commit_id()], ShortstatFilter(files=RangeFilter('1-5')))
+        filtered = cache.get_many([commit_stats.get_commit_id()], ShortstatFilter(additions=RangeFilter('> 4')))
+        cache.close()
+
+        self.assertEqual(commit_stats.get_changes(), matching[commit_stats.get_commit_id()].get_changes())
+        self.assertEqual({commit_stats.get_commit_id(): None}, filtered)
+
+
+if __name__ == '__main__':
+    unittest.main()
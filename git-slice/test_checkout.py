@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+from git import Actor, Repo
+
+from checkout import RepoFSCheckout, WorktreeCheckout
+
+
+class TestCheckout(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.repo_dir = os.path.join(self.temp_dir.name, 'repo')
+        self.checkout_dir = os.path.join(self.temp_dir.name, 'checkouts')
+        os.makedirs(self.checkout_dir)
+
+        repo = Repo.init(self.repo_dir)
+        author = Actor('GitSlice', 'gitslice@example.com')
+
+        with open(os.path.join(self.repo_dir, 'a.txt'), 'w') as file:
+            file.write('one\n')
+
+        repo.index.add(['a.txt'])
+        self.first_commit = repo.index.commit('First', author=author, committer=author).hexsha
+
+        with open(os.path.join(self.repo_dir, 'a.txt'), 'w') as file:
+            file.write('two\n')
+
+        with open(os.path.join(self.repo_dir, 'b.txt'), 'w') as file:
+            file.write('three\n')
+
+        repo.index.add(['a.txt', 'b.txt'])
+        self.second_commit = repo.index.commit('Second', author=author, committer=author).hexsha
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_repofs_get_commit_dir(self):
+        checkout = RepoFSCheckout('/tmp/working/mount/')
+
+        self.assertEqual('/tmp/working/mount/commits-by-hash/9a46c3c4fde7eab96b4519ed595b1eb24bdb5d66',
+                         checkout.get_commit_dir('9a46c3c4fde7eab96b4519ed595b1eb24bdb5d66'))
+
+    def test_worktree_get_commit_dir(self):
+        checkout = WorktreeCheckout(self.repo_dir, self.checkout_dir)
+
+        commit_dir = checkout.get_commit_dir(self.second_commit)
+
+        with open(os.path.join(commit_dir, 'a.txt')) as file:
+            self.assertEqual('two\n', file.read())
+
+        with open(os.path.join(commit_dir, 'output.log'), 'w') as file:
+            file.write('left behind by the analysis\n')
+
+        self.assertEqual(commit_dir, checkout.get_commit_dir(self.first_commit))
+        self.assertEqual({'.git', 'a.txt'}, set(os.listdir(commit_dir)))
+
+        with open(os.path.join(commit_dir, 'a.txt')) as file:
+            self.assertEqual('one\n', file.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,18 +1,37 @@
+import pickle
 import unittest
+from datetime import timedelta
 from unittest import mock
 from unittest.mock import mock_open
 
 import yaml
 
-from config import AdditionalFilters, ChangesCategories, Config, RepoTypes
+from config import AdaptiveOptions, AdditionalFilters, ChangesCategories, CheckoutBackends, Config, \
+    InvalidDeltaException, InvalidOutputBackendException, InvalidSchedulingPolicyException, OutputBackends, RepoTypes, \
+    SchedulingPolicies
+from extractors import InvalidExtractorException
+from runners import InvalidRunnerException
 
 test_config = {
     'Output Directory': '/tmp/users/40234266/csc4006-project/',
     'Output Format': '%COMMIT_TIME%_%COMMIT_ID%',
+    'Output Backend': 'SQLite',
+    'Manifest Directory': '/users/40234266/csc4006-project/manifest/',
     'Temp Directory': '/users/40234266/csc4006-project/output/sast/numpy/',
     'Rsync To Temp': True,
+    'Rsync Delta': True,
     'Repo Directory Name': 'repo',
     'Mount Directory Name': 'mount',
+    'Cache File': '/users/40234266/csc4006-project/cache.sqlite',
+    'Max In Flight': 100,
+    'Chunk Size': 25,
+    'Scheduling': 'Longest First',
+    'Image Cache Directory': '/users/40234266/csc4006-project/images/',
+    'Persistent Instances': True,
+    'Dedup Directory': '/users/40234266/csc4006-project/dedup/',
+    'Dedup Path': 'src/',
+    'Checkout Backend': 'Worktree',
+    'Checkout Directory': '/dev/shm/',
     'Git Repository Type': 'Remote',
     'Git Repository Source': 'https://github.com/numpy/numpy.git',
     'Analysis': {
@@ -50,9 +69,16 @@ test_config = {
             'File Types': [
                 'py',
                 'java'
-            ]
+            ],
+            'Paths': ['src/'],
+            'Exclude Paths': ['src/vendor/']
         },
-        'Min Delta': '3d5h19m'
+        'Min Delta': '3d5h19m',
+        'Adaptive': {
+            'Metric': 'SUM.code',
+            'Threshold': '5%',
+            'Max Analyses': 500
+        }
     }
 }
 
@@ -168,6 +194,181 @@ class TestMain(unittest.TestCase):
                          config.get_additional_filter(AdditionalFilters.CHANGES))
         self.assertEqual(test_config['Additional Filters']['Min Delta'],
                          config.get_additional_filter(AdditionalFilters.MIN_DELTA))
+        self.assertEqual(test_config['Additional Filters']['Adaptive'],
+                         config.get_additional_filter(AdditionalFilters.ADAPTIVE))
+
+    @mock.patch("builtins.open", mock_open(read_data=config_data))
+    def test_get_adaptive_option(self):
+        config = Config('test_file.yml')
+
+        self.assertEqual(test_config['Additional Filters']['Adaptive']['Metric'],
+                         config.get_adaptive_option(AdaptiveOptions.METRIC))
+        self.assertEqual(test_config['Additional Filters']['Adaptive']['Threshold'],
+                         config.get_adaptive_option(AdaptiveOptions.THRESHOLD))
+        self.assertEqual(test_config['Additional Filters']['Adaptive']['Max Analyses'],
+                         config.get_adaptive_option(AdaptiveOptions.MAX_ANALYSES))
+
+    @mock.patch("builtins.open", mock_open(read_data=config_data))
+    def test_get_cache_file(self):
+        config = Config('test_file.yml')
+
+        self.assertEqual(test_config['Cache File'], config.get_cache_file())
+
+    @mock.patch("builtins.open", mock_open(read_data=config_data))
+    def test_get_manifest_dir(self):
+        config = Config('test_file.yml')
+
+        self.assertEqual(test_config['Manifest Directory'], config.get_manifest_dir())
+
+    @mock.patch("builtins.open", mock_open(read_data=config_data))
+    def test_get_max_in_flight(self):
+        config = Config('test_file.yml')
+
+        self.assertEqual(test_config['Max In Flight'], config.get_max_in_flight())
+
+    @mock.patch("builtins.open", mock_open(read_data=config_data))
+    def test_get_image_cache_dir(self):
+        config = Config('test_file.yml')
+
+        self.assertEqual(test_config['Image Cache Directory'], config.get_image_cache_dir())
+
+    @mock.patch("builtins.open", mock_open(read_data=config_data))
+    def test_get_persistent_instances(self):
+        config = Config('test_file.yml')
+
+        self.assertTrue(config.get_persistent_instances())
+
+    @mock.patch("builtins.open", mock_open(read_data=config_data))
+    def test_get_checkout_backend(self):
+        config = Config('test_file.yml')
+
+        self.assertEqual(CheckoutBackends.WORKTREE, config.get_checkout_backend())
+
+    @mock.patch("builtins.open", mock_open(read_data=config_data))
+    def test_get_checkout_dir(self):
+        config = Config('test_file.yml')
+
+        self.assertEqual(f"{test_config['Checkout Directory']}{config.get_instance_id()}/", config.get_checkout_dir())
+
+    @mock.patch("builtins.open", mock_open(read_data=config_data))
+    def test_get_rsync_delta(self):
+        config = Config('test_file.yml')
+
+        self.assertTrue(config.get_rsync_delta())
+
+    @mock.patch("builtins.open", mock_open(read_data=config_data))
+    def test_get_chunk_size(self):
+        config = Config('test_file.yml')
+
+        self.assertEqual(test_config['Chunk Size'], config.get_chunk_size())
+
+    @mock.patch("builtins.open", mock_open(read_data=config_data))
+    def test_get_scheduling(self):
+        config = Config('test_file.yml')
+
+        self.assertEqual(SchedulingPolicies.LONGEST_FIRST, config.get_scheduling())
+
+    @mock.patch("builtins.open", mock_open(read_data=config_data))
+    def test_get_dedup_dir(self):
+        config = Config('test_file.yml')
+
+        self.assertEqual(test_config['Dedup Directory'], config.get_dedup_dir())
+
+    @mock.patch("builtins.open", mock_open(read_data=config_data))
+    def test_get_dedup_path(self):
+        config = Config('test_file.yml')
+
+        self.assertEqual(test_config['Dedup Path'], config.get_dedup_path())
+
+    @mock.patch("builtins.open", mock_open(read_data=config_data))
+    def test_get_output_backend(self):
+        config = Config('test_file.yml')
+
+        self.assertEqual(OutputBackends.SQLITE, config.get_output_backend())
+
+    @mock.patch("builtins.open", mock_open(read_data=config_data))
+    def test_get_results_file(self):
+        config = Config('test_file.yml')
+
+        self.assertEqual(test_config['Output Directory'] + 'results.sqlite', config.get_results_file())
+
+    @mock.patch("builtins.open", mock_open(read_data=config_data))
+    def test_get_changes_ranges(self):
+        config = Config('test_file.yml')
+
+        self.assertEqual(((5, 100),), config.get_changes_ranges(ChangesCategories.FILES).get_intervals())
+        self.assertEqual(((0, 0), (101, float('inf'))),
+                         config.get_changes_ranges(ChangesCategories.ADDITIONS).get_intervals())
+        self.assertEqual(((float('-inf'), 99), (150, 175), (201, float('inf'))),
+                         config.get_changes_ranges(ChangesCategories.DELETIONS).get_intervals())
+        self.assertEqual(('py', 'java'), config.get_file_types())
+        self.assertEqual([':(glob)src', ':(exclude,glob)src/vendor'], config.get_path_filter().get_pathspec())
+
+    @mock.patch("builtins.open", mock_open(read_data=config_data))
+    def test_get_min_delta(self):
+        config = Config('test_file.yml')
+
+        self.assertEqual(timedelta(days=3, hours=5, minutes=19), config.get_min_delta())
+
+    @mock.patch("builtins.open", mock_open(read_data=config_data))
+    def test_get_git_rev_list_args_copy(self):
+        config = Config('test_file.yml')
+
+        config.get_git_rev_list_args()['ancestry-path'] = True
+
+        self.assertEqual(test_config['Git Rev List Args'], config.get_git_rev_list_args())
+
+    @mock.patch("builtins.open", mock_open(read_data=config_data))
+    def test_read_only(self):
+        config = Config('test_file.yml')
+
+        with self.assertRaises(AttributeError):
+            config.uuid = 'another'
+
+    @mock.patch("builtins.open", mock_open(read_data=config_data))
+    def test_pickle(self):
+        config = Config('test_file.yml')
+        unpickled = pickle.loads(pickle.dumps(config))
+
+        self.assertEqual(config.get_working_dir(), unpickled.get_working_dir())
+        self.assertEqual(config.get_changes_ranges(ChangesCategories.DELETIONS).get_intervals(),
+                         unpickled.get_changes_ranges(ChangesCategories.DELETIONS).get_intervals())
+
+    @mock.patch("builtins.open", mock_open(read_data=yaml.dump({**test_config, 'Output Backend': 'Tape'})))
+    def test_invalid_output_backend(self):
+        self.assertRaises(InvalidOutputBackendException, Config, 'test_file.yml')
+
+    @mock.patch("builtins.open", mock_open(read_data=yaml.dump({**test_config, 'Scheduling': 'Random'})))
+    def test_invalid_scheduling(self):
+        self.assertRaises(InvalidSchedulingPolicyException, Config, 'test_file.yml')
+
+    @mock.patch("builtins.open", mock_open(read_data=yaml.dump({
+        **test_config, 'Additional Filters': {'Changes': {'Files': 0, 'Deletions': '0'}}
+    })))
+    def test_zero_changes_ranges(self):
+        config = Config('test_file.yml')
+
+        self.assertEqual(((0, 0),), config.get_changes_ranges(ChangesCategories.FILES).get_intervals())
+        self.assertEqual(((0, 0),), config.get_changes_ranges(ChangesCategories.DELETIONS).get_intervals())
+        self.assertIsNone(config.get_changes_ranges(ChangesCategories.ADDITIONS))
+
+    @mock.patch("builtins.open", mock_open(read_data=yaml.dump({
+        **test_config, 'Additional Filters': {'Min Delta': 'three days'}
+    })))
+    def test_invalid_min_delta(self):
+        self.assertRaises(InvalidDeltaException, Config, 'test_file.yml')
+
+    def test_invalid_analysis(self):
+        analyses = [
+            ({'Command': 'make'}, InvalidRunnerException),
+            ({'Command': 'make', 'Runner': 'docker'}, InvalidRunnerException),
+            ({'Image': 'Image ONE', 'Command': 'make', 'Extractor': {'Type': 'xml'}}, InvalidExtractorException)
+        ]
+
+        for analysis, exception in analyses:
+            with mock.patch("builtins.open", mock_open(read_data=yaml.dump({**test_config,
+                                                                            'Analysis': {'Default': analysis}}))):
+                self.assertRaises(exception, Config, 'test_file.yml')
 
 
 if __name__ == '__main__':
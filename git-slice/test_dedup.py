@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+
+from git import Actor, Repo
+
+from dedup import DedupStore, get_dedup_key, get_subtree_id
+
+
+class TestDedup(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_get_dedup_key(self):
+        key = get_dedup_key('4b825dc642cb6eb9a060e54bf8d69288fbee4904', 'sha256:1', 'cloc .')
+
+        self.assertEqual(key, get_dedup_key('4b825dc642cb6eb9a060e54bf8d69288fbee4904', 'sha256:1', 'cloc .'))
+        self.assertNotEqual(key, get_dedup_key('4b825dc642cb6eb9a060e54bf8d69288fbee4904', 'sha256:2', 'cloc .'))
+        self.assertNotEqual(key, get_dedup_key('4b825dc642cb6eb9a060e54bf8d69288fbee4904', 'sha256:1', 'cloc src'))
+
+    def test_fetch(self):
+        store = DedupStore(self.temp_dir.name)
+        output_file = os.path.join(self.temp_dir.name, 'first.txt')
+        reused_file = os.path.join(self.temp_dir.name, 'second.txt')
+
+        with open(output_file, 'w') as file:
+            file.write('42 lines\n')
+
+        self.assertFalse(store.fetch('key', reused_file))
+
+        store.store('key', output_file)
+
+        self.assertTrue(store.fetch('key', reused_file))
+
+        with open(reused_file) as file:
+            self.assertEqual('42 lines\n', file.read())
+
+    def test_get_subtree_id(self):
+        repo = Repo.init(os.path.join(self.temp_dir.name, 'repo'))
+        author = Actor('GitSlice', 'gitslice@example.com')
+
+        os.makedirs(os.path.join(repo.working_tree_dir, 'src'))
+
+        with open(os.path.join(repo.working_tree_dir, 'src', 'main.py'), 'w') as file:
+            file.write('print()\n')
+
+        repo.index.add(['src/main.py'])
+        first_commit = repo.index.commit('First', author=author, committer=author).hexsha
+
+        with open(os.path.join(repo.working_tree_dir, 'README.md'), 'w') as file:
+            file.write('GitSlice\n')
+
+        repo.index.add(['README.md'])
+        second_commit = repo.index.commit('Second', author=author, committer=author).hexsha
+
+        self.assertEqual(get_subtree_id(repo, first_commit, 'src/'), get_subtree_id(repo, second_commit, 'src'))
+        self.assertIsNone(get_subtree_id(repo, first_commit, 'docs'))
+
+
+if __name__ == '__main__':
+    unittest.main()
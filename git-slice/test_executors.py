@@ -0,0 +1,95 @@
+import pickle
+import threading
+import unittest
+from unittest import mock
+
+from executors import ExecutorTypes, InvalidExecutorException, ProcessExecutor, TorcpyExecutor, create_executor
+
+
+class TestProcessExecutor(unittest.TestCase):
+    def test_submit(self):
+        executor = ProcessExecutor(2)
+        completed = []
+        tasks = []
+
+        def submit_all():
+            for value in range(10):
+                tasks.append(executor.submit(pow, value, 2, callback=lambda task: completed.append(task.result())))
+
+            executor.wait()
+
+            # Every callback has run once wait() returns
+            self.assertEqual(10, len(completed))
+
+        executor.start(submit_all)
+
+        self.assertEqual([value ** 2 for value in range(10)], [task.result() for task in tasks])
+        self.assertEqual(sorted(value ** 2 for value in range(10)), sorted(completed))
+
+    def test_failed_task(self):
+        executor = ProcessExecutor(1)
+        tasks = []
+
+        def submit():
+            tasks.append(executor.submit(int, 'not a number'))
+            executor.wait()
+
+        executor.start(submit)
+
+        self.assertRaises(ValueError, tasks[0].result)
+
+    def test_num_workers(self):
+        self.assertEqual(3, ProcessExecutor(3).num_workers())
+        self.assertGreaterEqual(ProcessExecutor().num_workers(), 1)
+
+
+class TestTorcpyExecutor(unittest.TestCase):
+    def test_submit(self):
+        import torcpy.runtime
+
+        executor = TorcpyExecutor()
+        enqueue = torcpy.runtime.enqueue
+        pickled = []
+        completed = []
+        tasks = []
+        lock = threading.Lock()
+
+        def pickle_and_enqueue(level, task):
+            # torcpy pickles the task when it's sent to another rank, only one rank is used here so it's pickled instead
+            if task:
+                pickled.append(pickle.dumps(task))
+
+            enqueue(level, task)
+
+        def callback(task):
+            with lock:
+                completed.append(task.result())
+
+        def submit_all():
+            for value in range(5):
+                tasks.append(executor.submit(pow, value, 2, callback=lambda task: callback(task)))
+
+            executor.wait()
+
+            # Every callback has run once wait() returns
+            self.assertEqual(5, len(completed))
+
+        with mock.patch('torcpy.runtime.enqueue', pickle_and_enqueue):
+            executor.start(submit_all)
+
+        self.assertEqual(5, len(pickled))
+        self.assertEqual([value ** 2 for value in range(5)], [task.result() for task in tasks])
+        self.assertEqual(sorted(value ** 2 for value in range(5)), sorted(completed))
+
+
+class TestCreateExecutor(unittest.TestCase):
+    def test_create_executor(self):
+        self.assertIsInstance(create_executor(ExecutorTypes.PROCESS, 2), ProcessExecutor)
+        self.assertIsInstance(create_executor('process'), ProcessExecutor)
+
+    def test_invalid_executor(self):
+        self.assertRaises(InvalidExecutorException, create_executor, 'slurm')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+from extractors import InvalidExtractorException, create_extractor, extract_metrics
+
+CLOC_JSON = '''{"header" : {"cloc_url" : "github.com/AlDanial/cloc", "n_files" : 3},
+"Python" :{"nFiles": 2, "blank": 10, "comment": 4, "code": 120},
+"YAML" :{"nFiles": 1, "blank": 1, "comment": 30, "code": 12},
+"SUM": {"blank": 11, "comment": 34, "code": 132, "nFiles": 3} }
+'''
+
+CLOC_CSV = '''       3 text files.
+       3 unique files.
+       0 files ignored.
+
+files,language,blank,comment,code,"github.com/AlDanial/cloc v 1.90  T=0.01 s (300.0 files/s, 1000.0 lines/s)"
+2,Python,10,4,120
+1,YAML,1,30,12
+3,SUM,11,34,132
+'''
+
+
+class TestExtractors(unittest.TestCase):
+
+    def test_cloc_json(self):
+        metrics = extract_metrics({'Type': 'cloc'}, CLOC_JSON)
+
+        self.assertEqual(120, metrics['Python.code'])
+        self.assertEqual(3, metrics['SUM.nFiles'])
+        self.assertNotIn('header.n_files', metrics)
+
+    def test_cloc_csv(self):
+        metrics = extract_metrics({'Type': 'CLOC'}, CLOC_CSV)
+
+        self.assertEqual(120, metrics['Python.code'])
+        self.assertEqual(3, metrics['SUM.nFiles'])
+        self.assertEqual(12, len(metrics))
+
+    def test_regex(self):
+        extractor_config = {'Type': 'regex', 'Pattern': r'^Coverage: (?P<coverage>[\d.]+)% of (?P<lines>\d+) lines$'}
+
+        self.assertEqual({'coverage': 87.5, 'lines': 1200},
+                         extract_metrics(extractor_config, 'Running tests\nCoverage: 87.5% of 1200 lines\n'))
+        self.assertEqual({}, extract_metrics(extractor_config, 'Running tests\nFailed\n'))
+
+    def test_json(self):
+        extractor_config = {'Type': 'json', 'Metrics': {'Issues': 'results.0.count', 'Tool': 'tool', 'Missing': 'a.b'}}
+
+        self.assertEqual({'Issues': 4, 'Tool': 'bandit'},
+                         extract_metrics(extractor_config, 'Scanning\n{"tool": "bandit", "results": [{"count": 4}]}\n'))
+        self.assertEqual({}, extract_metrics(extractor_config, '{"tool": '))
+
+    def test_create_extractor(self):
+        self.assertRaises(InvalidExtractorException, create_extractor, {'Type': 'xml'})
+        self.assertRaises(InvalidExtractorException, create_extractor, {'Type': 'regex'})
+        self.assertRaises(InvalidExtractorException, create_extractor, {'Pattern': '(?P<a>.)'})
+        self.assertRaises(InvalidExtractorException, create_extractor, {'Type': 'regex', 'Pattern': '(?P<x'})
+        self.assertRaises(InvalidExtractorException, create_extractor, {'Type': 'json', 'Metrics': 'SUM.code'})
+        self.assertRaises(InvalidExtractorException, create_extractor, {'Type': 'json', 'Metrics': {'Code': 4}})
+        self.assertRaises(InvalidExtractorException, create_extractor, 'cloc')
+
+
+if __name__ == '__main__':
+    unittest.main()
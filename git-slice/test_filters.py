@@ -0,0 +1,69 @@
+import unittest
+
+from filters import InvalidRangeException, PathFilter, RangeFilter, ShortstatFilter, parse_range
+
+
+class TestFilters(unittest.TestCase):
+
+    def test_parse_range(self):
+        self.assertEqual((150, 175), parse_range(' 150 - 175 '))
+        self.assertEqual((101, float('inf')), parse_range('> 100'))
+        self.assertEqual((100, float('inf')), parse_range('>=100'))
+        self.assertEqual((float('-inf'), 199), parse_range('200 <'))
+        self.assertEqual((float('-inf'), 200), parse_range('<= 200'))
+        self.assertEqual((0, 0), parse_range('0'))
+        self.assertRaises(InvalidRangeException, parse_range, 'many')
+
+    def test_get_intervals(self):
+        self.assertEqual(((float('-inf'), 99), (150, 175), (201, float('inf'))),
+                         RangeFilter('> 200, 150-175, < 100').get_intervals())
+        self.assertEqual(((4, 10),), RangeFilter('5-10, 4, 6-8').get_intervals())
+        self.assertEqual((), RangeFilter('10-5').get_intervals())
+
+    def test_contains(self):
+        range_filter = RangeFilter('< 100, 150-175, > 200, 180')
+
+        self.assertTrue(range_filter.contains(0))
+        self.assertTrue(range_filter.contains(175))
+        self.assertTrue(range_filter.contains(180))
+        self.assertFalse(range_filter.contains(100))
+        self.assertFalse(range_filter.contains(181))
+        self.assertFalse(range_filter.contains(200))
+
+    def test_mask(self):
+        range_filter = RangeFilter('< 100, 150-175, > 200')
+
+        self.assertEqual([True, False, True, False, True], range_filter.mask([0, 100, 160, 200, 201]))
+
+    def test_shortstat_filter(self):
+        shortstat_filter = ShortstatFilter(files=RangeFilter('1-5'), deletions=RangeFilter('< 10'))
+
+        self.assertFalse(shortstat_filter.is_empty())
+        self.assertTrue(ShortstatFilter().is_empty())
+        self.assertEqual([True, False, False], shortstat_filter.mask([(1, 500, 0), (6, 0, 0), (5, 0, 10)]))
+
+    def test_path_filter(self):
+        path_filter = PathFilter(['src/**/*.java', 'docs'], ['vendor/', 'src/gen/**'])
+
+        self.assertTrue(path_filter.matches('src/Main.java'))
+        self.assertTrue(path_filter.matches('src/app/Main.java'))
+        self.assertTrue(path_filter.matches('docs/guide/index.md'))
+        self.assertFalse(path_filter.matches('src/gen/Parser.java'))
+        self.assertFalse(path_filter.matches('src/app/main.py'))
+        self.assertFalse(path_filter.matches('docs-old/index.md'))
+        self.assertTrue(path_filter.matches_any(['vendor/lib/Lib.java', 'src/Main.java']))
+        self.assertFalse(path_filter.matches_any(['vendor/lib/Lib.java', 'README.md']))
+
+    def test_path_filter_exclude_only(self):
+        path_filter = PathFilter(exclude=['*.md'])
+
+        self.assertTrue(path_filter.matches('docs/index.md'))
+        self.assertFalse(path_filter.matches('README.md'))
+
+    def test_get_pathspec(self):
+        self.assertEqual([':(glob)src/**/*.java', ':(exclude,glob)vendor'],
+                         PathFilter(['src/**/*.java'], ['vendor/']).get_pathspec())
+
+
+if __name__ == '__main__':
+    unittest.main()
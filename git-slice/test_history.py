@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from git import Actor, Repo
+
+from history import AncestryIndex, build_ancestry_index, label_ancestry, parse_log_stream, parse_numstat_line, \
+    unquote_path
+
+log_output = [
+    '\x1e2f1d5f1a6fbe6b2f4b2c85f6cf6a1fbd3dd1c9a1\x1f2023-04-05T19:12:46+01:00\x1f'
+    '56a676c8058c3bcc213aae3d0cae318aef75ed25\x1f'
+    '9a46c3c4fde7eab96b4519ed595b1eb24bdb5d66 c45a101f4ef02a20f63cb39dee04c0577ad7b099\n',
+    '\n',
+    '4\t4\tsrc/main.py\n',
+    '-\t-\tdocs/logo.png\n',
+    '\x1e9a46c3c4fde7eab96b4519ed595b1eb24bdb5d66\x1f2023-04-04T10:00:00+00:00\x1f'
+    '4b825dc642cb6eb9a060e54bf8d69288fbee4904\x1f\n',
+    '\n',
+    '0\t3\tREADME.md\n',
+]
+
+
+class TestHistory(unittest.TestCase):
+
+    def test_parse_numstat_line(self):
+        self.assertEqual((4, 4, 'src/main.py'), parse_numstat_line('4\t4\tsrc/main.py'))
+        self.assertEqual((0, 0, 'logo.png'), parse_numstat_line('-\t-\tlogo.png'))
+        self.assertEqual((1, 0, 'with\ttab.py'), parse_numstat_line('1\t0\t"with\\ttab.py"'))
+
+    def test_unquote_path(self):
+        self.assertEqual('test.py', unquote_path('test.py'))
+        self.assertEqual('a"b.py', unquote_path('"a\\"b.py"'))
+        self.assertEqual('café.py', unquote_path('"caf\\303\\251.py"'))
+
+    def test_parse_log_stream(self):
+        first, second = parse_log_stream(log_output)
+
+        self.assertEqual('2f1d5f1a6fbe6b2f4b2c85f6cf6a1fbd3dd1c9a1', first.get_commit_id())
+        self.assertEqual(datetime(2023, 4, 5, 19, 12, 46, tzinfo=timezone(timedelta(hours=1))),
+                         first.get_commit_time())
+        self.assertEqual('56a676c8058c3bcc213aae3d0cae318aef75ed25', first.get_tree_id())
+        self.assertEqual(['9a46c3c4fde7eab96b4519ed595b1eb24bdb5d66', 'c45a101f4ef02a20f63cb39dee04c0577ad7b099'],
+                         first.get_parents())
+        self.assertEqual((2, 4, 4), first.get_shortstat())
+        self.assertEqual(['src/main.py', 'docs/logo.png'], first.get_changed_files())
+
+        self.assertEqual([], second.get_parents())
+        self.assertEqual((1, 0, 3), second.get_shortstat())
+
+    def test_parse_log_stream_empty(self):
+        self.assertEqual([], list(parse_log_stream([])))
+
+    def test_label_ancestry(self):
+        # A - B - C - M
+        #      \     /
+        #       D - E
+        commits = [('A', []), ('B', ['A']), ('D', ['B']), ('C', ['B']), ('E', ['D']), ('M', ['C', 'E'])]
+
+        labels = label_ancestry(commits, {'A': 1, 'D': 4, 'C': 3})
+
+        self.assertNotIn('B', label_ancestry(commits, {'C': 3}))
+        self.assertEqual('A', labels['B'])
+        self.assertEqual('C', labels['C'])
+        self.assertEqual('D', labels['E'])
+        self.assertEqual('D', labels['M'])
+
+    def test_ancestry_index(self):
+        index = AncestryIndex({'B': 'A'})
+
+        self.assertEqual('A', index.get_nearest('B'))
+        self.assertIsNone(index.get_nearest('C'))
+
+    def test_build_ancestry_index(self):
+        with tempfile.TemporaryDirectory() as repo_dir:
+            repo = Repo.init(repo_dir, initial_branch='main')
+            author = Actor('GitSlice', 'gitslice@example.com')
+
+            def commit(message):
+                with open(os.path.join(repo_dir, 'a.txt'), 'w') as file:
+                    file.write(f'{message}\n')
+
+                repo.index.add(['a.txt'])
+                return repo.index.commit(message, author=author, committer=author).hexsha
+
+            first = commit('First')
+            repo.create_head('feature')
+            second = commit('Second')
+
+            # A configured commit on a branch which isn't in the history of the starting point
+            repo.heads.feature.checkout()
+            configured = commit('Configured')
+            feature = commit('Feature')
+            repo.heads.main.checkout()
+
+            analysis_config = {configured: {}, 'Default': {}}
+
+            # Only "all" adds references, "max-count" would stop the index reaching the configured commit
+            index = build_ancestry_index(repo, ['main'], analysis_config, {'all': True, 'max-count': 1})
+
+            self.assertEqual(configured, index.get_nearest(feature))
+            self.assertIsNone(index.get_nearest(second))
+            self.assertIsNone(index.get_nearest(first))
+            self.assertIsNone(build_ancestry_index(repo, ['main'], analysis_config).get_nearest(feature))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import json
+import os
+import tempfile
+import unittest
+
+from images import ImageCache, get_image_digest
+
+image_digest = 'sha256:327dae0c567caeb4b1cd0e1f793196b8e47e56673924a539d4140745abc058d9'
+
+
+class TestImages(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.cache_dir.cleanup()
+
+    def test_get_image_digest(self):
+        with tempfile.NamedTemporaryFile() as image:
+            image.write(b'GitSlice')
+            image.flush()
+
+            self.assertEqual(image_digest, get_image_digest(image.name))
+
+        self.assertIsNone(get_image_digest('docker://alpine'))
+
+    def test_stage_local_image(self):
+        image_file = os.path.join(self.cache_dir.name, 'local.sif')
+
+        with open(image_file, 'wb') as image:
+            image.write(b'GitSlice')
+
+        image_cache = ImageCache(self.cache_dir.name)
+
+        self.assertEqual({image_file: image_digest}, image_cache.stage([image_file, image_file]))
+        self.assertEqual((image_file, image_digest), image_cache.resolve(image_file))
+
+    def test_resolve(self):
+        cached_file = os.path.join(self.cache_dir.name, f"{image_digest.split(':')[1]}.sif")
+
+        with open(cached_file, 'wb') as image:
+            image.write(b'GitSlice')
+
+        with open(os.path.join(self.cache_dir.name, 'images.json'), 'w') as index:
+            json.dump({'docker://alpine': image_digest}, index)
+
+        image_cache = ImageCache(self.cache_dir.name)
+
+        self.assertEqual({'docker://alpine': image_digest}, image_cache.stage(['docker://alpine']))
+        self.assertEqual((cached_file, image_digest), image_cache.resolve('docker://alpine'))
+        self.assertEqual(('docker://ubuntu', None), image_cache.resolve('docker://ubuntu'))
+
+
+if __name__ == '__main__':
+    unittest.main()
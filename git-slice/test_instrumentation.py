@@ -0,0 +1,112 @@
+import csv
+import json
+import os
+import pickle
+import tempfile
+import unittest
+
+from instrumentation import Instrumentation, Phase, get_dir_size
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_span(self):
+        instrumentation = Instrumentation()
+
+        with instrumentation.span('clone') as span:
+            span.add_bytes(100)
+
+        with instrumentation.span('clone') as span:
+            span.add_bytes(50)
+
+        phase, = instrumentation.get_phases()
+
+        self.assertEqual('clone', phase.get_name())
+        self.assertEqual(2, phase.get_count())
+        self.assertEqual(150, phase.get_bytes())
+        self.assertGreaterEqual(phase.get_wall(), 0)
+        self.assertGreater(phase.to_row()[5], 0)
+
+    def test_span_records_on_exception(self):
+        instrumentation = Instrumentation()
+
+        with self.assertRaises(ValueError):
+            with instrumentation.span('container'):
+                raise ValueError
+
+        self.assertEqual(1, instrumentation.get_phases()[0].get_count())
+
+    def test_iterate(self):
+        instrumentation = Instrumentation()
+
+        self.assertEqual([1, 2, 3], list(instrumentation.iterate('history walk', iter([1, 2, 3]))))
+
+        phase, = instrumentation.get_phases()
+
+        self.assertEqual('history walk', phase.get_name())
+        self.assertEqual(1, phase.get_count())
+
+    def test_merge(self):
+        instrumentation = Instrumentation()
+        worker = Instrumentation()
+
+        instrumentation.record('container', 1.0, 0.5, 10)
+        worker.record('container', 2.0, 0.25, 20)
+        worker.record('output', 0.5, 0.5)
+
+        instrumentation.merge(pickle.loads(pickle.dumps(worker.get_phases())))
+
+        container, output = instrumentation.get_phases()
+
+        self.assertEqual(2, container.get_count())
+        self.assertEqual(3.0, container.get_wall())
+        self.assertEqual(0.75, container.get_cpu())
+        self.assertEqual(30, container.get_bytes())
+        self.assertEqual('output', output.get_name())
+
+    def test_write_report(self):
+        instrumentation = Instrumentation()
+        instrumentation.record('checkout', 1.5, 1.0, 42)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            json_file = os.path.join(temp_dir, 'report.json')
+            csv_file = os.path.join(temp_dir, 'report.csv')
+
+            instrumentation.write_report(json_file, csv_file)
+
+            with open(json_file) as file:
+                report = json.load(file)
+
+            with open(csv_file, newline='') as file:
+                rows = list(csv.DictReader(file))
+
+        self.assertEqual('checkout', report['phases'][0]['phase'])
+        self.assertEqual(42, report['phases'][0]['bytes'])
+        self.assertEqual('1.5', rows[0]['wall_seconds'])
+
+    def test_log_summary(self):
+        instrumentation = Instrumentation()
+        instrumentation.record('container', 2.0, 1.0, 2 ** 20)
+
+        with self.assertLogs(level='INFO') as logs:
+            instrumentation.log_summary()
+
+        self.assertIn('container', logs.output[1])
+
+    def test_phase_defaults(self):
+        phase = Phase('image')
+
+        self.assertEqual(['image', 0, 0.0, 0.0, 0, 0, 0], phase.to_row())
+
+    def test_get_dir_size(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            os.makedirs(os.path.join(temp_dir, 'sub'))
+
+            with open(os.path.join(temp_dir, 'sub', 'file'), 'w') as file:
+                file.write('a' * 10)
+
+            self.assertEqual(10, get_dir_size(temp_dir))
+            self.assertEqual(0, get_dir_size(os.path.join(temp_dir, 'missing')))
+
+
+if __name__ == '__main__':
+    unittest.main()
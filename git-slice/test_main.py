@@ -3,8 +3,9 @@ from datetime import timedelta
 from unittest import mock
 from unittest.mock import mock_open
 
-from config import Config
-from main import val_in_range, file_type_changed, parse_delta, Analysis, get_rev_list_params, parse_diff_shortstat
+from config import Config, InvalidDeltaException, parse_delta
+from main import val_in_range, file_type_changed, Analysis, AnalysisResult, get_rev_list_params, \
+    parse_diff_shortstat
 from test_config import config_data
 
 analysis = Analysis('commit ID', 'commit time', 'analysis image', 'analysis command')
@@ -28,6 +29,23 @@ class TestAnalysis(unittest.TestCase):
         self.assertEqual(('commit ID', 'commit time', 'analysis image', 'analysis command'), analysis.get_details())
 
 
+class TestAnalysisResult(unittest.TestCase):
+
+    def test_str(self):
+        self.assertEqual('commit ID completed analysis in 1.5 seconds',
+                         str(AnalysisResult('commit ID', 'commit time', 'analysis image', 0, 1.5)))
+        self.assertEqual('commit ID failed analysis with exit status 2 in 1.5 seconds',
+                         str(AnalysisResult('commit ID', 'commit time', 'analysis image', 2, 1.5)))
+        self.assertEqual('commit ID reused the output of an identical tree in 1.5 seconds',
+                         str(AnalysisResult('commit ID', 'commit time', 'analysis image', 0, 1.5, reused=True)))
+
+    def test_clear_output(self):
+        result = AnalysisResult('commit ID', 'commit time', 'analysis image', 0, 1.5, output='output')
+        result.clear_output()
+
+        self.assertIsNone(result.get_output())
+
+
 class TestMain(unittest.TestCase):
 
     def test_val_in_range(self):
@@ -54,6 +72,7 @@ class TestMain(unittest.TestCase):
                 '*@yahoo.com'
             ],
             'before': '2023-04-05T19:12:46Z',
+            'full-history': True,
             'max-count': 1000,
             'no-merges': True
         }
@@ -106,6 +125,11 @@ class TestMain(unittest.TestCase):
         self.assertEqual(timedelta(hours=-4, minutes=19), parse_delta('-4h19m'))
         self.assertEqual(timedelta(hours=4, minutes=-19), parse_delta('4h-19m'))
 
+        # Invalid
+        self.assertRaises(InvalidDeltaException, parse_delta, '3 days')
+        self.assertRaises(InvalidDeltaException, parse_delta, '3d5x')
+        self.assertRaises(InvalidDeltaException, parse_delta, '')
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,48 @@
+import tempfile
+import unittest
+from datetime import datetime, timezone
+
+from manifest import CompletionManifest, is_complete
+
+
+class TestManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.manifest_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.manifest_dir.cleanup()
+
+    def test_record(self):
+        manifest = CompletionManifest(self.manifest_dir.name)
+
+        manifest.record('9a46c3c4fde7eab96b4519ed595b1eb24bdb5d66', 0, 'docker://alpine', None, '/output/1.txt')
+        manifest.record('c45a101f4ef02a20f63cb39dee04c0577ad7b099', 1, 'docker://alpine', 'sha256:1', '/output/2.txt')
+        manifest.record('c45a101f4ef02a20f63cb39dee04c0577ad7b099', 0, 'docker://alpine', 'sha256:1', '/output/2.txt',
+                        datetime(2023, 4, 5, 19, 12, 46, tzinfo=timezone.utc), 2.5)
+
+        entries = manifest.load()
+
+        self.assertEqual({'9a46c3c4fde7eab96b4519ed595b1eb24bdb5d66', 'c45a101f4ef02a20f63cb39dee04c0577ad7b099'},
+                         set(entries.keys()))
+        self.assertEqual(0, entries['c45a101f4ef02a20f63cb39dee04c0577ad7b099']['exit_status'])
+        self.assertIsNone(entries['9a46c3c4fde7eab96b4519ed595b1eb24bdb5d66']['image_digest'])
+        self.assertIsNone(entries['9a46c3c4fde7eab96b4519ed595b1eb24bdb5d66']['duration'])
+        self.assertEqual('2023-04-05T19:12:46+00:00',
+                         entries['c45a101f4ef02a20f63cb39dee04c0577ad7b099']['commit_time'])
+        self.assertEqual(2.5, entries['c45a101f4ef02a20f63cb39dee04c0577ad7b099']['duration'])
+
+    def test_is_complete(self):
+        entry = {'exit_status': 0, 'image': 'docker://alpine', 'image_digest': 'sha256:1'}
+
+        self.assertTrue(is_complete(entry, 'docker://alpine', 'sha256:1'))
+        self.assertTrue(is_complete(entry, 'docker://alpine', None))
+        self.assertTrue(is_complete({**entry, 'image_digest': None}, 'docker://alpine', 'sha256:1'))
+        self.assertFalse(is_complete(entry, 'docker://alpine', 'sha256:2'))
+        self.assertFalse(is_complete(entry, 'docker://ubuntu', 'sha256:1'))
+        self.assertFalse(is_complete({**entry, 'exit_status': 2}, 'docker://alpine', 'sha256:1'))
+        self.assertFalse(is_complete(None, 'docker://alpine', 'sha256:1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from output import OutputSink
+
+
+class TestOutputSink(unittest.TestCase):
+
+    def setUp(self):
+        self.output_dir = tempfile.TemporaryDirectory()
+        self.scratch_dir = tempfile.TemporaryDirectory()
+        self.output_file = os.path.join(self.output_dir.name, 'output.txt')
+
+    def tearDown(self):
+        self.output_dir.cleanup()
+        self.scratch_dir.cleanup()
+
+    def test_close(self):
+        sink = OutputSink(self.output_file, self.scratch_dir.name)
+        sink.write('first\n')
+        sink.write('second\n')
+
+        self.assertFalse(os.path.exists(self.output_file))
+
+        sink.close()
+
+        with open(self.output_file) as file:
+            self.assertEqual('first\nsecond\n', file.read())
+
+        self.assertEqual(['output.txt'], os.listdir(self.output_dir.name))
+        self.assertEqual([], os.listdir(self.scratch_dir.name))
+
+    @mock.patch('output.OUTPUT_BUFFER_SIZE', 8)
+    def test_close_spilled(self):
+        sink = OutputSink(self.output_file, self.scratch_dir.name)
+
+        for line in ('first\n', 'second\n', 'third\n'):
+            sink.write(line)
+
+        self.assertEqual(1, len(os.listdir(self.scratch_dir.name)))
+
+        sink.close()
+
+        with open(self.output_file) as file:
+            self.assertEqual('first\nsecond\nthird\n', file.read())
+
+        self.assertEqual(['output.txt'], os.listdir(self.output_dir.name))
+        self.assertEqual([], os.listdir(self.scratch_dir.name))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from unittest import mock
+
+from main import AnalysisResult
+from progress import ProgressReporter
+
+
+def make_result(commit_id, exit_status=0, duration=1.0, reused=False, node='node1'):
+    return AnalysisResult(commit_id, 'commit time', 'analysis image', exit_status, duration, reused=reused, node=node)
+
+
+class TestProgressReporter(unittest.TestCase):
+    def test_add_results(self):
+        progress = ProgressReporter(interval=3600)
+        progress.add_submitted(4)
+
+        with self.assertLogs(level='INFO') as logs:
+            progress.add_results([make_result('a'), make_result('b', exit_status=1)])
+
+        self.assertEqual(2, len(logs.output))
+        self.assertIn('a completed analysis', logs.output[0])
+        self.assertEqual(2, progress.get_completed())
+        self.assertEqual(4, progress.get_submitted())
+
+    def test_progress_line_is_rate_limited(self):
+        progress = ProgressReporter(interval=0)
+        progress.add_submitted(1)
+
+        with self.assertLogs(level='INFO') as logs:
+            progress.add_results([make_result('a')])
+
+        self.assertIn('Progress: 1/1 commits analysed (0 failed, 0 reused)', logs.output[1])
+
+    def test_add_failed(self):
+        progress = ProgressReporter(interval=0)
+        progress.add_submitted(3)
+
+        with self.assertLogs(level='INFO'):
+            progress.add_results([make_result('a')])
+
+        with self.assertLogs(level='INFO') as logs:
+            progress.add_failed(['b', 'c'])
+
+        self.assertEqual(3, progress.get_completed())
+        self.assertIn('Progress: 3/3 commits analysed (2 failed, 0 reused)', logs.output[0])
+
+    def test_get_eta(self):
+        with mock.patch('progress.time.monotonic', return_value=0):
+            progress = ProgressReporter(interval=3600)
+
+        self.assertIsNone(progress.get_eta())
+
+        progress.add_submitted(30)
+
+        with self.assertLogs(level='INFO'):
+            progress.add_results([make_result(str(commit)) for commit in range(10)])
+
+        with mock.patch('progress.time.monotonic', return_value=60):
+            self.assertEqual(10, progress.get_rate())
+            self.assertEqual(120, progress.get_eta().total_seconds())
+            self.assertEqual({'node1': 10}, progress.get_node_rates())
+
+    def test_get_slowest(self):
+        progress = ProgressReporter(interval=3600, slowest_count=2)
+
+        with self.assertLogs(level='INFO'):
+            progress.add_results([make_result('a', duration=5), make_result('b', duration=1),
+                                  make_result('c', duration=9), make_result('d', duration=3)])
+
+        self.assertEqual([(9, 'c'), (5, 'a')], progress.get_slowest())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from datetime import datetime, timezone
+
+from main import Analysis, AnalysisResult, chunk_completed, drop_unstored, results_completed
+from progress import ProgressReporter
+from results import ResultsStore
+from runners import SubprocessRunner
+
+
+class TestResultsStore(unittest.TestCase):
+
+    def setUp(self):
+        self.results_dir = tempfile.TemporaryDirectory()
+        self.results_file = os.path.join(self.results_dir.name, 'results.sqlite')
+
+    def tearDown(self):
+        self.results_dir.cleanup()
+
+    def test_get_output(self):
+        commit_time = datetime(2023, 4, 5, 19, 12, 46, tzinfo=timezone.utc)
+
+        results_store = ResultsStore(self.results_file)
+        results_store.put_many([
+            AnalysisResult('9a46c3c4fde7eab96b4519ed595b1eb24bdb5d66', commit_time, 'docker://alpine', 1, 1.5,
+                           output='first run\n'),
+            AnalysisResult('c45a101f4ef02a20f63cb39dee04c0577ad7b099', commit_time, 'docker://alpine', 0, 1.5,
+                           output='42 lines\n')
+        ])
+        results_store.put_many([
+            AnalysisResult('9a46c3c4fde7eab96b4519ed595b1eb24bdb5d66', commit_time, 'docker://alpine', 0, 1.5,
+                           output='second run\n')
+        ])
+        results_store.close()
+
+        results_store = ResultsStore(self.results_file)
+
+        self.assertEqual('second run\n', results_store.get_output('9a46c3c4fde7eab96b4519ed595b1eb24bdb5d66'))
+        self.assertEqual('42 lines\n', results_store.get_output('c45a101f4ef02a20f63cb39dee04c0577ad7b099'))
+        self.assertIsNone(results_store.get_output('56a676c8058c3bcc213aae3d0cae318aef75ed25'))
+        results_store.close()
+
+    def test_get_metrics(self):
+        commit_time = datetime(2023, 4, 5, 19, 12, 46, tzinfo=timezone.utc)
+
+        results_store = ResultsStore(self.results_file)
+        results_store.put_many([
+            AnalysisResult('9a46c3c4fde7eab96b4519ed595b1eb24bdb5d66', commit_time, 'docker://alpine', 0, 1.5,
+                           output='42 lines\n', metrics={'lines': 42}),
+            AnalysisResult('c45a101f4ef02a20f63cb39dee04c0577ad7b099', commit_time, 'docker://alpine', 0, 1.5,
+                           output='42 lines\n')
+        ])
+
+        self.assertEqual({'lines': 42}, results_store.get_metrics('9a46c3c4fde7eab96b4519ed595b1eb24bdb5d66'))
+        self.assertIsNone(results_store.get_metrics('c45a101f4ef02a20f63cb39dee04c0577ad7b099'))
+        results_store.close()
+
+    def test_get_durations(self):
+        commit_time = datetime(2023, 4, 5, 19, 12, 46, tzinfo=timezone.utc)
+
+        results_store = ResultsStore(self.results_file)
+        results_store.put_many([
+            AnalysisResult('9a46c3c4fde7eab96b4519ed595b1eb24bdb5d66', commit_time, 'docker://alpine', 0, 1.5,
+                           output='42 lines\n'),
+            AnalysisResult('c45a101f4ef02a20f63cb39dee04c0577ad7b099', commit_time, 'docker://alpine', 1, 3.0,
+                           output='failed\n')
+        ])
+
+        self.assertEqual([('9a46c3c4fde7eab96b4519ed595b1eb24bdb5d66', '2023-04-05T19:12:46+00:00', 1.5)],
+                         results_store.get_durations())
+        results_store.close()
+
+    def test_drop_unstored(self):
+        commit_time = datetime(2023, 4, 5, 19, 12, 46, tzinfo=timezone.utc)
+
+        results_store = ResultsStore(self.results_file)
+        results_store.put_many([
+            AnalysisResult('9a46c3c4fde7eab96b4519ed595b1eb24bdb5d66', commit_time, 'docker://alpine', 0, 1.5,
+                           output='42 lines\n')
+        ])
+        results_store.close()
+
+        # The job was killed before the second commit was committed to the store
+        results_store = ResultsStore(self.results_file)
+        completed = {
+            '9a46c3c4fde7eab96b4519ed595b1eb24bdb5d66': {'exit_status': 0},
+            'c45a101f4ef02a20f63cb39dee04c0577ad7b099': {'exit_status': 0}
+        }
+
+        self.assertEqual({'9a46c3c4fde7eab96b4519ed595b1eb24bdb5d66'}, results_store.get_commit_ids())
+
+        with self.assertLogs(level='WARNING'):
+            self.assertEqual({'9a46c3c4fde7eab96b4519ed595b1eb24bdb5d66': {'exit_status': 0}},
+                             drop_unstored(completed, results_store))
+
+        results_store.close()
+
+    def test_subprocess_runner(self):
+        commit_time = datetime(2023, 4, 5, 19, 12, 46, tzinfo=timezone.utc)
+        output = ''.join(SubprocessRunner().execute(None, 'echo 42 lines', self.results_dir.name, []))
+
+        # The subprocess runner doesn't use an image, so results have no analysis image
+        results_store = ResultsStore(self.results_file)
+        results_store.put_many([
+            AnalysisResult('9a46c3c4fde7eab96b4519ed595b1eb24bdb5d66', commit_time, None, 0, 1.5, output=output)
+        ])
+        results_store.close()
+
+        results_store = ResultsStore(self.results_file)
+
+        self.assertEqual('42 lines\n', results_store.get_output('9a46c3c4fde7eab96b4519ed595b1eb24bdb5d66'))
+        results_store.close()
+
+    def test_chunk_completed(self):
+        commit_time = datetime(2023, 4, 5, 19, 12, 46, tzinfo=timezone.utc)
+        progress = ProgressReporter(interval=0)
+        progress.add_submitted(2)
+
+        task = mock.Mock()
+        task.result.side_effect = RuntimeError('unexpected failure')
+        chunk = [Analysis('9a46c3c4fde7eab96b4519ed595b1eb24bdb5d66', commit_time, None, 'make'),
+                 Analysis('c45a101f4ef02a20f63cb39dee04c0577ad7b099', commit_time, None, 'make')]
+
+        # A chunk which raised is counted as failed commits rather than leaving them out of the progress
+        with self.assertLogs(level='INFO') as logs:
+            chunk_completed(progress, None, task, chunk)
+
+        self.assertIn('Analysis of the chunk of 2 commits from 9a46c3c4fde7eab96b4519ed595b1eb24bdb5d66 failed',
+                      logs.output[0])
+        self.assertTrue(any('Progress: 2/2 commits analysed (2 failed, 0 reused)' in line for line in logs.output))
+
+    def test_results_completed(self):
+        commit_time = datetime(2023, 4, 5, 19, 12, 46, tzinfo=timezone.utc)
+        progress = ProgressReporter(interval=0)
+        progress.add_submitted(2)
+
+        results_store = ResultsStore(self.results_file)
+
+        with self.assertLogs(level='INFO'):
+            results_completed(progress, results_store, [
+                AnalysisResult('9a46c3c4fde7eab96b4519ed595b1eb24bdb5d66', commit_time, None, 0, 1.5, output='42\n')
+            ])
+
+        results_store.close()
+
+        # Results which can't be stored are counted as failed rather than completing successfully
+        with self.assertLogs(level='INFO') as logs:
+            results_completed(progress, results_store, [
+                AnalysisResult('c45a101f4ef02a20f63cb39dee04c0577ad7b099', commit_time, None, 0, 1.5, output='42\n')
+            ])
+
+        self.assertIn('Unable to store the results of c45a101f4ef02a20f63cb39dee04c0577ad7b099', logs.output[0])
+        self.assertTrue(any('Progress: 2/2 commits analysed (1 failed, 0 reused)' in line for line in logs.output))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import subprocess
+import tempfile
+import time
+import unittest
+
+from runners import InvalidRunnerException, RunnerTypes, SingularityRunner, SubprocessRunner, create_runner, \
+    get_link_command, get_runner_type
+
+
+class TestSubprocessRunner(unittest.TestCase):
+    def setUp(self):
+        self.commit_dir = tempfile.TemporaryDirectory()
+
+        with open(f'{self.commit_dir.name}/A.txt', 'w') as file:
+            file.write('A\n')
+
+    def tearDown(self):
+        self.commit_dir.cleanup()
+
+    def test_execute(self):
+        output = SubprocessRunner().execute(None, 'ls ; echo done', self.commit_dir.name, [])
+
+        self.assertEqual(['A.txt\n', 'done\n'], list(output))
+
+    def test_execute_failure(self):
+        output = SubprocessRunner().execute(None, 'echo partial ; exit 3', self.commit_dir.name, [])
+
+        self.assertEqual('partial\n', next(output))
+
+        with self.assertRaises(subprocess.CalledProcessError) as context:
+            next(output)
+
+        self.assertEqual(3, context.exception.returncode)
+
+    def test_timeout(self):
+        start_time = time.time()
+
+        with self.assertLogs(level='WARNING'):
+            with self.assertRaises(subprocess.CalledProcessError):
+                list(SubprocessRunner(timeout=0.5).execute(None, 'sleep 30', self.commit_dir.name, []))
+
+        self.assertLess(time.time() - start_time, 10)
+
+    def test_get_command(self):
+        self.assertEqual('make', SubprocessRunner().get_command('make'))
+        self.assertEqual('ulimit -t 60 ; ulimit -v 2097152 ; ulimit -n 256 ; make',
+                         SubprocessRunner(cpu_time=60, memory=2048, open_files=256).get_command('make'))
+
+    def test_limits_are_applied(self):
+        output = SubprocessRunner(open_files=64).execute(None, 'ulimit -n', self.commit_dir.name, [])
+
+        self.assertEqual(['64\n'], list(output))
+
+    def test_invalid_limit(self):
+        self.assertRaises(InvalidRunnerException, SubprocessRunner, timeout=-1)
+        self.assertRaises(InvalidRunnerException, SubprocessRunner, memory='lots')
+
+
+class TestGetLinkCommand(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.link = f'{self.temp_dir.name}/src'
+
+        for commit_id in ('first', 'second'):
+            os.makedirs(f'{self.temp_dir.name}/commits/{commit_id}')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def link_commit(self, commit_id):
+        command = get_link_command(f'{self.temp_dir.name}/commits/{commit_id}', self.link)
+
+        return subprocess.run(['/bin/sh', '-c', f'{command} ; echo linked'], capture_output=True,
+                              universal_newlines=True)
+
+    def test_replaces_link(self):
+        self.assertEqual('linked\n', self.link_commit('first').stdout)
+        self.assertEqual('linked\n', self.link_commit('second').stdout)
+        self.assertEqual(f'{self.temp_dir.name}/commits/second', os.readlink(self.link))
+
+    def test_existing_directory(self):
+        os.makedirs(self.link)
+
+        process = self.link_commit('first')
+
+        self.assertEqual(1, process.returncode)
+        self.assertEqual('', process.stdout)
+        self.assertEqual([], os.listdir(self.link))
+
+
+class TestCreateRunner(unittest.TestCase):
+    def test_get_runner_type(self):
+        self.assertEqual(RunnerTypes.SINGULARITY, get_runner_type(None))
+        self.assertEqual(RunnerTypes.SUBPROCESS, get_runner_type('Subprocess'))
+        self.assertEqual(RunnerTypes.SUBPROCESS, get_runner_type({'Type': 'subprocess', 'Timeout': 60}))
+        self.assertRaises(InvalidRunnerException, get_runner_type, 'docker')
+        self.assertRaises(InvalidRunnerException, get_runner_type, {'Timeout': 60})
+
+    def test_create_runner(self):
+        self.assertIsInstance(create_runner(None), SingularityRunner)
+        self.assertIsInstance(create_runner('Singularity', persistent_instances=True), SingularityRunner)
+        self.assertIsInstance(create_runner('subprocess'), SubprocessRunner)
+        self.assertEqual('ulimit -t 5 ; make',
+                         create_runner({'Type': 'Subprocess', 'CPU Time': 5}).get_command('make'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+from datetime import datetime, timezone
+
+from main import Analysis, AnalysisResult
+from sampling import AdaptiveSampler, InvalidThresholdException, parse_threshold
+
+COMMIT_TIME = datetime(2023, 4, 5, 19, 12, 46, tzinfo=timezone.utc)
+
+
+def make_sampler(count, *args):
+    sampler = AdaptiveSampler('SUM.code', *args)
+
+    for position in range(count):
+        sampler.add_candidate(Analysis(f'{position:040x}', COMMIT_TIME, 'docker://alpine', 'cloc .'))
+
+    return sampler
+
+
+def complete(sampler, position, value, exit_status=0):
+    sampler.add_result(AnalysisResult(f'{position:040x}', COMMIT_TIME, 'docker://alpine', exit_status, 1.5,
+                                      metrics={'SUM.code': value}))
+
+
+def positions(analyses):
+    return [int(analysis.get_commit_id(), 16) for analysis in analyses]
+
+
+class TestAdaptiveSampler(unittest.TestCase):
+
+    def test_parse_threshold(self):
+        self.assertEqual((100.0, False), parse_threshold(100))
+        self.assertEqual((0.05, True), parse_threshold(' 5% '))
+        self.assertRaises(InvalidThresholdException, parse_threshold, 'lots')
+
+    def test_next_round(self):
+        sampler = make_sampler(17, 10)
+
+        # A step in the metric between commits 8 and 9, found from a coarse sample of every 8th commit
+        for position in (0, 8, 16):
+            complete(sampler, position, 100 if position <= 8 else 200)
+
+        self.assertEqual([12], positions(sampler.next_round()))
+        complete(sampler, 12, 200)
+
+        self.assertEqual([10], positions(sampler.next_round()))
+        complete(sampler, 10, 200)
+
+        self.assertEqual([9], positions(sampler.next_round()))
+        complete(sampler, 9, 200)
+
+        self.assertEqual([], sampler.next_round())
+
+    def test_relative_threshold(self):
+        sampler = make_sampler(5, '5%')
+
+        complete(sampler, 0, 1000)
+        complete(sampler, 2, 1040)
+        complete(sampler, 4, 1200)
+
+        self.assertEqual([3], positions(sampler.next_round()))
+
+    def test_failed_analysis(self):
+        sampler = make_sampler(5, 10)
+
+        complete(sampler, 0, 100)
+        complete(sampler, 4, 200, exit_status=1)
+
+        self.assertEqual([], sampler.next_round())
+
+    def test_resumed_metrics(self):
+        sampler = make_sampler(17, 10)
+
+        # Commits 0 and 16 were analysed by a previous run, only commit 8 is analysed by this one
+        sampler.add_metrics(f'{0:040x}', {'SUM.code': 100})
+        sampler.add_metrics(f'{16:040x}', {'SUM.code': 200})
+        complete(sampler, 8, 100)
+
+        self.assertEqual([12], positions(sampler.next_round()))
+
+        # A resumed commit without stored metrics is sampled, but isn't refined around
+        sampler = make_sampler(5, 10)
+        sampler.add_metrics(f'{0:040x}', None)
+        complete(sampler, 4, 200)
+
+        self.assertEqual([], sampler.next_round())
+
+    def test_max_analyses(self):
+        sampler = make_sampler(9, 10, 1)
+
+        for position in (0, 4, 8):
+            complete(sampler, position, position * 100)
+
+        self.assertEqual([2], positions(sampler.next_round()))
+        self.assertEqual([], sampler.next_round())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from datetime import datetime, timezone
+
+from main import Analysis
+from scheduling import CostModel, order_chunks
+
+
+def make_analysis(commit_id, day):
+    return Analysis(commit_id, datetime(2023, 4, day, tzinfo=timezone.utc), 'analysis image', 'analysis command')
+
+
+class TestCostModel(unittest.TestCase):
+    def test_recorded_duration(self):
+        cost_model = CostModel()
+        cost_model.add('a', '2023-04-01T00:00:00+00:00', 5.0)
+
+        self.assertTrue(cost_model.has_history())
+        self.assertEqual(5.0, cost_model.estimate(make_analysis('a', 20)))
+
+    def test_interpolation(self):
+        cost_model = CostModel()
+        cost_model.add('b', datetime(2023, 4, 11, tzinfo=timezone.utc), 30.0)
+        cost_model.add('a', datetime(2023, 4, 1, tzinfo=timezone.utc), 10.0)
+
+        self.assertEqual(15.0, cost_model.estimate(Analysis('c', datetime(2023, 4, 3, 12, tzinfo=timezone.utc),
+                                                            'analysis image', 'analysis command')))
+        self.assertEqual(10.0, cost_model.estimate(make_analysis('d', 1)))
+        self.assertEqual(30.0, cost_model.estimate(make_analysis('e', 20)))
+
+    def test_no_commit_times(self):
+        cost_model = CostModel()
+        cost_model.add('a', None, 2.0)
+        cost_model.add('b', None, 4.0)
+        cost_model.add('c', None, None)
+
+        self.assertEqual(3.0, cost_model.estimate(make_analysis('d', 1)))
+
+    def test_no_history(self):
+        cost_model = CostModel()
+
+        self.assertFalse(cost_model.has_history())
+        self.assertLess(cost_model.estimate(make_analysis('a', 1)), cost_model.estimate(make_analysis('b', 2)))
+
+    def test_add_manifest(self):
+        cost_model = CostModel()
+        cost_model.add_manifest({
+            'a': {'exit_status': 0, 'commit_time': '2023-04-01T00:00:00+00:00', 'duration': 5.0},
+            'b': {'exit_status': 1, 'commit_time': '2023-04-02T00:00:00+00:00', 'duration': 50.0},
+            'c': {'exit_status': 0, 'image': 'analysis image'}
+        })
+
+        self.assertEqual(5.0, cost_model.estimate(make_analysis('b', 2)))
+
+
+class TestOrderChunks(unittest.TestCase):
+    def test_order_chunks(self):
+        cost_model = CostModel()
+        cost_model.add('a', None, 1.0)
+        cost_model.add('b', None, 8.0)
+        cost_model.add('c', None, 4.0)
+        cost_model.add('d', None, 4.0)
+
+        first = [make_analysis('a', 1), make_analysis('b', 2)]
+        second = [make_analysis('c', 3), make_analysis('d', 4)]
+        third = [make_analysis('a', 5)]
+
+        self.assertEqual([first, second, third], order_chunks([third, second, first], cost_model))
+        self.assertEqual([], order_chunks([], cost_model))
+
+    def test_newest_first_without_history(self):
+        chunks = [[make_analysis(str(day), day)] for day in range(1, 5)]
+
+        self.assertEqual(list(reversed(chunks)), order_chunks(chunks, CostModel()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+from git import Actor, Repo
+
+from staging import DeltaStaging
+
+
+class TestStaging(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.repo_dir = os.path.join(self.temp_dir.name, 'repo')
+        self.working_dir = self.temp_dir.name
+
+        repo = Repo.init(self.repo_dir)
+        author = Actor('GitSlice', 'gitslice@example.com')
+
+        for name in ('a.txt', 'b.txt'):
+            with open(os.path.join(self.repo_dir, name), 'w') as file:
+                file.write('one\n')
+
+        repo.index.add(['a.txt', 'b.txt'])
+        self.first_commit = repo.index.commit('First', author=author, committer=author).hexsha
+
+        with open(os.path.join(self.repo_dir, 'a.txt'), 'w') as file:
+            file.write('two\n')
+
+        repo.index.remove(['b.txt'], working_tree=True)
+        repo.index.add(['a.txt'])
+        self.second_commit = repo.index.commit('Second', author=author, committer=author).hexsha
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_get_pre_run(self):
+        staging = DeltaStaging(self.repo_dir, self.working_dir)
+
+        self.assertIn(' -r /src/ ', staging.get_pre_run(self.first_commit))
+
+        staging.completed(self.first_commit, 0)
+        pre_run = staging.get_pre_run(self.second_commit)
+
+        self.assertIn('--delete-missing-args', pre_run)
+
+        changes_file = pre_run.split('--files-from=')[1].split()[0]
+
+        with open(os.path.join(self.working_dir, os.path.basename(changes_file))) as file:
+            self.assertEqual(['a.txt', 'b.txt'], sorted(filter(None, file.read().split('\0'))))
+
+    def test_completed_failure(self):
+        staging = DeltaStaging(self.repo_dir, self.working_dir)
+
+        staging.completed(self.first_commit, 0)
+        staging.completed(self.second_commit, 1)
+
+        self.assertIn(' -r /src/ ', staging.get_pre_run(self.first_commit))
+
+
+if __name__ == '__main__':
+    unittest.main()
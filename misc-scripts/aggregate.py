@@ -0,0 +1,252 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+
+METRICS_SUFFIX = '.metrics.json'
+
+
+def parse_commit_times(commit_times):
+    """
+    Parses commit times, which are each either seconds since the UNIX epoch or ISO 8601, into UTC timestamps.
+
+    :param commit_times: Sequence of commit times as strings
+    :return: DatetimeIndex of the commit times
+    """
+
+    commit_times = pd.Series(commit_times, dtype=str)
+    epoch = commit_times.str.isdigit()
+
+    parsed = pd.Series(pd.NaT, index=commit_times.index, dtype='datetime64[ns, UTC]')
+    parsed[epoch] = pd.to_datetime(commit_times[epoch].astype(np.int64), unit='s', utc=True)
+    parsed[~epoch] = pd.to_datetime(commit_times[~epoch], utc=True, format='ISO8601')
+
+    return pd.DatetimeIndex(parsed, name='Date')
+
+
+def build_frame(commit_times, commit_ids, records):
+    """
+    Builds a frame of numeric metrics indexed (and sorted) by commit time.  Metrics which aren't numbers are dropped.
+
+    :param commit_times: Sequence of commit times as strings
+    :param commit_ids: Sequence of commit IDs
+    :param records: Sequence of dictionaries of metric names to values, one for each commit
+    :return: DataFrame with a column for each metric and a "Commit" column
+    """
+
+    frame = pd.DataFrame.from_records(records, index=parse_commit_times(commit_times))
+    frame = frame.select_dtypes('number').astype(np.float64)
+    frame.insert(0, 'Commit', list(commit_ids))
+
+    return frame.sort_index(kind='stable')
+
+
+def load_csv(csv_file):
+    """
+    Loads a CSV file written by parse_output.py.
+
+    :param csv_file: Location of the CSV file
+    :return: DataFrame with a column for each data point and a "Commit" column, indexed by commit time
+    """
+
+    frame = pd.read_csv(csv_file, index_col='Date')
+    frame.index = pd.DatetimeIndex(pd.to_datetime(frame.index, utc=True), name='Date')
+
+    return frame.sort_index(kind='stable')
+
+
+def load_metrics_dir(search_path):
+    """
+    Loads the metrics written next to each output file by an extractor.  The files must be named in the format
+    %COMMIT_TIME%_%COMMIT_ID%.metrics.json.
+
+    :param search_path: The Output Directory of a run using the Files output backend
+    :return: DataFrame with a column for each metric and a "Commit" column, indexed by commit time
+    """
+
+    commit_times, commit_ids, records = [], [], []
+
+    for entry in os.scandir(search_path):
+        if not entry.is_file() or not entry.name.endswith(METRICS_SUFFIX):
+            continue
+
+        commit_time, commit_id = entry.name[:-len(METRICS_SUFFIX)].rsplit('_', 1)
+
+        with open(entry.path, 'r') as file:
+            records.append(json.load(file))
+
+        commit_times.append(commit_time)
+        commit_ids.append(commit_id)
+
+    return build_frame(commit_times, commit_ids, records)
+
+
+def load_results_store(results_file):
+    """
+    Loads the metrics of every successful analysis from a results store created by the SQLite output backend.
+
+    :param results_file: Location of the results store
+    :return: DataFrame with a column for each metric and a "Commit" column, indexed by commit time
+    """
+
+    connection = sqlite3.connect(results_file)
+
+    try:
+        rows = connection.execute('SELECT commit_id, commit_time, metrics FROM results '
+                                  'WHERE exit_status = 0 AND metrics IS NOT NULL').fetchall()
+    finally:
+        connection.close()
+
+    return build_frame([row[1] for row in rows], [row[0] for row in rows], [json.loads(row[2]) for row in rows])
+
+
+def load_metrics(path):
+    """
+    Loads metrics from a CSV file written by parse_output.py, a results store, or a directory of metrics files.
+
+    :param path: Location of the CSV file, results store or directory
+    :return: DataFrame with a column for each metric and a "Commit" column, indexed by commit time
+    """
+
+    if os.path.isdir(path):
+        return load_metrics_dir(path)
+    elif path.endswith('.csv'):
+        return load_csv(path)
+
+    return load_results_store(path)
+
+
+def resample(frame, rule, how='mean'):
+    """
+    Aggregates the metrics of every commit within each period (e.g. "D" for daily or "W" for weekly).  Periods without
+    any commits are dropped rather than plotted as gaps.
+
+    :param frame: DataFrame indexed by commit time
+    :param rule: pandas offset alias of the period
+    :param how: Aggregation used within a period, e.g. mean, median, max or last
+    :return: DataFrame with one row for each period
+    """
+
+    return frame.select_dtypes('number').resample(rule).agg(how).dropna(how='all')
+
+
+def rolling(frame, window, how='mean'):
+    """
+    Aggregates the metrics over a moving window.
+
+    :param frame: DataFrame indexed by commit time
+    :param window: Amount of commits in the window, or a pandas offset alias (e.g. "30D") for a window of time
+    :param how: Aggregation used within the window, e.g. mean, median or max
+    :return: DataFrame with the same index as the given frame
+    """
+
+    if isinstance(window, str) and window.isdigit():
+        window = int(window)
+
+    return frame.select_dtypes('number').rolling(window, min_periods=1).agg(how)
+
+
+def downsample(frame, max_points):
+    """
+    Reduces the metrics to at most max_points rows for plotting.  The rows are split into equal sized buckets, and the
+    rows holding the minimum and maximum of the first metric in each bucket are kept, so spikes are still visible.
+
+    :param frame: DataFrame indexed by commit time
+    :param max_points: Maximum amount of rows to keep
+    :return: DataFrame with at most max_points rows, or the given frame when it is small enough already
+    """
+
+    if len(frame) <= max_points or frame.empty:
+        return frame
+
+    values = frame.select_dtypes('number').iloc[:, 0].to_numpy()
+    bucket_size = -(-len(frame) // (max_points // 2 or 1))
+    bucket_count = -(-len(frame) // bucket_size)
+
+    # Pad to a whole amount of buckets with NaN, which nanargmin and nanargmax ignore
+    buckets = np.full(bucket_count * bucket_size, np.nan)
+    buckets[:len(values)] = values
+    buckets = buckets.reshape(bucket_count, bucket_size)
+
+    starts = np.arange(bucket_count) * bucket_size
+    filled = ~np.isnan(buckets).all(axis=1)
+    buckets[~filled] = 0
+
+    keep = np.concatenate([starts + np.nanargmin(buckets, axis=1), starts + np.nanargmax(buckets, axis=1)])
+    keep = np.unique(keep[keep < len(frame)])
+
+    return frame.iloc[keep]
+
+
+def plot(frame, plot_file, max_points=2000):
+    """
+    Plots every metric in a frame against the commit time.  The frame should already be aggregated, it is downsampled
+    so that at most max_points points are drawn for each metric.
+
+    :param frame: DataFrame indexed by commit time
+    :param plot_file: Location of the image to save
+    :param max_points: Maximum amount of points drawn for each metric
+    :return: None
+    """
+
+    import matplotlib.pyplot as plt
+
+    frame = frame.select_dtypes('number')
+    fig, ax1 = plt.subplots()
+
+    for name in frame.columns:
+        column = downsample(frame[[name]].dropna(), max_points)
+        ax1.plot(column.index.to_numpy(), column[name].to_numpy(), marker='.', markersize=3, linewidth=1, label=name)
+
+    ax1.legend(loc='upper left')
+    ax1.set_xlabel('Time')
+    fig.autofmt_xdate()
+    fig.savefig(plot_file)
+    plt.close(fig)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate and plot the metrics of a GitSlice run over time",
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument("path", help="CSV file from parse_output.py, a results.sqlite file, or a directory of "
+                                     "metrics files")
+    parser.add_argument("-m", "--metric", action='append', default=[],
+                        help="metric to include, may be repeated, defaults to every numeric metric")
+    parser.add_argument("-r", "--resample", help="aggregate each period, e.g. D for daily or W for weekly")
+    parser.add_argument("-w", "--window", help="moving window, either an amount of commits or a period such as 30D")
+    parser.add_argument("-a", "--agg", help="aggregation used by --resample and --window", default='mean')
+    parser.add_argument("-n", "--max-points", help="maximum amount of points plotted for each metric", type=int,
+                        default=2000)
+    parser.add_argument("-o", "--output", help="CSV file to write the aggregated metrics to")
+    parser.add_argument("-p", "--plot", help="image to plot the aggregated metrics to, empty to disable",
+                        default="data/aggregate.png")
+
+    args = parser.parse_args(sys.argv[1:])
+
+    frame = load_metrics(args.path)
+
+    if args.metric:
+        frame = frame[args.metric]
+
+    if args.resample:
+        frame = resample(frame, args.resample, args.agg)
+
+    if args.window:
+        frame = rolling(frame, args.window, args.agg)
+
+    print(f"Aggregated {len(frame)} rows of {len(frame.select_dtypes('number').columns)} metrics")
+
+    if args.output:
+        frame.to_csv(args.output)
+
+    if args.plot:
+        plot(frame, args.plot, args.max_points)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,41 +1,219 @@
+import argparse
 import csv
 import datetime
+import functools
+import itertools
+import multiprocessing
 import os
 import re
+import sqlite3
+import sys
+import zlib
 
-import matplotlib.pyplot as plt
+import yaml
 
+NON_DIGITS = re.compile('[^0-9]')
 
-def get_search_terms():
-    result = []
 
-    while True:
-        pos = input('Word position:\n> ')
+class Matcher:
+    """
+    Finds the first line of an output which has the search text at every search position, and extracts the data points
+    from that line.  Positions are indexes of the whitespace separated words of the line, negative positions count from
+    the end of the line.
+    """
 
-        if pos == "":
-            break
+    def __init__(self, search_terms, data_points) -> None:
+        self._search_terms = search_terms
+        self._data_points = data_points
+        positions = [pos for pos, _ in [*search_terms, *data_points]]
+        self._last_position = max(positions, default=0)
+        self._first_position = min(positions, default=0)
 
-        try:
-            pos = int(pos)
-        except ValueError:
-            print("That's not an integer, please enter a valid integer")
-            continue
+    def match(self, lines):
+        """
+        Searches the lines of an output.
 
-        text = input('Search text:\n> ')
+        :param lines: An iterable of lines
+        :return: List of the data point values from the first matching line, or None when no line matches.  Values
+                 which contain no digits are given as None, so they are left empty rather than written as 0.
+        """
 
-        if text == "":
-            break
+        for line in lines:
+            # Cheap check before splitting the line, every search text must appear somewhere in a matching line
+            if not all(text in line for _, text in self._search_terms):
+                continue
 
-        result.append((pos, text))
+            values = line.split()
 
-    return result
+            # Lines without a word at every position (from the start or the end of the line) can't match
+            if len(values) <= self._last_position or -len(values) > self._first_position:
+                continue
+
+            if all(values[pos] == text for pos, text in self._search_terms):
+                return [parse_value(values[pos]) for pos, _ in self._data_points]
+
+        return None
+
+
+def parse_value(word):
+    """
+    Parses a data point, ignoring any characters which aren't digits (e.g. thousands separators or units).
+
+    :param word: The word of the matching line at the data point's position
+    :return: The integer value, or None when the word has no digits
+    """
+
+    digits = NON_DIGITS.sub('', word)
+
+    return int(digits) if digits else None
+
+
+def parse_commit_time(commit_time):
+    """
+    Parses the commit time from an output, which is either seconds since the UNIX epoch or ISO 8601.
+
+    :param commit_time: The commit time as a string
+    :return: datetime representation of the commit time
+    """
+
+    if commit_time.isdigit():
+        return datetime.datetime.utcfromtimestamp(int(commit_time))
+
+    return datetime.datetime.fromisoformat(commit_time)
+
+
+def parse_output_file(file_path, matcher):
+    """
+    Parses an output file named in the format %COMMIT_TIME%_%COMMIT_ID%.txt.  Run by the process pool.
+
+    :param file_path: Location of the output file
+    :param matcher: The Matcher used to search the output
+    :return: CSV row of the commit time, commit ID and data points, or None when nothing matched
+    """
+
+    commit_time, commit_id = os.path.splitext(os.path.basename(file_path))[0].rsplit('_', 1)
+
+    with open(file_path, 'r', errors='replace') as file:
+        data = matcher.match(file)
+
+    if data is None:
+        return None
+
+    return [parse_commit_time(commit_time).isoformat(' '), commit_id, *data]
+
+
+def parse_output_row(row, matcher):
+    """
+    Parses an output from the results store created by the SQLite output backend.  Run by the process pool.
 
+    :param row: Tuple of commit ID, commit time and the compressed output
+    :param matcher: The Matcher used to search the output
+    :return: CSV row of the commit time, commit ID and data points, or None when nothing matched
+    """
 
-def get_data_points():
+    commit_id, commit_time, output = row
+    data = matcher.match(zlib.decompress(output).decode('utf-8', 'replace').splitlines())
+
+    if data is None:
+        return None
+
+    return [parse_commit_time(commit_time).isoformat(' '), commit_id, *data]
+
+
+def iter_output_files(search_path):
+    """
+    Lists the non-empty output files in a directory, sorted by name (and so by commit time).  Metrics written next to
+    the output files by an extractor are skipped.
+
+    :param search_path: Directory containing output files
+    :return: Generator of file paths
+    """
+
+    for name in sorted(entry.name for entry in os.scandir(search_path)
+                       if entry.is_file() and entry.name.endswith('.txt')):
+        file_path = os.path.join(search_path, name)
+
+        if os.path.getsize(file_path) > 0:
+            yield file_path
+
+
+def iter_output_rows(results_file):
+    """
+    Reads the output of every successful analysis from a results store, in order of commit time.
+
+    :param results_file: Location of the results store
+    :return: Generator of tuples of commit ID, commit time and the compressed output
+    """
+
+    connection = sqlite3.connect(results_file)
+
+    try:
+        yield from connection.execute('SELECT commit_id, commit_time, output FROM results WHERE exit_status = 0 '
+                                      'ORDER BY commit_time')
+    finally:
+        connection.close()
+
+
+def parse_outputs(search_path, search_terms, data_points, csv_file, processes=None, chunk_size=64):
+    """
+    Parses every output in a directory (or results store) using a process pool, writing a CSV row for each output with
+    a matching line as soon as it has been parsed.  Only a bounded amount of outputs are held in memory at once.
+
+    :param search_path: Directory of output files, or the location of a results store (results.sqlite)
+    :param search_terms: List of (position, text) tuples which a line must contain
+    :param data_points: List of (position, name) tuples to extract from the matching line
+    :param csv_file: Location of the CSV file to write
+    :param processes: Amount of processes to parse outputs with, defaults to the amount of CPUs
+    :param chunk_size: Amount of outputs given to a process at once
+    :return: Generator of CSV rows, yielded after they have been written
+    """
+
+    matcher = Matcher(search_terms, data_points)
+
+    if os.path.isfile(search_path):
+        parse, outputs = functools.partial(parse_output_row, matcher=matcher), iter_output_rows(search_path)
+    else:
+        parse, outputs = functools.partial(parse_output_file, matcher=matcher), iter_output_files(search_path)
+
+    processes = processes or os.cpu_count()
+
+    with open(csv_file, 'w', newline='') as file, multiprocessing.Pool(processes) as pool:
+        writer = csv.writer(file)
+        writer.writerow(["Date", "Commit", *[name for _, name in data_points]])
+
+        # Pool.imap() reads its whole input up front, so outputs are given to the pool in batches to bound memory use
+        while True:
+            batch = list(itertools.islice(outputs, processes * chunk_size * 4))
+
+            if not batch:
+                break
+
+            for row in pool.imap(parse, batch, chunksize=chunk_size):
+                if row is not None:
+                    writer.writerow(row)
+                    yield row
+
+
+def plot_csv(csv_file, plot_file):
+    """
+    Plots every data point in a CSV file written by parse_outputs() against the commit time.  The CSV file is loaded
+    into arrays and downsampled by aggregate.py, rather than plotting every row.
+
+    :param csv_file: Location of the CSV file
+    :param plot_file: Location of the image to save
+    :return: None
+    """
+
+    import aggregate
+
+    aggregate.plot(aggregate.load_csv(csv_file), plot_file)
+
+
+def prompt_pairs(position_prompt, value_prompt):
     result = []
 
     while True:
-        pos = input('Data position:\n> ')
+        pos = input(position_prompt)
 
         if pos == "":
             break
@@ -46,75 +224,91 @@ def get_data_points():
             print("That's not an integer, please enter a valid integer")
             continue
 
-        name = input('Data point name:\n> ')
+        value = input(value_prompt)
 
-        if name == "":
+        if value == "":
             break
 
-        result.append((pos, name))
+        result.append((pos, value))
 
     return result
 
 
-search_path = input('Enter path to search files from:\n> ')
-search_terms = get_search_terms()
-plot_values = get_data_points()
+def load_spec(spec_file):
+    """
+    Loads the search path, search terms and data points from a YAML file, for example:
 
-results = {}
+    .. code-block:: yaml
 
-with open("data/output.csv", 'w', newline='') as file:
-    writer = csv.writer(file)
+        Search Path: output/cloc/
+        Search Terms:
+          - Position: 0
+            Text: SUM
+        Data Points:
+          - Position: 4
+            Name: Lines of code
 
-    writer.writerow(["Date", "Commit", *[name for pos, name in plot_values]])
+    :param spec_file: Location of the YAML file
+    :return: Tuple of the search path, search terms and data points
+    """
 
-    lst = os.listdir(search_path)
-    lst.sort()
+    with open(spec_file, 'r') as file:
+        spec = yaml.safe_load(file)
 
-    for output_file in lst:
-        file_path = f"{search_path}/{output_file}"
+    return spec.get('Search Path'), [(term['Position'], str(term['Text'])) for term in spec['Search Terms']], \
+        [(point['Position'], point['Name']) for point in spec['Data Points']]
 
-        if os.path.getsize(file_path) > 0:
-            file_name, file_extension = os.path.splitext(output_file)
-            commit_time, commit_id = output_file.split('_')
 
-            commit_id, file_ext = commit_id.split('.')
+def main():
+    parser = argparse.ArgumentParser(description="Extract data points from GitSlice output into a CSV file",
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument("search_path", nargs='?', help="directory of output files, or a results.sqlite file")
+    parser.add_argument("-s", "--spec", help="YAML file giving the search path, search terms and data points")
+    parser.add_argument("-t", "--term", nargs=2, action='append', metavar=('POSITION', 'TEXT'), default=[],
+                        help="word which must be at a position of the matching line, may be repeated")
+    parser.add_argument("-d", "--data", nargs=2, action='append', metavar=('POSITION', 'NAME'), default=[],
+                        help="word to extract from the matching line, may be repeated")
+    parser.add_argument("-o", "--output", help="CSV file to write", default="data/output.csv")
+    parser.add_argument("-p", "--plot", help="image to plot the data points to, empty to disable",
+                        default="data/output.png")
+    parser.add_argument("-j", "--processes", help="amount of processes, defaults to the amount of CPUs", type=int)
+    parser.add_argument("-q", "--quiet", help="don't print each matching output", action='store_true')
 
-            with open(file_path, 'r') as fp:
+    args = parser.parse_args(sys.argv[1:])
 
-                for line in fp:
-                    values = " ".join(line.split()).split(' ')
+    search_path = args.search_path
+    search_terms = [(int(pos), text) for pos, text in args.term]
+    data_points = [(int(pos), name) for pos, name in args.data]
 
-                    try:
-                        for pos, text in search_terms:
-                            if values[pos] != text:
-                                break
-                        else:
-                            commit_time_object = datetime.datetime.utcfromtimestamp(int(commit_time))
-                            data = {}
+    if args.spec:
+        spec_path, search_terms, data_points = load_spec(args.spec)
+        search_path = search_path or spec_path
 
-                            print(f"{commit_id} at {commit_time_object.isoformat(' ')}:")
+    # Without any arguments, prompt for everything like earlier versions of this script
+    if search_path is None:
+        search_path = input('Enter path to search files from:\n> ')
 
-                            for pos, name in plot_values:
-                                x = values[pos]
-                                data[name] = int(re.sub('[^0-9]', '', x))
-                                print(f"> {values[pos]}: {name}")
+    if not search_terms:
+        search_terms = prompt_pairs('Word position:\n> ', 'Search text:\n> ')
 
-                            results[commit_time_object] = data
+    if not data_points:
+        data_points = prompt_pairs('Data position:\n> ', 'Data point name:\n> ')
 
-                            writer.writerow([commit_time_object.isoformat(' '), commit_id, *[val for val in data.values()]])
+    matched = 0
 
-                            break
-                    except IndexError:
-                        pass
+    for row in parse_outputs(search_path, search_terms, data_points, args.output, args.processes):
+        matched += 1
 
+        if not args.quiet:
+            values = ', '.join(f'{name} = {value}' for (_, name), value in zip(data_points, row[2:]))
+            print(f"{row[1]} at {row[0]}: {values}")
 
-fig = plt.figure()
-ax1 = fig.add_subplot(111)
+    print(f"Wrote {matched} rows to {args.output}")
 
-for pos, name in plot_values:
-    ax1.scatter([result for result in results.keys()], [result[name] for result in results.values()], s=10, label=name)
+    if args.plot:
+        plot_csv(args.output, args.plot)
 
-plt.legend(loc='upper left')
-plt.xlabel('Time')
-plt.savefig('data/output.png')
 
+if __name__ == '__main__':
+    main()